@@ -0,0 +1,135 @@
+"""
+Бенчмарк записів: скільки COMMIT-ів і SQL-запитів (round-trip-ів до БД)
+коштує кожна crud-операція зміни даних.
+
+Запуск (з кореня репозиторію):
+    python benchmarks/commit_counts.py            # таблиця
+    python benchmarks/commit_counts.py --check    # exit 1, якщо операція комітить більше одного разу
+    python benchmarks/commit_counts.py --json out.json
+
+Працює на тимчасовій SQLite-базі і викликає crud напряму (без HTTP),
+тож числа можна порівняти між ревізіями репозиторію.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="designhub-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.chdir(_tmp)
+
+from sqlalchemy import event  # noqa: E402
+
+import crud, models, schemas  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+
+TAGS_PER_WORK = 10
+COMMENTS_PER_WORK = 5
+
+
+class Counter:
+    """Рахує COMMIT-и та SQL-запити на рівні engine."""
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.statements += 1
+
+    def _on_commit(self, *args, **kwargs):
+        self.commits += 1
+
+    def install(self):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+
+def run():
+    models.Base.metadata.create_all(bind=engine)
+    counter = Counter()
+    counter.install()
+    results = {}
+
+    def measure(name, fn):
+        db = SessionLocal()
+        try:
+            counter.reset()
+            value = fn(db)
+            results[name] = {"commits": counter.commits, "statements": counter.statements}
+            return value
+        finally:
+            db.close()
+
+    designer_id = measure("create_user (designer)", lambda db: crud.create_user(
+        db, schemas.UserCreate(email="designer@example.com", firstName="Bench", lastName="Designer",
+                               password="x", role="designer"),
+        hashed_password="x",
+    ).id)
+    reader_id = measure("create_user (reader)", lambda db: crud.create_user(
+        db, schemas.UserCreate(email="reader@example.com", firstName="Bench", lastName="Reader",
+                               password="x", role="designer"),
+        hashed_password="x",
+    ).id)
+    measure("create_category", lambda db: crud.create_category(db, schemas.CategoryCreate(name="Branding")))
+
+    work_id = measure(f"create_work ({TAGS_PER_WORK} new tags)", lambda db: crud.create_work(
+        db, schemas.WorkCreate(title="Work", description="benchmark", categories_ids=[1],
+                               tags_names=[f"tag-{i}" for i in range(TAGS_PER_WORK)]),
+        designer_id=designer_id,
+    ).id)
+    measure(f"update_work ({TAGS_PER_WORK} tags, half new)", lambda db: crud.update_work(
+        db, crud.get_work(db, work_id, schema=None),
+        schemas.WorkUpdate(title="Work v2",
+                           tags_names=[f"tag-{i}" for i in range(TAGS_PER_WORK // 2, TAGS_PER_WORK * 3 // 2)]),
+    ))
+
+    comment_ids = []
+    for i in range(COMMENTS_PER_WORK):
+        comment_ids.append(measure("create_comment (rated)", lambda db: crud.create_comment(
+            db, schemas.CommentCreate(work_id=work_id, comment_text="nice", rating_score=4),
+            author_id=reader_id,
+        ).id))
+    measure("update_comment (rating)", lambda db: crud.update_comment(
+        db, comment_ids[0], schemas.CommentUpdate(rating_score=2)))
+    measure("delete_comment", lambda db: crud.delete_comment(db, comment_ids[-1]))
+    measure("register_work_view", lambda db: crud.register_work_view(db, work_id, reader_id))
+    measure("delete_work", lambda db: crud.delete_work(db, work_id))
+    measure("delete_user", lambda db: crud.delete_user(db, reader_id))
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="fail if any operation commits more than once")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = run()
+    failed = False
+    print(f"{'operation':36} {'commits':>8} {'sql':>5}")
+    for name, stats in results.items():
+        over = stats["commits"] > 1
+        failed |= over
+        print(f"{name:36} {stats['commits']:>8} {stats['statements']:>5}{'  MULTIPLE COMMITS' if over else ''}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
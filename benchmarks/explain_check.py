@@ -0,0 +1,252 @@
+"""
+Перевірка планів запитів: жоден основний crud-запит не повинен читати
+таблицю цілком (Seq Scan), тобто кожному потрібен індекс з migrations/.
+
+Скрипт наповнює базу, виконує crud-функції, перехоплює їхні SQL і для кожного
+SELECT/UPDATE/DELETE бере план:
+    Postgres - EXPLAIN (FORMAT JSON) з SET enable_seqscan = off: планувальник
+               обирає Seq Scan лише тоді, коли індексу, що підходить, немає;
+    SQLite   - EXPLAIN QUERY PLAN: "SCAN <таблиця>" без індексу або
+               AUTOMATIC INDEX (тимчасовий індекс на час запиту).
+
+Запуск (з кореня репозиторію):
+    python benchmarks/explain_check.py                   # тимчасова SQLite-база
+    python benchmarks/explain_check.py --check           # exit 1, якщо є повний скан
+    python benchmarks/explain_check.py --database-url postgresql://.../designhub_explain --check
+    python benchmarks/explain_check.py --verbose         # плани всіх запитів
+
+--database-url має вказувати на ПОРОЖНЮ тестову базу: схема створюється
+міграціями (migrate.py), дані - сидом цього скрипта.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+
+def _parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="порожня Postgres-база (за замовчуванням - тимчасова SQLite)")
+    parser.add_argument("--check", action="store_true", help="exit 1, якщо якийсь запит читає таблицю цілком")
+    parser.add_argument("--verbose", action="store_true", help="друкувати плани всіх запитів")
+    parser.add_argument("--json", metavar="PATH", help="записати результати у JSON")
+    return parser
+
+
+ARGS = _parser().parse_args()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="designhub-bench-")
+os.environ["DATABASE_URL"] = ARGS.database_url or f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.environ["VIEW_BUFFER_ENABLED"] = "false"
+os.chdir(_tmp)
+
+from sqlalchemy import event, inspect  # noqa: E402
+
+import crud, migrate, models  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+
+DESIGNERS = 20
+WORKS_PER_DESIGNER = 25
+TAGS = 60
+TAGS_PER_WORK = 6
+CATEGORIES = 12
+COMMENTS_PER_WORK = 4
+VIEWS_PER_WORK = 5
+
+APP_TABLES = set(models.Base.metadata.tables)
+_EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def seed() -> dict:
+    with engine.connect() as conn:
+        if inspect(conn).has_table("User") and conn.exec_driver_sql('SELECT 1 FROM "User" LIMIT 1').first():
+            sys.exit("База не порожня: --database-url має вказувати на окрему тестову базу")
+    migrate.upgrade(engine)
+
+    db = SessionLocal()
+    users = [
+        models.User(firstName="Bench", lastName=str(i), email=f"user{i}@example.com",
+                    password_hash="x", role=models.UserRole.designer)
+        for i in range(DESIGNERS)
+    ]
+    db.add_all(users)
+    db.flush()
+    db.add_all([models.Designer_Profile(designer_id=user.id) for user in users])
+    categories = [models.Category(name=f"category-{i}") for i in range(CATEGORIES)]
+    tags = [models.Tag(name=f"tag-{i}", work_count=0) for i in range(TAGS)]
+    db.add_all(categories + tags)
+    started = datetime(2024, 1, 1)
+    n = 0
+    for user_index, user in enumerate(users):
+        for _ in range(WORKS_PER_DESIGNER):
+            work_tags = [tags[(n + j * 7) % TAGS] for j in range(TAGS_PER_WORK)]
+            for tag in work_tags:
+                tag.work_count += 1
+            work = models.Work(
+                designer_id=user.id, title=f"Work {n}", description="seeded work",
+                image_url=f"/static/images/seed-{n}.jpg",
+                upload_date=started + timedelta(minutes=n),
+                categories=[categories[n % CATEGORIES]],
+                tags=work_tags,
+            )
+            work.comments = [
+                models.Comment(author_id=users[(user_index + k + 1) % DESIGNERS].id,
+                               comment_text="nice", rating_score=4)
+                for k in range(COMMENTS_PER_WORK)
+            ]
+            work.views = [
+                models.WorkView(user_id=users[(user_index + k + 1) % DESIGNERS].id)
+                for k in range(VIEWS_PER_WORK)
+            ]
+            db.add(work)
+            n += 1
+    db.commit()
+    first = db.query(models.Work).order_by(models.Work.upload_date.desc(), models.Work.id.desc()).first()
+    ids = {
+        "designer": users[0].id,
+        "victim": users[-1].id,
+        "viewer": users[DESIGNERS // 2].id,
+        "work": first.id,
+        "cursor": (first.upload_date, first.id),
+        "category": categories[3].id,
+    }
+    db.close()
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("ANALYZE")
+    return ids
+
+
+def core_queries(ids: dict) -> dict:
+    """Назва -> fn(db): основні шляхи читання і найчастіші записи."""
+    return {
+        "get_works": lambda db: crud.get_works(db, limit=20),
+        "get_works (cursor)": lambda db: crud.get_works(db, limit=20, cursor=ids["cursor"]),
+        "get_works (categories)": lambda db: crud.get_works(db, limit=20, categories_ids=[ids["category"]]),
+        "get_works (tags)": lambda db: crud.get_works(db, limit=20, tags_names=["tag-7", "tag-8"]),
+        "get_works_by_designer": lambda db: crud.get_works_by_designer(db, ids["designer"], limit=20),
+        "get_work": lambda db: crud.get_work(db, ids["work"]),
+        "get_comments_by_work": lambda db: crud.get_comments_by_work(db, ids["work"], limit=20),
+        "get_popular_tags": lambda db: crud.get_popular_tags(db, limit=20),
+        "get_designer_profile": lambda db: crud.get_designer_profile(db, ids["designer"]),
+        "record_work_views": lambda db: crud.record_work_views(db, [(ids["work"], ids["viewer"])]),
+        "collect_media_garbage": lambda db: crud.collect_media_garbage(db, 3600, 100, lambda url: None),
+        "delete_work": lambda db: crud.delete_work(db, ids["work"]),
+        "delete_user": lambda db: crud.delete_user(db, ids["victim"]),
+    }
+
+
+def capture(fn) -> list:
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(_EXPLAINED):
+            # executemany: план однаковий для всіх наборів параметрів
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    db = SessionLocal()
+    try:
+        fn(db)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return statements
+
+
+def _postgres_plan(cursor, statement, parameters) -> tuple:
+    cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+    plan = cursor.fetchone()[0]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    scans, lines = [], []
+
+    def walk(node, depth=0):
+        relation = node.get("Relation Name")
+        lines.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else "")
+                     + (f" using {node['Index Name']}" if node.get("Index Name") else ""))
+        if node["Node Type"] == "Seq Scan" and relation in APP_TABLES:
+            scans.append(relation)
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(plan[0]["Plan"])
+    return scans, lines
+
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+def _sqlite_table(name: str):
+    # joinedload-аліаси: "Tag_1", "User_1"
+    base = re.sub(r"_\d+$", "", name)
+    return name if name in APP_TABLES else base if base in APP_TABLES else None
+
+
+def _sqlite_plan(cursor, statement, parameters) -> tuple:
+    cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+    scans, lines = [], []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        lines.append(detail)
+        match = _SQLITE_SCAN.match(detail)
+        table = _sqlite_table(match.group(1)) if match else None
+        if table and " USING " not in detail:
+            scans.append(table)
+        elif "AUTOMATIC" in detail:
+            scans.append(detail)
+    return scans, lines
+
+
+def explain(statements: list) -> list:
+    planner = _postgres_plan if engine.dialect.name == "postgresql" else _sqlite_plan
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if engine.dialect.name == "postgresql":
+            cursor.execute("SET enable_seqscan = off")
+        results = []
+        for statement, parameters in statements:
+            scans, lines = planner(cursor, statement, parameters)
+            results.append({"sql": " ".join(statement.split()), "full_scans": scans, "plan": lines})
+        return results
+    finally:
+        raw.rollback()
+        raw.close()
+
+
+def main() -> int:
+    ids = seed()
+    results = {}
+    for name, fn in core_queries(ids).items():
+        results[name] = explain(capture(fn))
+
+    failed = False
+    print(f"{engine.dialect.name}: {'query':28} {'sql':>4}   full scans")
+    for name, statements in results.items():
+        scans = sorted({scan for statement in statements for scan in statement["full_scans"]})
+        failed |= bool(scans)
+        print(f"{'':{len(engine.dialect.name) + 2}}{name:28} {len(statements):>4}   {', '.join(scans) or '-'}")
+        for statement in statements:
+            if ARGS.verbose or statement["full_scans"]:
+                print(f"      {statement['sql'][:150]}")
+                for line in statement["plan"]:
+                    print(f"        {line}")
+    if ARGS.json:
+        with open(ARGS.json, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+    if ARGS.check and failed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""
+Навантажувальний бенчмарк усього застосунку: засіяна база (seed.py) +
+справжній FastAPI-застосунок (main.app з lifespan) у процесі, без мережі.
+
+Сценарії (кожен - N запитів, не більше --concurrency одночасно):
+    feed      - стрічка з курсором на кілька сторінок, фільтри за гарячими
+                тегами/категоріями, сторінка роботи, коментарі, профіль і
+                роботи дизайнера (популярні роботи/дизайнери частіше - Zipf)
+    search    - GET /works/search з 1-2 словами
+    views     - шторм переглядів: багато користувачів відкривають кілька
+                гарячих робіт (POST /works/{id}/view)
+    comments  - сплеск коментарів під гарячою роботою
+    logins    - POST /token (bcrypt з BCRYPT_ROUNDS застосунку)
+    uploads   - POST /upload/image/ невеликих PNG (потоковий запис + конвеєр похідних)
+
+Для кожного сценарію: пропускна здатність, p50/p95/p99, помилки; для кожного
+ендпоінта - затримки і скільки SQL-запитів він виконав (середнє/максимум;
+рахуються лише запити, виконані під час обробки цього HTTP-запиту).
+
+Запуск (з кореня репозиторію):
+    python benchmarks/load_test.py                                   # тимчасова SQLite, scale small
+    python benchmarks/load_test.py --scenarios feed,search --requests 2000 --concurrency 32
+    python benchmarks/load_test.py --database-url postgresql://.../designhub_load --scale medium
+    python benchmarks/load_test.py --json results/$(git rev-parse --short HEAD).json
+    python benchmarks/load_test.py --baseline results/main.json      # різниця з попереднім прогоном
+
+JSON з однаковими --seed/--scale/--requests порівнюваний між комітами.
+--database-url має вказувати на ПОРОЖНЮ тестову базу.
+"""
+import argparse
+import asyncio
+import contextvars
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+
+def _parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="порожня база (за замовчуванням - тимчасова SQLite)")
+    parser.add_argument("--scale", choices=["small", "medium", "large"], default="small")
+    parser.add_argument("--seed", type=int, default=0, help="зерно для даних і послідовності запитів")
+    parser.add_argument("--scenarios", default="feed,search,views,comments,logins,uploads")
+    parser.add_argument("--requests", type=int, default=500, help="запитів на сценарій")
+    parser.add_argument("--logins", type=int, default=50, help="запитів у сценарії logins (bcrypt дорогий)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--json", metavar="PATH", help="записати результати у JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON попереднього прогону для порівняння")
+    return parser
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+# Процеси пулів (bcrypt, похідні зображень) стартують через spawn і заново
+# імпортують цей файл: оточення й робочий каталог вони успадковують, а нову
+# тимчасову папку створювати не повинні.
+if __name__ == "__main__":
+    ARGS = _parser().parse_args()
+    # Шляхи - відносно каталогу запуску, до chdir у тимчасову папку
+    for _option in ("json", "baseline"):
+        if getattr(ARGS, _option):
+            setattr(ARGS, _option, os.path.abspath(getattr(ARGS, _option)))
+
+    _tmp = tempfile.mkdtemp(prefix="designhub-bench-")
+    os.environ["DATABASE_URL"] = ARGS.database_url or f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.chdir(_tmp)  # static/ створюється у тимчасовій папці
+
+import httpx  # noqa: E402
+from PIL import Image  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import database, main, models, security  # noqa: E402
+from config import settings  # noqa: E402
+import seed  # noqa: E402
+
+# SQL-лічильник поточного HTTP-запиту. ASGITransport виконує застосунок у задачі
+# клієнта, а run_in_threadpool копіює контекст - тож запити з потоків теж
+# потрапляють у лічильник свого HTTP-запиту, а фонові (view_buffer, конвеєр) - ні.
+_sql_counter: contextvars.ContextVar = contextvars.ContextVar("load_test_sql", default=None)
+
+
+def _count_sql(conn, cursor, statement, parameters, context, executemany):
+    counter = _sql_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def install_sql_counter():
+    event.listen(database.engine, "before_cursor_execute", _count_sql)
+    if database.async_engine is not None:
+        event.listen(database.async_engine.sync_engine, "before_cursor_execute", _count_sql)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _latency_summary(latencies) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    return {f"p{q}_ms": round(percentile(latencies, q) * 1000, 2) for q in (50, 95, 99)}
+
+
+class Recorder:
+    """Затримки, статуси і SQL-запити по ендпоінтах одного сценарію."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.latencies = defaultdict(list)
+        self.sql = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        counter = [0]
+        token = _sql_counter.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _sql_counter.reset(token)
+        self.latencies[endpoint].append(elapsed)
+        self.sql[endpoint].append(counter[0])
+        self.statuses[endpoint][response.status_code] += 1
+        return response
+
+    def endpoints(self) -> dict:
+        return {
+            endpoint: {
+                "requests": len(latencies),
+                **_latency_summary(latencies),
+                "sql_mean": round(sum(self.sql[endpoint]) / len(self.sql[endpoint]), 2),
+                "sql_max": max(self.sql[endpoint]),
+                "statuses": {str(code): count for code, count in sorted(self.statuses[endpoint].items())},
+            }
+            for endpoint, latencies in sorted(self.latencies.items())
+        }
+
+
+# === Сценарії ===
+# Кожен сценарій - async fn(recorder, data, rng) на одну "дію" користувача;
+# дія може складатися з кількох HTTP-запитів (сторінки стрічки).
+
+
+class Data:
+    """
+    Засіяні id + Zipf-вибір популярних робіт, дизайнерів, тегів і активних
+    користувачів. Вибір - з rng дії, тож послідовність запитів не залежить
+    від того, в якому порядку конкурентні дії дійшли до вибору.
+    """
+
+    def __init__(self, info: dict):
+        self.info = info
+        zipf = info["scale"]["zipf"]
+        self.work = _picker(info["works"], zipf)
+        self.designer = _picker(info["designers"], zipf)
+        self.tag = _picker(info["tags"], zipf)
+        self.category = _picker(info["categories"], zipf)
+        self.user_rank = seed.Zipf(len(info["users"]), zipf, None)
+        self._tokens = {}
+
+    def user_headers(self, rank: int) -> dict:
+        token = self._tokens.get(rank)
+        if token is None:
+            # Токен напряму, без /token: bcrypt міряє лише сценарій logins
+            user = SimpleNamespace(email=seed.EMAIL.format(rank), id=self.info["users"][rank],
+                                   role=models.UserRole.designer)
+            token = self._tokens[rank] = security.create_access_token(security.token_claims(user))
+        return {"Authorization": f"Bearer {token}"}
+
+
+def _picker(values, zipf):
+    ranks = seed.Zipf(len(values), zipf, None)
+    return lambda rng: values[ranks(rng)]
+
+
+async def feed(recorder: Recorder, data: Data, rng: random.Random) -> None:
+    roll = rng.random()
+    if roll < 0.5:
+        params = {"limit": 20}
+        if rng.random() < 0.3:
+            params["tags"] = data.tag(rng)
+        elif rng.random() < 0.2:
+            params["categories"] = str(data.category(rng))
+        endpoint = "GET /works/" + ("?tags" if "tags" in params else "?categories" if "categories" in params else "")
+        for _ in range(rng.randint(1, 4)):
+            response = await recorder.request(endpoint, "GET", "/works/", params=params)
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+            params["cursor"] = cursor
+    elif roll < 0.8:
+        work_id = data.work(rng)
+        await recorder.request("GET /works/{id}", "GET", f"/works/{work_id}")
+        await recorder.request("GET /comments/by-work/{id}", "GET", f"/comments/by-work/{work_id}")
+    else:
+        designer_id = data.designer(rng)
+        await recorder.request("GET /profiles/{id}", "GET", f"/profiles/{designer_id}")
+        await recorder.request("GET /works/by-designer/{id}", "GET", f"/works/by-designer/{designer_id}")
+
+
+async def search(recorder: Recorder, data: Data, rng: random.Random) -> None:
+    q = " ".join(rng.sample(seed.WORDS, rng.randint(1, 2)))
+    await recorder.request("GET /works/search", "GET", "/works/search", params={"q": q})
+
+
+async def views(recorder: Recorder, data: Data, rng: random.Random) -> None:
+    # Кілька гарячих робіт, кожну відкривають багато різних користувачів
+    hot = data.info["works"][:5]
+    await recorder.request("POST /works/{id}/view", "POST", f"/works/{rng.choice(hot)}/view",
+                           headers=data.user_headers(rng.randrange(len(data.info["users"]))))
+
+
+async def comments(recorder: Recorder, data: Data, rng: random.Random) -> None:
+    body = {"work_id": data.info["works"][0], "comment_text": "load test comment",
+            "rating_score": rng.randint(1, 5)}
+    await recorder.request("POST /comments/", "POST", "/comments/", json=body,
+                           headers=data.user_headers(data.user_rank(rng)))
+
+
+async def logins(recorder: Recorder, data: Data, rng: random.Random) -> None:
+    form = {"username": seed.EMAIL.format(data.user_rank(rng)), "password": data.info["password"]}
+    await recorder.request("POST /token", "POST", "/token", data=form)
+
+
+def _png(rng: random.Random) -> bytes:
+    image = Image.new("RGB", (320, 240), tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def uploads(recorder: Recorder, data: Data, rng: random.Random) -> None:
+    files = {"file": ("load.png", _png(rng), "image/png")}
+    await recorder.request("POST /upload/image/", "POST", "/upload/image/", files=files)
+
+
+SCENARIOS = {
+    "feed": feed,
+    "search": search,
+    "views": views,
+    "comments": comments,
+    "logins": logins,
+    "uploads": uploads,
+}
+
+
+async def drive(client: httpx.AsyncClient, action, data: Data, actions: int, concurrency: int, seed_value: int):
+    """`actions` дій, не більше `concurrency` одночасно; кожна дія - зі своїм rng."""
+    recorder = Recorder(client)
+    gate = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            try:
+                await action(recorder, data, random.Random(seed_value * 1_000_003 + i))
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(actions)))
+    elapsed = time.perf_counter() - started
+    requests = sum(len(values) for values in recorder.latencies.values())
+    failed = sum(
+        count for statuses in recorder.statuses.values()
+        for code, count in statuses.items() if code >= 500
+    )
+    return {
+        "actions": actions,
+        "requests": requests,
+        "errors": errors + failed,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(requests / elapsed, 1),
+        **_latency_summary(latencies),
+        "endpoints": recorder.endpoints(),
+    }
+
+
+async def run(info: dict, scenarios: list) -> dict:
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=120) as client:
+            data = Data(info)
+            for name in scenarios:
+                actions = ARGS.logins if name == "logins" else ARGS.requests
+                # Зерно від назви: сценарій той самий і при іншому наборі --scenarios
+                scenario_seed = ARGS.seed * 1_000_003 + zlib.crc32(name.encode())
+                results[name] = await drive(client, SCENARIOS[name], data, actions, ARGS.concurrency, scenario_seed)
+    return results
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _delta(current, previous) -> str:
+    if current is None or not previous:
+        return ""
+    return f" ({(current - previous) / previous * 100:+.0f}%)"
+
+
+def report(results: dict, baseline: dict) -> None:
+    previous = baseline.get("scenarios", {}) if baseline else {}
+    print(f"{'scenario / endpoint':34} {'req':>6} {'req/s':>16} {'p50 ms':>9} {'p95 ms':>16} {'p99 ms':>9} "
+          f"{'sql avg':>14} {'err':>4}")
+    for name, stats in results.items():
+        old = previous.get(name, {})
+        print(f"{name:34} {stats['requests']:>6} "
+              f"{str(stats['requests_per_sec']) + _delta(stats['requests_per_sec'], old.get('requests_per_sec')):>16} "
+              f"{stats['p50_ms']:>9} "
+              f"{str(stats['p95_ms']) + _delta(stats['p95_ms'], old.get('p95_ms')):>16} "
+              f"{stats['p99_ms']:>9} {'':>14} {stats['errors']:>4}")
+        for endpoint, row in stats["endpoints"].items():
+            old_row = old.get("endpoints", {}).get(endpoint, {})
+            print(f"  {endpoint:32} {row['requests']:>6} {'':>16} {row['p50_ms']:>9} "
+                  f"{str(row['p95_ms']) + _delta(row['p95_ms'], old_row.get('p95_ms')):>16} {row['p99_ms']:>9} "
+                  f"{str(row['sql_mean']) + _delta(row['sql_mean'], old_row.get('sql_mean')):>14}")
+
+
+def main_cli() -> int:
+    scenarios = [name.strip() for name in ARGS.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"unknown scenario(s): {', '.join(unknown)}; available: {', '.join(SCENARIOS)}", file=sys.stderr)
+        return 2
+    baseline = None
+    if ARGS.baseline:
+        with open(ARGS.baseline) as f:
+            baseline = json.load(f)
+
+    info = seed.populate(database.engine, seed.SCALES[ARGS.scale], seed=ARGS.seed)
+    print(f"seeded {database.engine.dialect.name} ({ARGS.scale}) in {info['seconds']}s")
+    install_sql_counter()
+    results = asyncio.run(run(info, scenarios))
+    report(results, baseline)
+
+    if ARGS.json:
+        output = {
+            "meta": {
+                "commit": _commit(),
+                "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "dialect": database.engine.dialect.name,
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+                "db_async": settings.DB_ASYNC,
+                "view_buffer": settings.VIEW_BUFFER_ENABLED,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "args": {key: value for key, value in vars(ARGS).items() if key not in ("json", "baseline")},
+                "scale": info["scale"],
+            },
+            "scenarios": results,
+        }
+        os.makedirs(os.path.dirname(ARGS.json), exist_ok=True)
+        with open(ARGS.json, "w") as f:
+            json.dump(output, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
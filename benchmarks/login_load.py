@@ -0,0 +1,108 @@
+"""
+Навантажувальний бенчмарк логіну: перевірка паролів (bcrypt) під сплеском.
+
+Порівнює два шляхи:
+  threadpool - як було: синхронний verify у спільному threadpool;
+  pool       - passwords.PasswordHasher (окремий пул процесів + семафор).
+
+Запуск (з кореня репозиторію):
+    python benchmarks/login_load.py --logins 200 --concurrency 64
+    python benchmarks/login_load.py --rounds 10 --json out.json
+
+Звітує p50/p99 затримки, логіни/с та логіни/с на ядро.
+БД не потрібна: вимірюється саме робота з паролями.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+
+import passwords  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def drive(verify, logins: int, concurrency: int):
+    """Запускає `logins` перевірок, не більше `concurrency` одночасно."""
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            started = time.perf_counter()
+            await verify()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    return latencies, time.perf_counter() - started
+
+
+def report(name, latencies, elapsed, cores):
+    throughput = len(latencies) / elapsed
+    return {
+        "mode": name,
+        "logins": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "logins_per_sec": round(throughput, 1),
+        "logins_per_sec_per_core": round(throughput / cores, 2),
+    }
+
+
+async def run(args):
+    hashed = passwords.hash_password("benchmark-password", args.rounds)
+    cores = os.cpu_count() or 1
+    results = []
+
+    async def threadpool_verify():
+        await run_in_threadpool(passwords.verify_and_update, "benchmark-password", hashed, args.rounds)
+
+    latencies, elapsed = await drive(threadpool_verify, args.logins, args.concurrency)
+    results.append(report("threadpool", latencies, elapsed, cores))
+
+    hasher = passwords.PasswordHasher(args.rounds, workers=args.workers)
+    hasher.warm_up()
+    try:
+        async def pool_verify():
+            await hasher.verify_and_update("benchmark-password", hashed)
+
+        latencies, elapsed = await drive(pool_verify, args.logins, args.concurrency)
+        results.append(report("pool", latencies, elapsed, min(cores, hasher.workers)))
+    finally:
+        hasher.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost")
+    parser.add_argument("--workers", type=int, default=0, help="pool size (0 = CPU count)")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'mode':12} {'logins':>7} {'p50 ms':>8} {'p99 ms':>8} {'logins/s':>9} {'per core':>9}")
+    for row in results:
+        print(f"{row['mode']:12} {row['logins']:>7} {row['p50_ms']:>8} {row['p99_ms']:>8} "
+              f"{row['logins_per_sec']:>9} {row['logins_per_sec_per_core']:>9}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
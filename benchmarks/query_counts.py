@@ -0,0 +1,210 @@
+"""
+Регресійний бенчмарк: скільки SQL-запитів, рядків результату
+та ORM-об'єктів коштує кожен публічний ендпоінт читання.
+
+Запуск (з кореня репозиторію):
+    python benchmarks/query_counts.py            # таблиця
+    python benchmarks/query_counts.py --check    # exit 1, якщо бюджет перевищено
+                                                 # або курсор повторює/пропускає рядки
+    python benchmarks/query_counts.py --json out.json
+
+Працює на тимчасовій SQLite-базі, тому не потребує Postgres.
+Сид вставляє всі роботи й коментарі за одну секунду (однакові upload_date /
+review_date) - найгірший випадок для keyset-курсора, який тут теж
+перевіряється: прохід по всіх сторінках за X-Next-Cursor має повернути
+кожен рядок рівно один раз.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="designhub-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+# Режим тестів: ендпоінт понад свій @query_budget падає (sql_profiler.py)
+os.environ["SQL_PROFILE_STRICT"] = "true"
+os.chdir(_tmp)  # static/ створюється у тимчасовій папці
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import main, migrate, models  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from pagination import NEXT_CURSOR_HEADER  # noqa: E402
+
+WORKS = 60
+TAGS_PER_WORK = 8
+COMMENTS_PER_WORK = 10
+PAGE = 20
+
+# Рядків на сторінку робіт: самі роботи + зв'язки work->category і work->tag
+PAGE_ROWS = PAGE + PAGE * 1 + PAGE * TAGS_PER_WORK
+
+# Бюджет на один запит до ендпоінта: (SQL-запитів, рядків, ORM-об'єктів).
+# Якщо хтось знову почне вантажити непотрібні зв'язки (коментарі у стрічці,
+# JOIN колекцій з розмноженням рядків) - --check впаде.
+BUDGETS = {
+    "GET /works/": (3, PAGE_ROWS, PAGE + 1 + 4 + TAGS_PER_WORK * 2),
+    # ID-фаза + гідратація: на один запит більше, але рядків не більше сторінки
+    "GET /works/?tags": (4, PAGE + PAGE_ROWS, PAGE + 1 + 4 + TAGS_PER_WORK * 2),
+    "GET /works/by-designer/{id}": (4, 1 + PAGE_ROWS, 1 + PAGE + 4 + TAGS_PER_WORK * 2),
+    "GET /works/{id}": (3, 1 + 1 + TAGS_PER_WORK, 1 + 1 + 1 + TAGS_PER_WORK),
+    "GET /comments/by-work/{id}": (2, 1 + COMMENTS_PER_WORK, 1 + 1 + COMMENTS_PER_WORK),
+}
+
+
+class Counter:
+    """
+    Рахує SQL-запити (engine) і матеріалізовані ORM-об'єкти (session).
+    Рядки рахуються окремо: SELECT-и повторно виконуються після запиту,
+    бо DBAPI-курсор не знає кількості рядків до fetch.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self.objects = 0
+        self.paused = False
+
+    def reset(self):
+        self.statements = []
+        self.objects = 0
+
+    def rows(self):
+        self.paused = True
+        total = 0
+        try:
+            with engine.connect() as conn:
+                for statement, parameters in self.statements:
+                    if statement.lstrip().upper().startswith("SELECT"):
+                        total += len(conn.exec_driver_sql(statement, parameters).fetchall())
+        finally:
+            self.paused = False
+        return total
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.paused:
+            self.statements.append((statement, parameters))
+
+    def _on_load(self, *args, **kwargs):
+        self.objects += 1
+
+    def install(self):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(Session, "loaded_as_persistent", self._on_load)
+
+
+def seed():
+    migrate.upgrade(engine)
+    db = SessionLocal()
+    designer = models.User(firstName="Bench", lastName="Designer", email="bench@example.com",
+                           password_hash="x", role=models.UserRole.designer)
+    reader = models.User(firstName="Bench", lastName="Reader", email="reader@example.com",
+                         password_hash="x", role=models.UserRole.designer)
+    db.add_all([designer, reader])
+    db.flush()
+    db.add(models.Designer_Profile(designer_id=designer.id))
+    categories = [models.Category(name=f"category-{i}") for i in range(4)]
+    tags = [models.Tag(name=f"tag-{i}") for i in range(TAGS_PER_WORK * 2)]
+    db.add_all(categories + tags)
+    for i in range(WORKS):
+        work = models.Work(
+            designer_id=designer.id, title=f"Work {i}", description="benchmark work",
+            categories=[categories[i % len(categories)]],
+            tags=[tags[(i + j) % len(tags)] for j in range(TAGS_PER_WORK)],
+        )
+        work.comments = [
+            models.Comment(author_id=reader.id, comment_text="nice", rating_score=5)
+            for _ in range(COMMENTS_PER_WORK)
+        ]
+        db.add(work)
+    db.commit()
+    ids = (designer.id, db.query(models.Work.id).order_by(models.Work.id).first()[0])
+    db.close()
+    return ids
+
+
+def walk_cursor(client, url: str, expected: int) -> dict:
+    """Проходить усі сторінки за X-Next-Cursor; перевіряє, що кожен рядок - рівно один раз."""
+    seen, pages, cursor = [], 0, None
+    while pages <= expected:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        response.raise_for_status()
+        seen += [item["id"] for item in response.json()]
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    ok = len(seen) == len(set(seen)) == expected and seen == sorted(seen, reverse=True)
+    return {"pages": pages, "rows": len(seen), "unique": len(set(seen)), "expected": expected, "ok": ok}
+
+
+def run():
+    designer_id, work_id = seed()
+    counter = Counter()
+    counter.install()
+    endpoints = {
+        "GET /works/": f"/works/?limit={PAGE}",
+        "GET /works/?tags": f"/works/?limit={PAGE}&tags=tag-1,tag-2&categories=1,2",
+        "GET /works/by-designer/{id}": f"/works/by-designer/{designer_id}?limit={PAGE}",
+        "GET /works/{id}": f"/works/{work_id}",
+        "GET /comments/by-work/{id}": f"/comments/by-work/{work_id}",
+    }
+    # Сторінки менші за кількість рядків, щоб курсор перетинав межі сторінок
+    walks = {
+        "GET /works/": (f"/works/?limit={PAGE // 2}", WORKS),
+        "GET /comments/by-work/{id}": (f"/comments/by-work/{work_id}?limit=3", COMMENTS_PER_WORK),
+    }
+    results, cursor_walks = {}, {}
+    with TestClient(main.app) as client:
+        for name, url in endpoints.items():
+            counter.reset()
+            response = client.get(url)
+            response.raise_for_status()
+            results[name] = {
+                "statements": len(counter.statements),
+                "rows": counter.rows(),
+                "objects": counter.objects,
+            }
+        for name, (url, expected) in walks.items():
+            cursor_walks[name] = walk_cursor(client, url, expected)
+    return results, cursor_walks
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="fail if any endpoint exceeds its budget")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    results, cursor_walks = run()
+    failed = False
+    print(f"{'endpoint':32} {'sql':>5} {'rows':>6} {'objects':>8}   budget")
+    for name, stats in results.items():
+        budget = BUDGETS[name]
+        actual = (stats["statements"], stats["rows"], stats["objects"])
+        over = any(a > b for a, b in zip(actual, budget))
+        failed |= over
+        print(f"{name:32} {actual[0]:>5} {actual[1]:>6} {actual[2]:>8}   "
+              f"<= {'/'.join(map(str, budget))}{'  OVER BUDGET' if over else ''}")
+    print(f"\n{'cursor walk':32} {'pages':>5} {'rows':>6} {'unique':>8}   expected")
+    for name, walk in cursor_walks.items():
+        failed |= not walk["ok"]
+        print(f"{name:32} {walk['pages']:>5} {walk['rows']:>6} {walk['unique']:>8}   "
+              f"{walk['expected']}{'' if walk['ok'] else '  BROKEN CURSOR'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({**results, "cursor_walks": cursor_walks}, f, indent=2)
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,301 @@
+"""
+Генератор синтетичних даних: користувачі, дизайнери, роботи, теги,
+категорії, коментарі й перегляди з реалістичним (Zipf) розподілом.
+
+Реальні дані дуже нерівномірні, і саме це ламає наївні запити:
+    - кілька дизайнерів мають сотні робіт, більшість - одиниці;
+    - кілька тегів стоять на половині робіт (гарячі фільтри), решта - рідкісні;
+    - перегляди й коментарі зосереджені на невеликій кількості популярних робіт,
+      а пише/дивиться переважно невелике ядро активних користувачів.
+Кожен такий вибір - ранг k з імовірністю ~ 1 / k^s (s = --zipf).
+
+Денормалізовані лічильники (Tag.work_count, views_count, work_amount,
+rating_sum/rating_count/rating) рахуються одразу, як їх вела б сама
+програма, тож maintenance.py reconcile-* на засіяній базі нічого не знаходить.
+Усі користувачі мають пароль PASSWORD; e-mail - user<N>@seed.example.com.
+
+Запуск (з кореня репозиторію):
+    python benchmarks/seed.py --database-url postgresql://.../designhub_bench --scale medium
+    python benchmarks/seed.py --database-url sqlite:///bench.db --works 20000 --views 200000
+
+--database-url має вказувати на ПОРОЖНЮ базу: схема створюється міграціями
+(migrate.py). Той самий --seed дає ті самі дані.
+Як модуль: seed.populate(engine, seed.SCALES["small"]) (див. load_test.py).
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="порожня база для засіву")
+    parser.add_argument("--scale", choices=["small", "medium", "large"], default="small")
+    for field in ("users", "designers", "works", "tags", "categories", "comments", "views"):
+        parser.add_argument(f"--{field}", type=int, help=f"перевизначити кількість ({field}) зі --scale")
+    parser.add_argument("--zipf", type=float, help="показник s розподілу Zipf (за замовчуванням 1.1)")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора (відтворюваність)")
+    return parser
+
+
+if __name__ == "__main__":
+    ARGS = _parser().parse_args()
+    os.environ["DATABASE_URL"] = ARGS.database_url
+    os.environ.setdefault("SECRET_KEY", "seed-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+from sqlalchemy import insert, inspect  # noqa: E402
+from sqlalchemy.engine import Connection, Engine  # noqa: E402
+
+import migrate, models, passwords  # noqa: E402
+from config import settings  # noqa: E402
+
+PASSWORD = "seed-password"
+EMAIL = "user{}@seed.example.com"
+
+# Рядків на один executemany
+CHUNK = 2000
+
+WORDS = (
+    "poster logo brand identity ui-kit landing mobile app dashboard icon set "
+    "typography illustration packaging motion 3d render mockup web minimal "
+    "retro neon pastel dark light editorial magazine cover album print "
+    "character concept sketch vector flat isometric gradient"
+).split()
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    designers: int
+    works: int
+    tags: int
+    categories: int
+    comments: int
+    views: int
+    zipf: float = 1.1
+
+
+SCALES = {
+    "small": Scale(users=500, designers=50, works=2_000, tags=200, categories=15, comments=6_000, views=20_000),
+    "medium": Scale(users=5_000, designers=500, works=20_000, tags=1_000, categories=25,
+                    comments=60_000, views=200_000),
+    "large": Scale(users=50_000, designers=5_000, works=200_000, tags=5_000, categories=40,
+                   comments=600_000, views=2_000_000),
+}
+
+
+class Zipf:
+    """Вибір рангу 0..n-1 з імовірністю ~ 1 / (rank + 1)^s."""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+    def __call__(self, rng: random.Random = None) -> int:
+        return bisect.bisect_left(self.cumulative, (rng or self.rng).random() * self.cumulative[-1])
+
+    def sample(self, k: int) -> List[int]:
+        """k різних рангів (k не більше n)."""
+        chosen = set()
+        while len(chosen) < k:
+            chosen.add(self())
+        return sorted(chosen)
+
+
+def _insert(conn: Connection, table, rows: Sequence[dict], returning=None) -> list:
+    """Пачками по CHUNK; з returning - значення колонки в порядку rows."""
+    returned = []
+    for start in range(0, len(rows), CHUNK):
+        chunk = rows[start:start + CHUNK]
+        if returning is None:
+            conn.execute(insert(table), chunk)
+        else:
+            statement = insert(table).returning(returning, sort_by_parameter_order=True)
+            returned.extend(conn.execute(statement, chunk).scalars())
+    return returned
+
+
+def populate(engine: Engine, scale: Scale, seed: int = 0) -> Dict[str, object]:
+    """
+    Засіває порожню базу (схему створює migrate.upgrade) і повертає
+    опис засіяного: id користувачів/дизайнерів/робіт від найпопулярніших
+    до найменш популярних, назви тегів за популярністю, пароль.
+    """
+    with engine.connect() as conn:
+        if inspect(conn).has_table("User") and conn.exec_driver_sql('SELECT 1 FROM "User" LIMIT 1').first():
+            raise RuntimeError("Database is not empty: seed only into a dedicated database")
+    migrate.upgrade(engine)
+
+    rng = random.Random(seed)
+    designers = min(scale.designers, scale.users)
+    now = datetime.utcnow().replace(microsecond=0)
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        # --- Користувачі (як у crud.create_user - усі з профілем);
+        #     роботи публікують лише перші `designers` ---
+        password_hash = passwords.hash_password(PASSWORD, settings.BCRYPT_ROUNDS)
+        user_ids = _insert(conn, models.User.__table__, [
+            {
+                "firstName": f"Seed{i}", "lastName": "User", "email": EMAIL.format(i),
+                "password_hash": password_hash,
+                "role": models.UserRole.designer,
+                "registration_date": now - timedelta(days=730 - i * 730 // scale.users),
+            }
+            for i in range(scale.users)
+        ], returning=models.User.__table__.c.id)
+        designer_ids = user_ids[:designers]
+
+        category_ids = _insert(conn, models.Category.__table__, [
+            {"name": f"category-{i}"} for i in range(scale.categories)
+        ], returning=models.Category.__table__.c.id)
+        tag_names = [f"{WORDS[i % len(WORDS)]}-{i}" for i in range(scale.tags)]
+
+        # --- Роботи: автор, теги й категорія - за Zipf ---
+        pick_designer = Zipf(designers, scale.zipf, rng)
+        pick_tag = Zipf(scale.tags, scale.zipf, rng)
+        pick_category = Zipf(scale.categories, scale.zipf, rng)
+        work_designer, work_rows, work_tags, work_categories = [], [], [], []
+        for n in range(scale.works):
+            designer = designer_ids[pick_designer()]
+            work_designer.append(designer)
+            words = rng.sample(WORDS, 3)
+            work_rows.append({
+                "designer_id": designer,
+                "title": " ".join(words).capitalize() + f" #{n}",
+                "description": " ".join(rng.choices(WORDS, k=12)),
+                "upload_date": now - timedelta(minutes=(scale.works - n) * 525_600 // scale.works),
+                "views_count": 0,
+                "image_url": f"/static/images/seed/{n}.jpg",
+            })
+            work_tags.append(pick_tag.sample(min(scale.tags, rng.randint(1, 6))))
+            work_categories.append(category_ids[pick_category()])
+
+        tag_counts = [0] * scale.tags
+        for ranks in work_tags:
+            for rank in ranks:
+                tag_counts[rank] += 1
+        tag_ids = _insert(conn, models.Tag.__table__, [
+            {"name": name, "work_count": count} for name, count in zip(tag_names, tag_counts)
+        ], returning=models.Tag.__table__.c.id)
+
+        # --- Перегляди: популярні роботи, активні користувачі, одна пара - один раз.
+        #     Популярність роботи не пов'язана з її датою ---
+        by_popularity = list(range(scale.works))
+        rng.shuffle(by_popularity)
+        pick_work = Zipf(scale.works, scale.zipf, rng)
+        pick_user = Zipf(scale.users, scale.zipf, rng)
+        seen, views = set(), []
+        views_target = min(scale.views, scale.works * scale.users)
+        attempts = 0
+        while len(views) < views_target and attempts < views_target * 20:
+            attempts += 1
+            n, user_rank = by_popularity[pick_work()], pick_user()
+            if (n, user_rank) in seen or user_ids[user_rank] == work_designer[n]:
+                continue
+            seen.add((n, user_rank))
+            views.append((n, user_rank))
+        for n, _ in views:
+            work_rows[n]["views_count"] += 1
+
+        work_ids = _insert(conn, models.Work.__table__, work_rows, returning=models.Work.__table__.c.id)
+        _insert(conn, models.WorkTag, [
+            {"work_id": work_ids[n], "tag_id": tag_ids[rank]}
+            for n, ranks in enumerate(work_tags) for rank in ranks
+        ])
+        _insert(conn, models.WorkCategory, [
+            {"work_id": work_ids[n], "category_id": category}
+            for n, category in enumerate(work_categories)
+        ])
+        _insert(conn, models.WorkView.__table__, [
+            {"work_id": work_ids[n], "user_id": user_ids[user_rank],
+             "viewed_at": work_rows[n]["upload_date"] + timedelta(minutes=rng.randint(1, 60 * 24 * 30))}
+            for n, user_rank in views
+        ])
+
+        # --- Коментарі: ті самі популярні роботи, ~80% з оцінкою ---
+        rating_sum = dict.fromkeys(designer_ids, 0)
+        rating_count = dict.fromkeys(designer_ids, 0)
+        comment_rows = []
+        for _ in range(scale.comments):
+            n = by_popularity[pick_work()]
+            score = rng.choices((None, 1, 2, 3, 4, 5), weights=(20, 3, 5, 15, 30, 27))[0]
+            if score is not None:
+                rating_sum[work_designer[n]] += score
+                rating_count[work_designer[n]] += 1
+            comment_rows.append({
+                "author_id": user_ids[pick_user()], "work_id": work_ids[n], "rating_score": score,
+                "comment_text": " ".join(rng.choices(WORDS, k=rng.randint(3, 20))),
+                "review_date": work_rows[n]["upload_date"] + timedelta(minutes=rng.randint(1, 60 * 24 * 60)),
+            })
+        _insert(conn, models.Comment.__table__, comment_rows)
+
+        # --- Профілі з лічильниками ---
+        profile_views = dict.fromkeys(user_ids, 0)
+        work_amount = dict.fromkeys(user_ids, 0)
+        for n, designer in enumerate(work_designer):
+            profile_views[designer] += work_rows[n]["views_count"]
+            work_amount[designer] += 1
+        _insert(conn, models.Designer_Profile.__table__, [
+            {
+                "designer_id": user, "specialization": rng.choice(WORDS),
+                "views_count": profile_views[user], "work_amount": work_amount[user],
+                "rating_sum": rating_sum.get(user, 0), "rating_count": rating_count.get(user, 0),
+                "rating": round(rating_sum[user] / rating_count[user], 2) if rating_count.get(user) else 0,
+            }
+            for user in user_ids
+        ])
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+    return {
+        "scale": asdict(scale),
+        "seed": seed,
+        "seconds": round(time.perf_counter() - started, 2),
+        "password": PASSWORD,
+        "users": user_ids,
+        "designers": [designer_ids[rank] for rank in range(designers)],
+        "works": [work_ids[n] for n in by_popularity],
+        "tags": tag_names,
+        "categories": category_ids,
+        "views": len(views),
+    }
+
+
+def main() -> int:
+    overrides = {
+        field: getattr(ARGS, field)
+        for field in ("users", "designers", "works", "tags", "categories", "comments", "views", "zipf")
+        if getattr(ARGS, field) is not None
+    }
+    scale = replace(SCALES[ARGS.scale], **overrides)
+    from database import engine
+
+    try:
+        info = populate(engine, scale, seed=ARGS.seed)
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(f"seeded in {info['seconds']}s: {scale.users} users ({len(info['designers'])} designers), "
+          f"{scale.works} works, {scale.tags} tags, {scale.categories} categories, "
+          f"{scale.comments} comments, {info['views']} views")
+    print(f"login: {EMAIL.format(0)} / {PASSWORD}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Мікробенчмарк серіалізації відповідей: скільки коштує перетворити
+сторінку ORM-робіт (List[schemas.Work]) у JSON-байти різними шляхами.
+
+    fastapi      - стандартний шлях: serialize_response (валідація + jsonable_encoder) + JSONResponse
+    fastapi+orjson - те саме, але рендер через ORJSONResponse
+    fast         - serialization.dump_json (TypeAdapter на схему, одразу в JSON)
+
+Запуск (з кореня репозиторію):
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --sizes 1,20,100,500 --repeat 50 --json out.json
+
+БД не потрібна: роботи - транзієнтні ORM-об'єкти з уже заповненими зв'язками.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="designhub-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+import models, schemas, serialization  # noqa: E402
+
+TAGS_PER_WORK = 8
+
+
+def make_works(count: int) -> List[models.Work]:
+    designer = models.User(id=1, firstName="Bench", lastName="Designer", email="bench@example.com",
+                           password_hash="x", role=models.UserRole.designer)
+    categories = [models.Category(id=i, name=f"category-{i}") for i in range(4)]
+    tags = [models.Tag(id=i, name=f"tag-{i}") for i in range(TAGS_PER_WORK * 2)]
+    started = datetime(2024, 1, 1)
+    return [
+        models.Work(
+            id=i, designer_id=designer.id, designer=designer,
+            title=f"Work {i}", description="benchmark work " * 8,
+            image_url=f"/static/images/{i}.png", views_count=i,
+            upload_date=started + timedelta(minutes=i),
+            categories=[categories[i % len(categories)]],
+            tags=[tags[(i + j) % len(tags)] for j in range(TAGS_PER_WORK)],
+        )
+        for i in range(count)
+    ]
+
+
+def measure(fn, repeat: int) -> float:
+    """Медіана одного виклику, мс."""
+    fn()  # прогрів (TypeAdapter/схеми будуються при першому виклику)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(sizes: List[int], repeat: int):
+    field = create_model_field("Response", List[schemas.Work], mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def fastapi_path(works, response_class):
+        content = loop.run_until_complete(serialize_response(field=field, response_content=works))
+        return response_class(content).body
+
+    results = {}
+    for size in sizes:
+        works = make_works(size)
+        baseline = fastapi_path(works, JSONResponse)
+        fast = serialization.dump_json(List[schemas.Work], works)
+        # Обидва шляхи мають віддавати той самий JSON
+        assert json.loads(baseline) == json.loads(fast), "fast path output differs"
+        results[size] = {
+            "bytes": len(fast),
+            "fastapi_ms": measure(lambda: fastapi_path(works, JSONResponse), repeat),
+            "fastapi_orjson_ms": measure(lambda: fastapi_path(works, ORJSONResponse), repeat),
+            "fast_ms": measure(lambda: serialization.dump_json(List[schemas.Work], works), repeat),
+        }
+    loop.close()
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,10,100,500", help="comma-separated page sizes")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = run([int(size) for size in args.sizes.split(",")], args.repeat)
+    print(f"{'works':>6} {'bytes':>9} {'fastapi ms':>11} {'+orjson ms':>11} {'fast ms':>9} {'speedup':>8}")
+    for size, stats in results.items():
+        print(f"{size:>6} {stats['bytes']:>9} {stats['fastapi_ms']:>11.3f} {stats['fastapi_orjson_ms']:>11.3f} "
+              f"{stats['fast_ms']:>9.3f} {stats['fastapi_ms'] / stats['fast_ms']:>7.1f}x")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,163 @@
+"""
+Бенчмарк роздачі /static: звичайний StaticFiles Starlette проти
+media_files.MediaStaticFiles на тих самих content-addressed файлах.
+
+    latency   - час одного запиту в процесі (без мережі): повний GET, GET з
+                Range, умовний GET (If-None-Match -> 304)
+    revisits  - модель браузера/CDN з HTTP-кешем: N переглядів сторінки з M
+                зображеннями; рахуються запити, що дійшли до воркера, і байти.
+                Без Cache-Control кеш мусить перевіряти кожен файл (304),
+                immutable - не ходить зовсім
+
+Запуск (з кореня репозиторію):
+    python benchmarks/static_media.py
+    python benchmarks/static_media.py --files 30 --size 200000 --visits 20 --repeat 300 --json out.json
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="designhub-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+import httpx  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.routing import Mount  # noqa: E402
+from starlette.staticfiles import StaticFiles  # noqa: E402
+
+import media_store  # noqa: E402
+from media_files import MediaStaticFiles  # noqa: E402
+
+
+def make_files(directory: str, count: int, size: int) -> list:
+    """count випадкових "зображень" під ключами images/ab/cd/<sha256>.jpg; повертає URL."""
+    urls = []
+    for _ in range(count):
+        data = os.urandom(size)
+        key = media_store.blob_key(hashlib.sha256(data).hexdigest(), "jpg")
+        path = os.path.join(directory, *key.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        urls.append("/static/" + key)
+    return urls
+
+
+def make_apps(directory: str) -> dict:
+    return {
+        "StaticFiles": Starlette(routes=[Mount("/static", StaticFiles(directory=directory))]),
+        "MediaStaticFiles": Starlette(routes=[
+            Mount("/static", MediaStaticFiles(directory=directory, cache_control="public, max-age=86400")),
+        ]),
+    }
+
+
+async def latency(client: httpx.AsyncClient, url: str, repeat: int) -> dict:
+    etag = (await client.get(url)).headers["etag"]
+    scenarios = {
+        "full": {},
+        "range 64KiB": {"Range": "bytes=0-65535"},
+        "if-none-match": {"If-None-Match": etag},
+    }
+    result = {}
+    for name, headers in scenarios.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            timings.append(time.perf_counter() - started)
+        result[name] = {"status": response.status_code, "median_ms": statistics.median(timings) * 1000}
+    return result
+
+
+def _is_fresh(headers: httpx.Headers) -> bool:
+    directives = [d.strip() for d in headers.get("cache-control", "").split(",")]
+    return "immutable" in directives or any(
+        d.startswith("max-age=") and int(d.split("=", 1)[1]) > 0 for d in directives
+    )
+
+
+async def revisits(client: httpx.AsyncClient, urls: list, visits: int) -> dict:
+    """Приватний кеш: свіжі записи не запитуються, решта - умовним GET з ETag."""
+    cache = {}
+    requests = transferred = 0
+    started = time.perf_counter()
+    for _ in range(visits):
+        for url in urls:
+            cached = cache.get(url)
+            if cached is not None and _is_fresh(cached):
+                continue
+            headers = {"If-None-Match": cached["etag"]} if cached is not None else {}
+            response = await client.get(url, headers=headers)
+            requests += 1
+            transferred += len(response.content)
+            if response.status_code == 200:
+                cache[url] = response.headers
+    return {
+        "origin_requests": requests,
+        "bytes": transferred,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+async def run(args) -> dict:
+    directory = os.path.join(_tmp, "static")
+    urls = make_files(directory, args.files, args.size)
+    results = {}
+    for name, app in make_apps(directory).items():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results[name] = {
+                "latency": await latency(client, urls[0], args.repeat),
+                "revisits": await revisits(client, urls, args.visits),
+            }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=30, help="зображень на сторінці")
+    parser.add_argument("--size", type=int, default=200_000, help="розмір файлу, байт")
+    parser.add_argument("--visits", type=int, default=20, help="переглядів сторінки одним клієнтом")
+    parser.add_argument("--repeat", type=int, default=300, help="повторів для вимірювання затримки")
+    parser.add_argument("--json", help="записати результати у файл")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{'latency (median ms)':<28}" + "".join(f"{name:>18}" for name in results))
+    for scenario in next(iter(results.values()))["latency"]:
+        row = "".join(
+            f"{r['latency'][scenario]['median_ms']:>13.3f} ({r['latency'][scenario]['status']})"
+            for r in results.values()
+        )
+        print(f"{scenario:<28}{row}")
+    print()
+    print(f"{f'{args.visits} visits x {args.files} images':<28}" + "".join(f"{name:>18}" for name in results))
+    for metric in ("origin_requests", "bytes", "seconds"):
+        row = "".join(
+            f"{r['revisits'][metric]:>18.3f}" if metric == "seconds" else f"{r['revisits'][metric]:>18}"
+            for r in results.values()
+        )
+        print(f"{metric:<28}{row}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
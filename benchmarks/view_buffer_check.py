@@ -0,0 +1,148 @@
+"""
+Перевірка буфера переглядів (view_buffer.py): робота чи користувач,
+видалені, поки їхній перегляд ще чекає в буфері, не повинні ламати запис
+пачки. Інакше пачка з "осиротілим" переглядом падала б на FK щоразу,
+буфер заповнювався б, і всі перегляди йшли б повільним синхронним шляхом.
+
+Сценарії:
+    deleted work / deleted user - перегляд видаленої роботи (користувача)
+        відсіюється перед INSERT, решта пачки записується;
+    deleted after check         - рядок проходить перевірку, а INSERT
+        відкидає БД (гонка з видаленням): пачка пишеться половинами,
+        поганий перегляд відкидається, у буфер нічого не повертається.
+
+Запуск (з кореня репозиторію):
+    python benchmarks/view_buffer_check.py       # exit 1, якщо щось не так
+
+Працює на тимчасовій SQLite-базі з увімкненими FOREIGN KEY, щоб порушення
+FK було таким самим, як на Postgres.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix="designhub-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+os.chdir(_tmp)
+
+from sqlalchemy import event  # noqa: E402
+
+import crud, migrate, models  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from view_buffer import VIEWS_DROPPED, ViewBuffer  # noqa: E402
+
+
+@event.listens_for(engine, "connect")
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+
+def seed() -> dict:
+    migrate.upgrade(engine)
+    db = SessionLocal()
+    users = [
+        models.User(firstName="Bench", lastName=str(i), email=f"viewer{i}@example.com",
+                    password_hash="x", role=models.UserRole.designer)
+        for i in range(3)
+    ]
+    db.add_all(users)
+    db.flush()
+    db.add_all([models.Designer_Profile(designer_id=user.id) for user in users])
+    works = [models.Work(designer_id=users[0].id, title=f"Work {i}") for i in range(4)]
+    db.add_all(works)
+    db.commit()
+    ids = {"users": [user.id for user in users], "works": [work.id for work in works]}
+    db.close()
+    return ids
+
+
+def stored_views() -> set:
+    db = SessionLocal()
+    try:
+        return set(db.query(models.WorkView.work_id, models.WorkView.user_id).all())
+    finally:
+        db.close()
+
+
+def delete(fn, row_id: int) -> None:
+    db = SessionLocal()
+    try:
+        fn(db, row_id)
+    finally:
+        db.close()
+
+
+async def scenario(buffer: ViewBuffer, views: list, before_flush) -> dict:
+    for work_id, user_id in views:
+        await buffer.register(work_id, user_id)
+    before_flush()
+    dropped = VIEWS_DROPPED.labels().value
+    written = await buffer.flush()
+    return {
+        "written": written,
+        "dropped": int(VIEWS_DROPPED.labels().value - dropped),
+        "pending": len(buffer),
+    }
+
+
+async def run(ids: dict) -> dict:
+    (designer, viewer, victim), (w1, w2, w3, w4) = ids["users"], ids["works"]
+    # Фонова задача не встигає спрацювати сама: пишемо лише через flush()
+    buffer = ViewBuffer(flush_interval_ms=3_600_000, flush_max_events=10_000, max_pending=10_000)
+    buffer.start()
+    results = {}
+    try:
+        results["deleted work"] = await scenario(
+            buffer, [(w1, viewer), (w2, viewer)], lambda: delete(crud.delete_work, w1)
+        )
+        results["deleted work"]["expected"] = (1, 0, {(w2, viewer)})
+
+        results["deleted user"] = await scenario(
+            buffer, [(w3, victim), (w3, designer)], lambda: delete(crud.delete_user, victim)
+        )
+        results["deleted user"]["expected"] = (1, 0, {(w2, viewer), (w3, designer)})
+
+        # Гонка: перевірка існування вже пройдена, а рядка в БД немає
+        live_view_pairs = crud._live_view_pairs
+        crud._live_view_pairs = lambda db, pairs: pairs
+        try:
+            results["deleted after check"] = await scenario(
+                buffer, [(w4, viewer), (w1, designer), (w2, designer)], lambda: None
+            )
+        finally:
+            crud._live_view_pairs = live_view_pairs
+        results["deleted after check"]["expected"] = (
+            2, 1, {(w2, viewer), (w3, designer), (w4, viewer), (w2, designer)}
+        )
+    finally:
+        await buffer.stop()
+    return results
+
+
+def main() -> int:
+    results = asyncio.run(run(seed()))
+    final_views = stored_views()
+    failed = False
+    print(f"{'scenario':22} {'written':>8} {'dropped':>8} {'pending':>8}   result")
+    for name, result in results.items():
+        written, dropped, _ = result["expected"]
+        ok = (result["written"], result["dropped"], result["pending"]) == (written, dropped, 0)
+        failed |= not ok
+        print(f"{name:22} {result['written']:>8} {result['dropped']:>8} {result['pending']:>8}   "
+              f"{'ok' if ok else f'FAILED (expected {written}/{dropped}/0)'}")
+    expected_views = results["deleted after check"]["expected"][2]
+    if final_views != expected_views:
+        failed = True
+        print(f"Work_View rows {sorted(final_views)} != expected {sorted(expected_views)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
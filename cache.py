@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import metrics
+
+# === Обмежений LRU-кеш з TTL у пам'яті процесу ===
+# Використовується для кешів, де промах - це "просто" запит у БД:
+# значення живе не довше ttl секунд і не більше maxsize записів.
+
+_MISSING = object()
+
+# Усі створені кеші за назвою - для /stats/caches та метрик
+_registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Потокобезпечний LRU-кеш з часом життя записів і лічильниками hit/miss."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if self._data.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def all_stats() -> Dict[str, Dict[str, Any]]:
+    """Статистика всіх кешів процесу."""
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+# === Метрики кешів (читаються під час збору, див. metrics.CallbackMetric) ===
+
+def _cache_samples(field: str):
+    def samples():
+        for name, cache in list(_registry.items()):
+            value = getattr(cache, field)
+            yield (name,), value() if callable(value) else value
+    return samples
+
+
+def _hit_ratio_samples():
+    for name, cache in list(_registry.items()):
+        lookups = cache.hits + cache.misses
+        if lookups:
+            yield (name,), cache.hits / lookups
+
+
+CACHE_HITS = metrics.CallbackMetric(
+    "cache_hits_total", "Влучання в кеш", ["cache"], _cache_samples("hits"), kind="counter"
+)
+CACHE_MISSES = metrics.CallbackMetric(
+    "cache_misses_total", "Промахи кешу", ["cache"], _cache_samples("misses"), kind="counter"
+)
+CACHE_EVICTIONS = metrics.CallbackMetric(
+    "cache_evictions_total", "Записи, витіснені з кешу за розміром", ["cache"],
+    _cache_samples("evictions"), kind="counter",
+)
+CACHE_ENTRIES = metrics.CallbackMetric(
+    "cache_entries", "Записів у кеші", ["cache"], _cache_samples("__len__")
+)
+# Частка влучань з початку роботи процесу - по процесу (у кожного воркера
+# свої кеші); зведену по воркерах дає rate(cache_hits_total) / rate(hits + misses)
+CACHE_HIT_RATIO = metrics.CallbackMetric(
+    "cache_hit_ratio", "Частка влучань у кеш з початку роботи процесу", ["cache"],
+    _hit_ratio_samples, multiprocess_mode="liveall",
+)
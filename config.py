@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -9,6 +10,131 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     DATABASE_URL: str
 
+    # Async-шар БД (AsyncSession + asyncpg) замість sync Session у threadpool.
+    # ASYNC_DATABASE_URL - якщо не задано, виводиться з DATABASE_URL
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Застосовувати міграції (migrate.py) при старті застосунку (Postgres;
+    # SQLite оновлюється при старті завжди). Без цього схема оновлюється
+    # окремим кроком деплою: python migrate.py
+    MIGRATE_ON_STARTUP: bool = False
+
+    # Пул з'єднань (на кожен процес/воркер)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30 # секунд очікування вільного з'єднання
+    DB_POOL_RECYCLE: int = 1800 # перевідкривати з'єднання старші за N секунд
+    DB_POOL_PRE_PING: bool = True
+    # Таймаут одного SQL-запиту на боці Postgres (0 - без обмеження)
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # Сумісність з PgBouncer (transaction pooling): без prepared statements
+    # і сесійних параметрів
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Профілювання SQL по HTTP-запитах (див. sql_profiler.py): Server-Timing,
+    # лог повторюваних запитів (однакових за один HTTP-запит від N - ймовірний N+1).
+    # SQL_PROFILE_STRICT - для тестів/CI: перевищення @query_budget - виняток
+    SQL_PROFILING_ENABLED: bool = True
+    SQL_PROFILE_REPEAT_THRESHOLD: int = 5
+    SQL_PROFILE_STRICT: bool = False
+    SQL_PROFILE_SERVER_TIMING: bool = True
+
+    # Метрики для Prometheus (GET /metrics, див. metrics_export.py). З кількома
+    # воркерами uvicorn задайте спільний каталог METRICS_MULTIPROC_DIR (очищати
+    # перед стартом): кожен процес скидає туди знімок раз на
+    # METRICS_FLUSH_INTERVAL_SECONDS, а /metrics підсумовує знімки всіх
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5
+
+    # Пошук робіт: "auto" (Postgres FTS на Postgres, інакше індекс у процесі),
+    # "postgres" або "memory"
+    SEARCH_BACKEND: str = "auto"
+
+    # Кеш автентифікованих користувачів (ключ - subject токена)
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    # Довіряти id/role з токена без звернення до БД
+    # (видалення/зміна ролі відкликають такі токени лише в межах процесу)
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
+    # Кеш id тегів за назвою (для створення/редагування робіт)
+    TAG_CACHE_SIZE: int = 10000
+    TAG_CACHE_TTL_SECONDS: int = 3600
+
+    # Скільки секунд воркер може віддавати категорії/теги з пам'яті
+    # (інвалідація після запису - лише в тому воркері, що записав)
+    TAXONOMY_CACHE_TTL_SECONDS: int = 60
+
+    # Кеш відповідей публічних ендпоінтів: "memory" (у процесі), "redis"
+    # (спільний для воркерів, потрібен пакет redis) або "none"
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = None
+    RESPONSE_CACHE_SIZE: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_CONTROL: str = "public, no-cache"
+
+    # Швидкий шлях серіалізації: orjson + TypeAdapter на схему,
+    # без повторної валідації відповіді в FastAPI (див. serialization.py).
+    # Вимкнено за замовчуванням: це обхід response_model, і відповіді
+    # ендпоінтів без respond()/store() серіалізує інший кодувальник -
+    # вмикати, переконавшись, що клієнти не помічають різниці
+    FAST_JSON: bool = False
+
+    # Вартість bcrypt. Старі хеші з іншою вартістю оновлюються при логіні
+    BCRYPT_ROUNDS: int = 12
+    # Пул процесів для хешування паролів (0 - за кількістю ядер)
+    PASSWORD_HASH_WORKERS: int = 0
+    # Скільки задач хешування може бути в польоті (0 - 2 x воркери)
+    PASSWORD_HASH_CONCURRENCY: int = 0
+
+    # Буфер переглядів робіт (write-behind): запис пачкою раз на інтервал
+    # або після N переглядів; коли буфер повний - синхронний запис
+    VIEW_BUFFER_ENABLED: bool = True
+    VIEW_FLUSH_INTERVAL_MS: int = 500
+    VIEW_FLUSH_MAX_EVENTS: int = 500
+    VIEW_BUFFER_MAX_PENDING: int = 10000
+
+    # Максимальний розмір одного завантаженого файлу (байт)
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+
+    # Сховище медіафайлів (див. storage.py): "local" (каталог, що роздається
+    # через /static) або "s3" (S3-сумісне сховище, потрібен пакет boto3)
+    STORAGE_BACKEND: str = "local"
+    LOCAL_STORAGE_ROOT: str = "static"
+    LOCAL_STORAGE_URL: str = "/static/"
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # MinIO тощо; для AWS - не задавати
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PUBLIC_URL: Optional[str] = None  # CDN перед бакетом, якщо є
+    # Скільки діє presigned-посилання на пряме завантаження в бакет
+    S3_PRESIGN_EXPIRES_SECONDS: int = 900
+
+    # Роздача /static (див. media_files.py): Cache-Control для файлів, що не є
+    # content-addressed (ті кешуються назавжди), і префікс internal-location
+    # nginx для X-Accel-Redirect (None - байти віддає сам воркер)
+    MEDIA_CACHE_CONTROL: str = "public, max-age=86400"
+    MEDIA_ACCEL_REDIRECT_PREFIX: Optional[str] = None
+
+    # Збирач сміття для файлів без посилань (content-addressed сховище,
+    # див. media_store.py): як часто запускати, скільки файл може лежати без
+    # посилань (завантажений, але ще не прив'язаний до роботи) і розмір пачки
+    MEDIA_GC_ENABLED: bool = True
+    MEDIA_GC_INTERVAL_SECONDS: int = 3600
+    MEDIA_GC_GRACE_SECONDS: int = 24 * 3600
+    MEDIA_GC_BATCH_SIZE: int = 500
+
+    # Похідні зображення (мініатюри/адаптивні розміри, див. images.py):
+    # сучасні формати через кому (непідтримувані Pillow пропускаються),
+    # якість кодування і кількість процесів (0 - половина ядер)
+    IMAGE_VARIANTS_ENABLED: bool = True
+    IMAGE_FORMATS: str = "webp,avif"
+    IMAGE_QUALITY: int = 80
+    IMAGE_WORKERS: int = 0
+
     model_config = SettingsConfigDict(env_file=".env")
 
 # Створюємо єдиний екземпляр налаштувань
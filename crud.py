@@ -1,9 +1,17 @@
 # crud.py
-from sqlalchemy.orm import Session, joinedload, subqueryload
-from typing import List, Optional, Union
-from sqlalchemy import func
-
-import models, schemas, security
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session, joinedload
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, Union
+from pydantic import BaseModel
+from sqlalchemy import bindparam, case, delete, exists, func, insert, literal, select, tuple_, update
+
+import cache, models, schemas, security, search, taxonomy
+from config import settings
+from database import after_commit, transaction
+from pagination import Cursor
+from response_cache import ALL_WORKS, comments_tag, designer_tag, response_cache, work_tag
+from projection import load_options
 
 # === Функції для Користувача (User) ===
 
@@ -19,49 +27,110 @@ def get_users(db: Session, skip: int = 0, limit: int = 100):
     """Отримує список користувачів з пагінацією."""
     return db.query(models.User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    """Створює нового користувача з хешованим паролем та порожнім профілем."""
-    hashed_password = security.get_password_hash(user.password)
-    
-    db_user = models.User(
-        email=user.email,
-        firstName=user.firstName,
-        lastName=user.lastName,
-        password_hash=hashed_password,
-        role=user.role 
-    )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    """
+    Створює нового користувача з хешованим паролем та порожнім профілем.
+    `hashed_password` можна порахувати заздалегідь (у пулі процесів),
+    щоб не тримати bcrypt у потоці з сесією БД.
+    """
+    if hashed_password is None:
+        hashed_password = security.get_password_hash(user.password)
     
-    # Автоматично створюємо порожній профіль для дизайнера
-    if db_user.role == models.UserRole.designer:
-        if not db_user.designer_profile:
-            db_profile = models.Designer_Profile(designer_id=db_user.id)
-            db.add(db_profile)
-            db.commit()
-            db.refresh(db_user)
+    with transaction(db):
+        db_user = models.User(
+            email=user.email,
+            firstName=user.firstName,
+            lastName=user.lastName,
+            password_hash=hashed_password,
+            role=user.role 
+        )
+        db.add(db_user)
+        db.flush() # потрібен id для профілю
+        
+        # Автоматично створюємо порожній профіль для дизайнера
+        if db_user.role == models.UserRole.designer:
+            db.add(models.Designer_Profile(designer_id=db_user.id))
             
+    db.refresh(db_user)
     return db_user
 
 def delete_user(db: Session, user_id: int):
     """Видаляє користувача за ID."""
     db_user = db.query(models.User).filter(models.User.id == user_id).first()
     if db_user:
-        db.delete(db_user)
-        db.commit()
+        with transaction(db):
+            # Разом з користувачем каскадом зникають його роботи та коментарі:
+            # знімаємо їх внесок з лічильників тегів і рейтингів інших дизайнерів
+            link_table = models.WorkTag
+            tag_links = (
+                db.query(link_table.c.tag_id, func.count())
+                .join(models.Work, models.Work.id == link_table.c.work_id)
+                .filter(models.Work.designer_id == user_id)
+                .group_by(link_table.c.tag_id)
+                .all()
+            )
+            _apply_tag_count_deltas(db, {tag_id: -count for tag_id, count in tag_links})
+            ratings = (
+                db.query(
+                    models.Work.designer_id,
+                    func.sum(models.Comment.rating_score),
+                    func.count(models.Comment.rating_score)
+                )
+                .join(models.Comment, models.Comment.work_id == models.Work.id)
+                .filter(
+                    models.Comment.author_id == user_id,
+                    models.Comment.rating_score.isnot(None),
+                    models.Work.designer_id != user_id
+                )
+                .group_by(models.Work.designer_id)
+                .all()
+            )
+            for designer_id, rating_sum, rating_count in ratings:
+                _apply_rating_delta(db, designer_id, -rating_sum, -rating_count)
+            # ... і посилання на файли з його робіт та профілю
+            image_urls = db.scalars(
+                select(models.Work.image_url).where(models.Work.designer_id == user_id)
+            ).all()
+            profile = db_user.designer_profile
+            if profile is not None:
+                image_urls += [profile.header_image_url, profile.avatar_url]
+            _adjust_media_refs(db, removed=image_urls)
+            db.delete(db_user)
+            after_commit(db, lambda: security.invalidate_principal(db_user.email))
+            # Ім'я/роль автора вбудовані в роботи й коментарі - простіше скинути весь кеш
+            after_commit(db, response_cache.clear)
+    return db_user
+
+def update_user_role(db: Session, user_id: int, role: models.UserRole):
+    """Змінює роль користувача (і скидає його кешовані дані автентифікації)."""
+    db_user = get_user(db, user_id=user_id)
+    if db_user:
+        with transaction(db):
+            db_user.role = role
+            after_commit(db, lambda: security.invalidate_principal(db_user.email))
+            # Ім'я/роль автора вбудовані в роботи й коментарі - простіше скинути весь кеш
+            after_commit(db, response_cache.clear)
+        db.refresh(db_user)
     return db_user
 
 def authenticate_user(db: Session, email: str, password: str):
-    """Перевіряє email та пароль користувача."""
+    """Перевіряє email та пароль користувача (синхронно, блокує потік на bcrypt)."""
     user = get_user_by_email(db, email=email)
     if not user:
         return False
-    if not security.verify_password(password, user.password_hash):
+    valid, new_hash = security.verify_and_update_password(password, user.password_hash)
+    if not valid:
         return False
+    if new_hash:
+        update_password_hash(db, user, new_hash)
     return user
 
+def update_password_hash(db: Session, db_user: models.User, password_hash: str):
+    """Зберігає перерахований хеш (після зміни вартості bcrypt)."""
+    with transaction(db):
+        db_user.password_hash = password_hash
+    return db_user
+
 # === Функції для Категорій (Category) ===
 
 def get_category(db: Session, category_id: int):
@@ -74,48 +143,165 @@ def get_categories(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Category).offset(skip).limit(limit).all()
 
 def create_category(db: Session, category: schemas.CategoryCreate):
-    db_category = models.Category(name=category.name)
-    db.add(db_category)
-    db.commit()
+    with transaction(db):
+        db_category = models.Category(name=category.name)
+        db.add(db_category)
+        after_commit(db, taxonomy.categories.invalidate)
     db.refresh(db_category)
     return db_category
 
 # === Функції для Тегів (Tag) ===
 
+# Кеш процесу: нормалізована назва тегу -> id. Теги не видаляються,
+# тож id для назви не змінюється; записи нових тегів потрапляють сюди лише після commit
+_tag_id_cache = cache.TTLCache(
+    "tag_ids", maxsize=settings.TAG_CACHE_SIZE, ttl=settings.TAG_CACHE_TTL_SECONDS
+)
+
+def normalize_tag_name(name: str) -> str:
+    """' UI  Kit ' -> 'ui kit': без зайвих пробілів, у нижньому регістрі."""
+    return " ".join(name.split()).lower()
+
 def get_tag(db: Session, tag_id: int):
     return db.query(models.Tag).filter(models.Tag.id == tag_id).first()
 
 def get_tag_by_name(db: Session, name: str):
-    return db.query(models.Tag).filter(models.Tag.name == name).first()
+    return db.query(models.Tag).filter(models.Tag.name == normalize_tag_name(name)).first()
 
 def get_tags(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Tag).offset(skip).limit(limit).all()
 
-def create_tag_or_get(db: Session, tag_name: str) -> models.Tag:
-    """Створює тег, якщо він не існує, або повертає існуючий."""
-    db_tag = get_tag_by_name(db, name=tag_name)
-    if db_tag:
-        return db_tag
-    db_tag = models.Tag(name=tag_name)
-    db.add(db_tag)
-    db.commit()
+def create_tag(db: Session, tag: schemas.TagCreate):
+    """Створює тег (назва нормалізується, як і при створенні роботи)."""
+    with transaction(db):
+        db_tag = models.Tag(name=normalize_tag_name(tag.name))
+        db.add(db_tag)
+        after_commit(db, taxonomy.tags.invalidate)
     db.refresh(db_tag)
     return db_tag
 
+def resolve_tag_ids(db: Session, tag_names: Iterable[str]) -> List[int]:
+    """
+    Повертає id тегів за назвами (у порядку назв, без дублікатів),
+    створюючи відсутні. Замість SELECT + INSERT на кожен тег:
+      - назви, відомі кешу процесу, не потребують запиту взагалі;
+      - решта шукається одним SELECT ... WHERE name IN (...);
+      - відсутні вставляються одним INSERT ... ON CONFLICT DO NOTHING RETURNING
+        (паралельна вставка того ж тегу не падає на унікальному індексі).
+    Не комітить: виконується в транзакції операції над роботою.
+    """
+    names = [name for name in dict.fromkeys(normalize_tag_name(n) for n in tag_names) if name]
+    ids: Dict[str, int] = {}
+    for name in names:
+        tag_id = _tag_id_cache.get(name)
+        if tag_id is not None:
+            ids[name] = tag_id
+
+    def select_ids(missing):
+        rows = db.query(models.Tag.id, models.Tag.name).filter(models.Tag.name.in_(missing)).all()
+        for row in rows:
+            ids[row.name] = row.id
+            _tag_id_cache.set(row.name, row.id)
+
+    missing = [name for name in names if name not in ids]
+    if missing:
+        select_ids(missing)
+        missing = [name for name in names if name not in ids]
+    if missing:
+        tag_table = models.Tag.__table__
+        stmt = _insert_ignore_conflicts(db, tag_table, ["name"])
+        if stmt is None:
+            stmt = insert(tag_table)
+        result = db.execute(
+            stmt.returning(tag_table.c.id, tag_table.c.name),
+            [{"name": name} for name in missing]
+        )
+        created = {row.name: row.id for row in result}
+        ids.update(created)
+        # Новий тег може зникнути при rollback - кешуємо лише після commit
+        after_commit(db, lambda: [_tag_id_cache.set(name, tag_id) for name, tag_id in created.items()])
+        if created:
+            after_commit(db, taxonomy.tags.invalidate)
+        # Конфлікт: тег щойно створила паралельна транзакція
+        lost = [name for name in missing if name not in ids]
+        if lost:
+            select_ids(lost)
+    return [ids[name] for name in names if name in ids]
+
+def _set_work_tags(db: Session, work_id: int, tag_ids: List[int], replace: bool = False):
+    """
+    Записує зв'язки Work_Tag напряму (без завантаження об'єктів Tag)
+    і на ту ж дельту змінює Tag.work_count - лише для зв'язків,
+    які справді додались/зникли (RETURNING).
+    """
+    link_table = models.WorkTag
+    deltas: Dict[int, int] = {}
+    if replace:
+        stale = link_table.delete().where(link_table.c.work_id == work_id)
+        if tag_ids:
+            stale = stale.where(link_table.c.tag_id.notin_(tag_ids))
+        for row in db.execute(stale.returning(link_table.c.tag_id)):
+            deltas[row.tag_id] = deltas.get(row.tag_id, 0) - 1
+    if tag_ids:
+        stmt = _insert_ignore_conflicts(db, link_table, ["work_id", "tag_id"])
+        if stmt is not None:
+            result = db.execute(
+                stmt.returning(link_table.c.tag_id),
+                [{"work_id": work_id, "tag_id": tag_id} for tag_id in tag_ids]
+            )
+            added = [row.tag_id for row in result]
+        else:
+            linked = {
+                row.tag_id for row in
+                db.execute(select(link_table.c.tag_id).where(link_table.c.work_id == work_id))
+            }
+            added = [tag_id for tag_id in tag_ids if tag_id not in linked]
+            if added:
+                db.execute(insert(link_table), [{"work_id": work_id, "tag_id": tag_id} for tag_id in added])
+        for tag_id in added:
+            deltas[tag_id] = deltas.get(tag_id, 0) + 1
+    _apply_tag_count_deltas(db, deltas)
+
+def _apply_tag_count_deltas(db: Session, deltas: Dict[int, int]):
+    """work_count = work_count + delta для кожного тегу (один executemany)."""
+    changes = [{"tag_id": tag_id, "delta": delta} for tag_id, delta in deltas.items() if delta]
+    if not changes:
+        return
+    tag_table = models.Tag.__table__
+    db.execute(
+        update(tag_table)
+        .where(tag_table.c.id == bindparam("tag_id"))
+        .values(work_count=func.coalesce(tag_table.c.work_count, 0) + bindparam("delta")),
+        changes
+    )
+
+def get_popular_tags(db: Session, limit: int = 20):
+    """Найпопулярніші теги за кількістю робіт (лічильник Tag.work_count, без COUNT по Work_Tag)."""
+    return (
+        db.query(models.Tag)
+        .filter(models.Tag.work_count > 0)
+        .order_by(models.Tag.work_count.desc(), models.Tag.id)
+        .limit(limit)
+        .all()
+    )
+
+def create_tag_or_get(db: Session, tag_name: str) -> models.Tag:
+    """Створює тег, якщо він не існує, або повертає існуючий."""
+    with transaction(db):
+        tag_ids = resolve_tag_ids(db, [tag_name])
+    return get_tag(db, tag_ids[0]) if tag_ids else None
+
 # === Функції для Робіт (Work) ===
 
-def get_work(db: Session, work_id: int):
+def get_work(db: Session, work_id: int, schema: Optional[Type[BaseModel]] = schemas.Work):
     """
-    Отримує одну роботу за ID з усіма пов'язаними даними.
+    Отримує одну роботу за ID.
+    Підвантажуються лише ті зв'язки, що є у схемі відповіді `schema`
+    (`schema=None` - лише колонки, напр. для перевірки існування/прав).
     """
     return (
         db.query(models.Work)
-        .options(
-            joinedload(models.Work.designer),
-            joinedload(models.Work.categories),
-            joinedload(models.Work.tags),
-            subqueryload(models.Work.comments).joinedload(models.Comment.author)
-        )
+        .options(*load_options(models.Work, schema))
         .filter(models.Work.id == work_id)
         .first()
     )
@@ -126,112 +312,206 @@ def get_works(
     limit: int = 20,
     categories_ids: Optional[List[int]] = None,
     tags_names: Optional[List[str]] = None,
-    search_query: Optional[str] = None 
+    search_query: Optional[str] = None,
+    cursor: Optional[Cursor] = None,
+    schema: Optional[Type[BaseModel]] = schemas.Work
 ):
-    """Отримує список робіт з фільтрацією, пошуком та пагінацією."""
-    query = db.query(models.Work).options(
-        joinedload(models.Work.designer),
-        joinedload(models.Work.categories),
-        joinedload(models.Work.tags),
-        subqueryload(models.Work.comments).joinedload(models.Comment.author)
-    )
+    """
+    Отримує список робіт з фільтрацією, пошуком та пагінацією.
+    Якщо передано `cursor` (upload_date, id), `skip` ігнорується
+    і сторінка починається одразу після цього ключа (keyset-пагінація).
+
+    З фільтрами по категоріях/тегах запит виконується у дві фази:
+    спочатку сторінка ID (EXISTS, без JOIN-ів і DISTINCT), потім
+    пакетне завантаження самих робіт і їхніх зв'язків за цими ID.
+    """
+    filters = _work_filters(db, categories_ids, tags_names, search_query)
+
+    if categories_ids or tags_names:
+        ids_query = _paginate_works(db.query(models.Work.id).filter(*filters), skip=skip, cursor=cursor)
+        work_ids = [row.id for row in ids_query.limit(limit)]
+        return _hydrate_works(db, work_ids, schema=schema)
+
+    query = db.query(models.Work).options(*load_options(models.Work, schema)).filter(*filters)
+    query = _paginate_works(query, skip=skip, cursor=cursor)
+    return query.limit(limit).all()
 
+def _work_filters(
+    db: Session,
+    categories_ids: Optional[List[int]] = None,
+    tags_names: Optional[List[str]] = None,
+    search_query: Optional[str] = None
+) -> list:
+    """
+    Умови WHERE для стрічки робіт.
+    Категорії/теги - semi-join через EXISTS: робота з'являється рівно один раз,
+    скільки б збігів по тегах у неї не було, тож DISTINCT не потрібен.
+    """
+    filters = []
     if categories_ids:
-        query = query.join(models.WorkCategory).filter(
-            models.WorkCategory.c.category_id.in_(categories_ids)
+        filters.append(
+            exists().where(
+                models.WorkCategory.c.work_id == models.Work.id,
+                models.WorkCategory.c.category_id.in_(categories_ids)
+            )
         )
     if tags_names:
-        query = query.join(models.WorkTag).join(models.Tag).filter(
-            models.Tag.name.in_(tags_names)
+        filters.append(
+            exists().where(
+                models.WorkTag.c.work_id == models.Work.id,
+                models.WorkTag.c.tag_id == models.Tag.id,
+                # Нові теги зберігаються нормалізованими, старі - як були введені
+                models.Tag.name.in_(set(tags_names) | {normalize_tag_name(n) for n in tags_names})
+            )
         )
-        
     if search_query:
-        search_pattern = f"%{search_query}%"
-        query = query.filter(
-            models.Work.title.ilike(search_pattern) | 
-            models.Work.description.ilike(search_pattern)
-        )
-
+        # Пошук через індекс (tsvector/trigram або інвертований індекс), а не ILIKE-скан
+        filters.append(search.get_backend(db).match(db, search_query))
+    return filters
+
+def _hydrate_works(db: Session, work_ids: List[int], schema: Optional[Type[BaseModel]] = schemas.Work):
+    """Завантажує роботи за списком ID, зберігаючи порядок сторінки."""
+    if not work_ids:
+        return []
     works = (
-        query.distinct() 
-        .order_by(models.Work.upload_date.desc())
-        .offset(skip)
-        .limit(limit)
+        db.query(models.Work)
+        .options(*load_options(models.Work, schema))
+        .filter(models.Work.id.in_(work_ids))
         .all()
     )
-    return works
+    by_id = {work.id: work for work in works}
+    return [by_id[work_id] for work_id in work_ids if work_id in by_id]
 
 
-def get_works_by_designer(db: Session, designer_id: int, skip: int = 0, limit: int = 20):
+def search_works(
+    db: Session,
+    query: str,
+    skip: int = 0,
+    limit: int = 20,
+    schema: Optional[Type[BaseModel]] = schemas.Work
+):
+    """
+    Повнотекстовий пошук: роботи за релевантністю, з підсвіченими збігами.
+    Повертає список словників {work, rank, highlights} (див. schemas.WorkSearchResult).
+    """
+    backend = search.get_backend(db)
+    ranked = backend.ranked_ids(db, query, skip=skip, limit=limit)
+    works = _hydrate_works(db, [work_id for work_id, _ in ranked], schema=schema)
+    highlights = backend.highlight(db, query, works)
+    ranks = dict(ranked)
+    return [
+        {"work": work, "rank": ranks[work.id], "highlights": highlights.get(work.id, {})}
+        for work in works
+    ]
+
+def get_works_by_designer(
+    db: Session,
+    designer_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[Cursor] = None,
+    schema: Optional[Type[BaseModel]] = schemas.Work
+):
     """Отримує список робіт конкретного дизайнера."""
-    return (
+    query = (
         db.query(models.Work)
-        .options(
-            joinedload(models.Work.designer),
-            joinedload(models.Work.categories),
-            joinedload(models.Work.tags),
-            subqueryload(models.Work.comments).joinedload(models.Comment.author)
-        )
+        .options(*load_options(models.Work, schema))
         .filter(models.Work.designer_id == designer_id)
-        .order_by(models.Work.upload_date.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
     )
+    query = _paginate_works(query, skip=skip, cursor=cursor)
+    return query.limit(limit).all()
+
+def _paginate_works(query, skip: int = 0, cursor: Optional[Cursor] = None):
+    """
+    Сортування стрічки (нові спочатку) + OFFSET або keyset-умова.
+    `id` додано як тай-брейкер, щоб порядок був стабільним
+    і відповідав складеному індексу (upload_date, id).
+    """
+    query = query.order_by(models.Work.upload_date.desc(), models.Work.id.desc())
+    if cursor is not None:
+        key = (models.Work.upload_date, models.Work.id)
+        return query.filter(tuple_(*key) < tuple_(*cursor, types=[c.type for c in key]))
+    return query.offset(skip)
+
+def _invalidate_responses(db: Session, *tags: str):
+    """Скинути закешовані відповіді з цими тегами після commit (див. response_cache.py)."""
+    after_commit(db, lambda: response_cache.invalidate(*tags))
 
 def create_work(db: Session, work: schemas.WorkCreate, designer_id: int):
-    """Створює нову роботу та збільшує лічильник робіт у профілі."""
-    db_work = models.Work(
-        title=work.title,
-        description=work.description,
-        image_url=work.image_url,
-        designer_id=designer_id
-    )
-    if work.categories_ids:
-        db_categories = db.query(models.Category).filter(
-            models.Category.id.in_(work.categories_ids)
-        ).all()
-        db_work.categories = db_categories
-    if work.tags_names:
-        db_tags = []
-        for tag_name in work.tags_names:
-            db_tag = create_tag_or_get(db, tag_name=tag_name)
-            db_tags.append(db_tag)
-        db_work.tags = db_tags
-        
-    db.add(db_work)
-    db.commit()
-    
-    # --- ОНОВЛЕННЯ: Збільшуємо кількість робіт у профілі ---
-    db_profile = get_designer_profile(db, designer_id)
-    if db_profile:
-        db_profile.work_amount += 1
-        db.add(db_profile)
-        db.commit()
-    # -----------------------------------------------------
+    """Створює нову роботу та збільшує лічильник робіт у профілі (одна транзакція)."""
+    with transaction(db):
+        db_work = models.Work(
+            title=work.title,
+            description=work.description,
+            image_url=work.image_url,
+            # Похідні могли бути згенеровані ще до створення роботи
+            image_variants=get_media_variants(db, work.image_url),
+            designer_id=designer_id
+        )
+        db.add(db_work)
+        if work.categories_ids:
+            db_categories = db.query(models.Category).filter(
+                models.Category.id.in_(work.categories_ids)
+            ).all()
+            db_work.categories = db_categories
+        db.flush()
+        if work.tags_names:
+            _set_work_tags(db, db_work.id, resolve_tag_ids(db, work.tags_names))
+
+        # --- ОНОВЛЕННЯ: Збільшуємо кількість робіт у профілі ---
+        _increment_work_amount(db, designer_id, 1)
+        # -----------------------------------------------------
+        _adjust_media_refs(db, added=[work.image_url])
+        after_commit(db, lambda: search.get_backend(db).index_work(db_work))
+        _invalidate_responses(db, ALL_WORKS, designer_tag(designer_id))
 
-    db.refresh(db_work)
     return get_work(db, work_id=db_work.id)
 
+def _increment_work_amount(db: Session, designer_id: int, delta: int):
+    """Атомарно змінює work_amount профілю (не нижче нуля), без читання профілю."""
+    profile = models.Designer_Profile
+    db.execute(
+        update(profile)
+        .where(profile.designer_id == designer_id)
+        .values(work_amount=case(
+            (func.coalesce(profile.work_amount, 0) + delta < 0, 0),
+            else_=func.coalesce(profile.work_amount, 0) + delta
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
 def delete_work(db: Session, work_id: int):
-    """Видаляє роботу за ID та зменшує лічильник робіт."""
+    """Видаляє роботу за ID та зменшує лічильник робіт і рейтинг дизайнера."""
     db_work = db.query(models.Work).filter(models.Work.id == work_id).first()
     if db_work:
         designer_id = db_work.designer_id
-        
-        db.delete(db_work)
-        db.commit()
-        
-        # --- ОНОВЛЕННЯ: Зменшуємо кількість робіт у профілі ---
-        db_profile = get_designer_profile(db, designer_id)
-        if db_profile and db_profile.work_amount > 0:
-            db_profile.work_amount -= 1
-            db.add(db_profile)
-            db.commit()
-        # -----------------------------------------------------
 
-        # Запускаємо перерахунок рейтингу
-        _recalculate_designer_rating(db, designer_id=designer_id)
+        # Оцінки коментарів цієї роботи виходять з рейтингу дизайнера
+        rating_sum, rating_count = (
+            db.query(
+                func.coalesce(func.sum(models.Comment.rating_score), 0),
+                func.count(models.Comment.rating_score)
+            )
+            .filter(models.Comment.work_id == work_id)
+            .one()
+        )
+
+        with transaction(db):
+            # Зв'язки з тегами прибираємо самі, щоб зменшити Tag.work_count
+            _set_work_tags(db, work_id, [], replace=True)
+            db.expire(db_work, ["tags"]) # інакше ORM спробує видалити ці зв'язки ще раз
+            db.delete(db_work)
+            
+            # --- ОНОВЛЕННЯ: Зменшуємо кількість робіт у профілі ---
+            _increment_work_amount(db, designer_id, -1)
+            # -----------------------------------------------------
+
+            _apply_rating_delta(db, designer_id, -rating_sum, -rating_count)
+            _adjust_media_refs(db, removed=[db_work.image_url])
+            after_commit(db, lambda: search.get_backend(db).remove_work(work_id))
+            _invalidate_responses(
+                db, ALL_WORKS, work_tag(work_id), comments_tag(work_id), designer_tag(designer_id)
+            )
         
     return db_work
 
@@ -240,39 +520,41 @@ def update_work(db: Session, db_work: models.Work, work_update: schemas.WorkUpda
     Оновлює існуючу роботу.
     Змінює прості поля (назва, опис) та зв'язки Many-to-Many (категорії, теги).
     """
-    # 1. Перетворюємо Pydantic-модель у словник, виключаючи пусті поля (None)
-    update_data = work_update.model_dump(exclude_unset=True)
-
-    # 2. Оновлення КАТЕГОРІЙ (Many-to-Many)
-    # Якщо список категорій передано, ми повністю замінюємо старі категорії на нові
-    if "categories_ids" in update_data:
-        categories_ids = update_data.pop("categories_ids")
-        # Знаходимо всі об'єкти категорій за переданими ID
-        new_categories = db.query(models.Category).filter(
-            models.Category.id.in_(categories_ids)
-        ).all()
-        # Присвоюємо список об'єктів. SQLAlchemy автоматично оновить проміжну таблицю.
-        db_work.categories = new_categories
-
-    # 3. Оновлення ТЕГІВ (Many-to-Many)
-    # Аналогічно, якщо передано теги - замінюємо старий набір новим
-    if "tags_names" in update_data:
-        tags_names = update_data.pop("tags_names")
-        new_tags = []
-        for tag_name in tags_names:
-            # Використовуємо твою існуючу функцію create_tag_or_get
-            # щоб не дублювати теги, якщо вони вже є в базі
-            tag = create_tag_or_get(db, tag_name=tag_name)
-            new_tags.append(tag)
-        db_work.tags = new_tags
-
-    # 4. Оновлення простих полів (title, description, image_url)
-    for key, value in update_data.items():
-        setattr(db_work, key, value)
-
-    db.add(db_work)
-    db.commit()
-    db.refresh(db_work)
+    with transaction(db):
+        # 1. Перетворюємо Pydantic-модель у словник, виключаючи пусті поля (None)
+        update_data = work_update.model_dump(exclude_unset=True)
+
+        # 2. Оновлення КАТЕГОРІЙ (Many-to-Many)
+        # Якщо список категорій передано, ми повністю замінюємо старі категорії на нові
+        if "categories_ids" in update_data:
+            categories_ids = update_data.pop("categories_ids")
+            # Знаходимо всі об'єкти категорій за переданими ID
+            new_categories = db.query(models.Category).filter(
+                models.Category.id.in_(categories_ids)
+            ).all()
+            # Присвоюємо список об'єктів. SQLAlchemy автоматично оновить проміжну таблицю.
+            db_work.categories = new_categories
+
+        # 3. Оновлення ТЕГІВ (Many-to-Many)
+        # Аналогічно, якщо передано теги - замінюємо старий набір новим
+        if "tags_names" in update_data:
+            tags_names = update_data.pop("tags_names")
+            # Усі теги - пакетно (resolve_tag_ids), зв'язки - напряму в Work_Tag
+            _set_work_tags(db, db_work.id, resolve_tag_ids(db, tags_names), replace=True)
+            # Колекцію перечитає get_work нижче
+            db.expire(db_work, ["tags"])
+
+        # 4. Оновлення простих полів (title, description, image_url)
+        old_image_url = db_work.image_url
+        for key, value in update_data.items():
+            setattr(db_work, key, value)
+        if "image_url" in update_data and db_work.image_url != old_image_url:
+            db_work.image_variants = get_media_variants(db, db_work.image_url)
+            _adjust_media_refs(db, added=[db_work.image_url], removed=[old_image_url])
+
+        db.add(db_work)
+        after_commit(db, lambda: search.get_backend(db).index_work(db_work))
+        _invalidate_responses(db, ALL_WORKS, work_tag(db_work.id), designer_tag(db_work.designer_id))
 
     # Повертаємо об'єкт через get_work, щоб у відповіді 
     # точно були підвантажені всі зв'язки (автор, коментарі і т.д.)
@@ -297,10 +579,11 @@ def update_designer_profile(db: Session, user_id: int, profile_data: schemas.Des
 
     # Оновлюємо тільки ті поля, що прийшли (exclude_unset=True)
     update_data = profile_data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_profile, key, value)
+    with transaction(db):
+        for key, value in update_data.items():
+            setattr(db_profile, key, value)
+        _invalidate_responses(db, designer_tag(user_id))
         
-    db.commit()
     db.refresh(db_profile)
     return db_profile
 
@@ -312,8 +595,11 @@ def update_designer_header_image(db: Session, user_id: int, image_path: str):
     """
     db_profile = get_designer_profile(db, user_id)
     if db_profile:
-        db_profile.header_image_url = image_path
-        db.commit()
+        with transaction(db):
+            _adjust_media_refs(db, added=[image_path], removed=[db_profile.header_image_url])
+            db_profile.header_image_url = image_path
+            db_profile.header_image_variants = get_media_variants(db, image_path)
+            _invalidate_responses(db, designer_tag(user_id))
         db.refresh(db_profile)
     return db_profile
 
@@ -323,32 +609,189 @@ def update_designer_avatar(db: Session, user_id: int, image_path: str):
     """
     db_profile = get_designer_profile(db, user_id)
     if db_profile:
-        db_profile.avatar_url = image_path
-        db.commit()
+        with transaction(db):
+            _adjust_media_refs(db, added=[image_path], removed=[db_profile.avatar_url])
+            db_profile.avatar_url = image_path
+            db_profile.avatar_variants = get_media_variants(db, image_path)
+            _invalidate_responses(db, designer_tag(user_id))
         db.refresh(db_profile)
     return db_profile
 
+def set_image_variants(db: Session, image_url: str, variants: dict) -> int:
+    """
+    Записує готові похідні зображення (images.render_variants) у блоб і в усі
+    роботи та профілі, що посилаються на цей файл. Повертає кількість оновлених записів.
+    """
+    work, profile = models.Work, models.Designer_Profile
+    with transaction(db):
+        db.execute(
+            update(models.MediaBlob).where(models.MediaBlob.url == image_url)
+            .values(variants=variants)
+            .execution_options(synchronize_session=False)
+        )
+        works = db.execute(
+            select(work.id, work.designer_id).where(work.image_url == image_url)
+        ).all()
+        if works:
+            db.execute(
+                update(work).where(work.image_url == image_url)
+                .values(image_variants=variants)
+                .execution_options(synchronize_session=False)
+            )
+        designer_ids = {designer_id for _, designer_id in works}
+        updated = len(works)
+        for url_column, variants_column in (
+            (profile.header_image_url, "header_image_variants"),
+            (profile.avatar_url, "avatar_variants"),
+        ):
+            profile_ids = db.execute(
+                select(profile.designer_id).where(url_column == image_url)
+            ).scalars().all()
+            if profile_ids:
+                db.execute(
+                    update(profile).where(url_column == image_url)
+                    .values({variants_column: variants})
+                    .execution_options(synchronize_session=False)
+                )
+                designer_ids.update(profile_ids)
+                updated += len(profile_ids)
+
+        tags = [work_tag(work_id) for work_id, _ in works]
+        tags += [designer_tag(designer_id) for designer_id in designer_ids]
+        if works:
+            tags.append(ALL_WORKS)
+        if tags:
+            _invalidate_responses(db, *tags)
+    return updated
+
+# === Блоби медіа (content-addressed, див. media_store.py) ===
+
+def _utcnow() -> datetime:
+    # Наївний UTC: DateTime-колонки без часової зони (SQLite і Postgres однаково)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def register_media_blob(db: Session, sha256: str, url: str, content_type: str, size: int) -> bool:
+    """
+    Реєструє завантажений блоб (ще без посилань). Повертає False, якщо
+    такий вміст уже є - тоді лише відсуває для нього збирання сміття.
+    """
+    blob = models.MediaBlob.__table__
+    now = _utcnow()
+    values = dict(
+        sha256=sha256, url=url, content_type=content_type, size=size,
+        ref_count=0, unreferenced_since=now,
+    )
+    with transaction(db):
+        stmt = _insert_ignore_conflicts(db, blob, ["sha256"])
+        if stmt is not None:
+            created = db.execute(stmt.values(**values).returning(blob.c.sha256)).first() is not None
+        else:
+            created = db.get(models.MediaBlob, sha256) is None
+            if created:
+                db.execute(insert(blob).values(**values))
+        if not created:
+            # Повторне завантаження: файл знову потрібен, навіть якщо посилань ще немає
+            db.execute(
+                update(blob)
+                .where(blob.c.sha256 == sha256, blob.c.ref_count <= 0)
+                .values(unreferenced_since=now)
+            )
+    return created
+
+def get_media_blob(db: Session, url: str) -> Optional[models.MediaBlob]:
+    return db.scalar(select(models.MediaBlob).where(models.MediaBlob.url == url))
+
+def get_media_variants(db: Session, url: Optional[str]) -> Optional[dict]:
+    """Маніфест похідних для завантаженого файлу (None - немає блоба або ще не готові)."""
+    if not url:
+        return None
+    return db.scalar(select(models.MediaBlob.variants).where(models.MediaBlob.url == url))
+
+def _adjust_media_refs(db: Session, added: Iterable[Optional[str]] = (), removed: Iterable[Optional[str]] = ()):
+    """
+    ref_count += (додані - прибрані посилання) для блобів за URL, один executemany.
+    URL без блоба (зовнішні, старі завантаження) просто не знаходять рядка.
+    Не комітить: виконується в транзакції зміни роботи/профілю.
+    """
+    deltas = Counter(url for url in added if url)
+    deltas.subtract(url for url in removed if url)
+    changes = [{"blob_url": url, "delta": delta} for url, delta in deltas.items() if delta]
+    if not changes:
+        return
+    blob = models.MediaBlob.__table__
+    new_count = blob.c.ref_count + bindparam("delta")
+    db.execute(
+        update(blob)
+        .where(blob.c.url == bindparam("blob_url"))
+        .values(
+            ref_count=new_count,
+            # Останнє посилання зникло - з цього моменту відраховується grace-період
+            unreferenced_since=case(
+                (new_count > 0, None),
+                (blob.c.ref_count > 0, _utcnow()),
+                else_=blob.c.unreferenced_since,
+            ),
+        ),
+        changes
+    )
+
+def collect_media_garbage(
+    db: Session, grace_seconds: float, limit: int, remove: Callable[[str], None]
+) -> List[str]:
+    """
+    Видаляє блоби без посилань довше за grace_seconds (не більше limit за раз).
+    `remove(url)` прибирає файли і викликається ДО commit: поки транзакція
+    тримає видалені рядки, паралельне завантаження того самого вмісту чекає
+    на неї і потім створює блоб (і файл) заново.
+    Повертає URL видалених блобів.
+    """
+    blob = models.MediaBlob
+    cutoff = _utcnow() - timedelta(seconds=grace_seconds)
+    orphaned = (blob.ref_count <= 0, blob.unreferenced_since < cutoff)
+    with transaction(db):
+        candidates = db.scalars(
+            select(blob.sha256).where(*orphaned)
+            .order_by(blob.unreferenced_since)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not candidates:
+            return []
+        # Умови ще раз - посилання могло з'явитись між SELECT і DELETE
+        urls = db.scalars(
+            delete(blob)
+            .where(blob.sha256.in_(candidates), *orphaned)
+            .returning(blob.url)
+            .execution_options(synchronize_session=False)
+        ).all()
+        for url in urls:
+            remove(url)
+    return urls
+
 # === Функції для Рейтингу (Внутрішні та Comments) ===
 
-def _recalculate_designer_rating(db: Session, designer_id: int):
-    """Перераховує середній рейтинг для профілю дизайнера."""
-    new_rating_avg = (
-        db.query(func.avg(models.Comment.rating_score))
-        .join(models.Work, models.Work.id == models.Comment.work_id)
-        .filter(models.Work.designer_id == designer_id)
-        .filter(models.Comment.rating_score.isnot(None)) 
-        .scalar()
+def _apply_rating_delta(db: Session, designer_id: int, sum_delta: int, count_delta: int):
+    """
+    Оновлює накопичені rating_sum/rating_count профілю на дельту і
+    перераховує середнє з них - одним атомарним UPDATE, без AVG по всіх коментарях.
+    Не комітить: виконується в тій самій транзакції, що й зміна коментаря.
+    """
+    if not sum_delta and not count_delta:
+        return
+    profile = models.Designer_Profile
+    new_sum = func.coalesce(profile.rating_sum, 0) + sum_delta
+    new_count = func.coalesce(profile.rating_count, 0) + count_delta
+    db.execute(
+        update(profile)
+        .where(profile.designer_id == designer_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            # У SET праворуч стоять старі значення колонок, тож середнє рахуємо з тих самих виразів
+            rating=case((new_count > 0, new_sum * 1.0 / new_count), else_=0),
+        )
+        .execution_options(synchronize_session=False)
     )
-    
-    new_rating = new_rating_avg if new_rating_avg is not None else 0.0
-    
-    db_profile = get_designer_profile(db, user_id=designer_id)
-    if db_profile:
-        db_profile.rating = new_rating
-        db.commit()
-        db.refresh(db_profile)
-        
-    return db_profile
 
 # === Функції для Коментарів (Comment) ===
 
@@ -356,44 +799,59 @@ def get_comment(db: Session, comment_id: int):
     return (
         db.query(models.Comment)
         .options(
-            joinedload(models.Comment.author),
+            *load_options(models.Comment, schemas.Comment),
+            # work.designer_id потрібен для перерахунку рейтингу при update/delete
             joinedload(models.Comment.work) 
         ) 
         .filter(models.Comment.id == comment_id)
         .first()
     )
 
-def get_comments_by_work(db: Session, work_id: int, skip: int = 0, limit: int = 100):
-    return (
+def get_comments_by_work(
+    db: Session,
+    work_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[Cursor] = None
+):
+    """
+    Коментарі до роботи (нові спочатку).
+    Підтримує keyset-пагінацію по (review_date, id), як і стрічка робіт.
+    """
+    query = (
         db.query(models.Comment)
-        .options(joinedload(models.Comment.author))
+        .options(*load_options(models.Comment, schemas.Comment))
         .filter(models.Comment.work_id == work_id)
-        .order_by(models.Comment.review_date.desc()) 
-        .offset(skip)
-        .limit(limit)
-        .all()
+        .order_by(models.Comment.review_date.desc(), models.Comment.id.desc())
     )
+    if cursor is not None:
+        key = (models.Comment.review_date, models.Comment.id)
+        query = query.filter(tuple_(*key) < tuple_(*cursor, types=[c.type for c in key]))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_comment(db: Session, comment: schemas.CommentCreate, author_id: int):
-    db_work = get_work(db, work_id=comment.work_id)
+    db_work = get_work(db, work_id=comment.work_id, schema=None)
     if not db_work:
         return None 
         
     designer_id = db_work.designer_id
     
-    db_comment = models.Comment(
-        comment_text=comment.comment_text,
-        rating_score=comment.rating_score,
-        work_id=comment.work_id,
-        author_id=author_id
-    )
-    db.add(db_comment)
-    db.commit()
-    
-    if db_comment.rating_score is not None:
-        _recalculate_designer_rating(db, designer_id=designer_id)
+    with transaction(db):
+        db_comment = models.Comment(
+            comment_text=comment.comment_text,
+            rating_score=comment.rating_score,
+            work_id=comment.work_id,
+            author_id=author_id
+        )
+        db.add(db_comment)
+        
+        if db_comment.rating_score is not None:
+            _apply_rating_delta(db, designer_id, db_comment.rating_score, 1)
+        db.flush()
+        _invalidate_responses(db, comments_tag(comment.work_id), designer_tag(designer_id))
     
-    db.refresh(db_comment)
     return get_comment(db, comment_id=db_comment.id)
 
 def update_comment(db: Session, comment_id: int, comment_data: schemas.CommentUpdate):
@@ -405,60 +863,144 @@ def update_comment(db: Session, comment_id: int, comment_data: schemas.CommentUp
     designer_id = db_comment.work.designer_id 
 
     update_data = comment_data.model_dump(exclude_unset=True)
-    rating_changed = 'rating_score' in update_data and update_data['rating_score'] != old_rating
-    
-    for key, value in update_data.items():
-        setattr(db_comment, key, value)
-        
-    db.commit()
     
-    if rating_changed:
-        _recalculate_designer_rating(db, designer_id=designer_id)
+    with transaction(db):
+        for key, value in update_data.items():
+            setattr(db_comment, key, value)
+
+        new_rating = db_comment.rating_score
+        if new_rating != old_rating:
+            _apply_rating_delta(
+                db, designer_id,
+                (new_rating or 0) - (old_rating or 0),
+                (new_rating is not None) - (old_rating is not None)
+            )
+        _invalidate_responses(db, comments_tag(db_comment.work_id), designer_tag(designer_id))
         
-    db.refresh(db_comment)
-    return db_comment
+    # Повертаємо через get_comment, щоб автор був підвантажений для відповіді
+    return get_comment(db, comment_id=comment_id)
 
 def delete_comment(db: Session, comment_id: int):
     db_comment = get_comment(db, comment_id=comment_id)
     if not db_comment:
         return None
 
-    rating_existed = db_comment.rating_score is not None
     designer_id = db_comment.work.designer_id
 
-    db.delete(db_comment)
-    db.commit()
-    
-    if rating_existed:
-        _recalculate_designer_rating(db, designer_id=designer_id)
+    with transaction(db):
+        db.delete(db_comment)
+        
+        if db_comment.rating_score is not None:
+            _apply_rating_delta(db, designer_id, -db_comment.rating_score, -1)
+        _invalidate_responses(db, comments_tag(db_comment.work_id), designer_tag(designer_id))
         
     return db_comment
 
-def register_work_view(db: Session, work_id: int, user_id: int):
+def _insert_ignore_conflicts(db: Session, table, conflict_columns: List[str]):
     """
-    Реєструє перегляд роботи користувачем.
+    INSERT ... ON CONFLICT (conflict_columns) DO NOTHING для Postgres і SQLite.
+    Для інших діалектів повертає None - тоді викликач перевіряє дублікати сам.
     """
-    existing_view = db.query(models.WorkView).filter(
-        models.WorkView.work_id == work_id,
-        models.WorkView.user_id == user_id
-    ).first()
-    
-    if existing_view:
-        return False
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=conflict_columns)
 
-    new_view = models.WorkView(work_id=work_id, user_id=user_id)
-    db.add(new_view)
-    
-    db_work = db.query(models.Work).filter(models.Work.id == work_id).first()
-    if db_work:
-        db_work.views_count += 1
-        
-        designer_profile = db.query(models.Designer_Profile).filter(
-            models.Designer_Profile.designer_id == db_work.designer_id
-        ).first()
-        
-        if designer_profile:
-            designer_profile.views_count += 1
-    
-    db.commit()
-    return True
\ No newline at end of file
+def _live_view_pairs(db: Session, pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Перегляди, робота і користувач яких ще існують. Буфер переглядів пише із
+    запізненням: за цей час роботу чи користувача могли видалити, і рядок з
+    таким FK зламав би INSERT усієї пачки. Один запит (UNION ALL) на пачку.
+    """
+    work_ids = {work_id for work_id, _ in pairs}
+    user_ids = {user_id for _, user_id in pairs}
+    found = db.execute(
+        select(literal("work").label("kind"), models.Work.id).where(models.Work.id.in_(work_ids))
+        .union_all(
+            select(literal("user").label("kind"), models.User.id).where(models.User.id.in_(user_ids))
+        )
+    ).all()
+    live_works = {row_id for kind, row_id in found if kind == "work"}
+    live_users = {row_id for kind, row_id in found if kind == "user"}
+    return [(work_id, user_id) for work_id, user_id in pairs if work_id in live_works and user_id in live_users]
+
+def record_work_views(
+    db: Session, views: Iterable[Tuple[int, int]], skip_deleted: bool = True
+) -> Set[Tuple[int, int]]:
+    """
+    Записує пачку переглядів (work_id, user_id) однією транзакцією.
+    Перегляди видалених робіт/користувачів відкидаються (skip_deleted), повторні (вже є в
+    Work_View) відкидає унікальний індекс, лічильники роботи
+    й профілю дизайнера збільшуються атомарно (views_count = views_count + N),
+    по одному UPDATE на роботу, а не на кожен перегляд.
+    Повертає множину нових переглядів.
+    """
+    pairs = list(dict.fromkeys(views))
+    if not pairs:
+        return set()
+
+    with transaction(db):
+        if skip_deleted:
+            pairs = _live_view_pairs(db, pairs)
+            if not pairs:
+                return set()
+        # INSERT ... ON CONFLICT DO NOTHING RETURNING: унікальний індекс (work_id, user_id)
+        # сам відсіює повторні перегляди, а RETURNING повертає лише нові -
+        # без попереднього SELECT і без гонки між паралельними запитами
+        view_table = models.WorkView.__table__
+        stmt = _insert_ignore_conflicts(db, view_table, ["work_id", "user_id"])
+        rows = [{"work_id": work_id, "user_id": user_id} for work_id, user_id in pairs]
+        if stmt is not None:
+            result = db.execute(stmt.returning(view_table.c.work_id, view_table.c.user_id), rows)
+            new_views = [(row.work_id, row.user_id) for row in result]
+        else:
+            existing = set(
+                db.query(models.WorkView.work_id, models.WorkView.user_id)
+                .filter(tuple_(models.WorkView.work_id, models.WorkView.user_id).in_(pairs))
+                .all()
+            )
+            new_views = [pair for pair in pairs if pair not in existing]
+            if new_views:
+                db.execute(insert(view_table), [
+                    {"work_id": work_id, "user_id": user_id} for work_id, user_id in new_views
+                ])
+        if not new_views:
+            return set()
+
+        deltas: Dict[int, int] = {}
+        for work_id, _ in new_views:
+            deltas[work_id] = deltas.get(work_id, 0) + 1
+        increments = [{"work_id": work_id, "delta": delta} for work_id, delta in deltas.items()]
+
+        work_table = models.Work.__table__
+        profile_table = models.Designer_Profile.__table__
+        db.execute(
+            update(work_table)
+            .where(work_table.c.id == bindparam("work_id"))
+            .values(views_count=func.coalesce(work_table.c.views_count, 0) + bindparam("delta")),
+            increments
+        )
+        designer_of_work = (
+            select(work_table.c.designer_id)
+            .where(work_table.c.id == bindparam("work_id"))
+            .scalar_subquery()
+        )
+        db.execute(
+            update(profile_table)
+            .where(profile_table.c.designer_id == designer_of_work)
+            .values(views_count=func.coalesce(profile_table.c.views_count, 0) + bindparam("delta")),
+            increments
+        )
+    return set(new_views)
+
+def register_work_view(db: Session, work_id: int, user_id: int):
+    """
+    Реєструє перегляд роботи користувачем одразу (без буфера view_buffer).
+    Ендпоінт щойно перевірив роботу, а користувач - той, хто робить запит,
+    тож окремої перевірки існування не потрібно.
+    """
+    return bool(record_work_views(db, [(work_id, user_id)], skip_deleted=False))
@@ -0,0 +1,128 @@
+import functools
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.orm import Session
+from typing_extensions import Concatenate, ParamSpec
+
+import crud
+import metrics
+from database import DbSession, run_db
+
+# === Асинхронні версії crud-функцій ===
+# Для кожної crud-функції з сесією crud.X тут є `async def X(db, ...)`.
+# Логіка запитів одна (crud.py), а виконання залежить від сесії:
+# AsyncSession - через run_sync на asyncpg, Session - у threadpool
+# (див. database.run_db). Ендпоінти пишуться один раз для обох режимів.
+# Обгортки перелічено явно (а не згенеровано циклом), щоб IDE і mypy бачили
+# їх разом із сигнатурами; нова функція в crud.py потребує рядка і тут.
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+CRUD_CALL_SECONDS = metrics.Histogram(
+    "crud_call_seconds", "Тривалість виклику crud-функції (разом з очікуванням потоку/з'єднання)", ["function"]
+)
+
+
+def _make_async(fn: Callable[Concatenate[Session, P], R]) -> Callable[Concatenate[DbSession, P], Awaitable[R]]:
+    # Дочірня гістограма прив'язується один раз, а не на кожен виклик
+    timer = CRUD_CALL_SECONDS.labels(fn.__name__)
+
+    @functools.wraps(fn)
+    async def wrapper(db: DbSession, *args: P.args, **kwargs: P.kwargs) -> R:
+        started = time.perf_counter()
+        try:
+            return await run_db(db, fn, *args, **kwargs)
+        finally:
+            timer.observe(time.perf_counter() - started)
+    return wrapper
+
+
+authenticate_user = _make_async(crud.authenticate_user)
+collect_media_garbage = _make_async(crud.collect_media_garbage)
+create_category = _make_async(crud.create_category)
+create_comment = _make_async(crud.create_comment)
+create_tag = _make_async(crud.create_tag)
+create_tag_or_get = _make_async(crud.create_tag_or_get)
+create_user = _make_async(crud.create_user)
+create_work = _make_async(crud.create_work)
+delete_comment = _make_async(crud.delete_comment)
+delete_user = _make_async(crud.delete_user)
+delete_work = _make_async(crud.delete_work)
+get_categories = _make_async(crud.get_categories)
+get_category = _make_async(crud.get_category)
+get_category_by_name = _make_async(crud.get_category_by_name)
+get_comment = _make_async(crud.get_comment)
+get_comments_by_work = _make_async(crud.get_comments_by_work)
+get_designer_profile = _make_async(crud.get_designer_profile)
+get_media_blob = _make_async(crud.get_media_blob)
+get_media_variants = _make_async(crud.get_media_variants)
+get_popular_tags = _make_async(crud.get_popular_tags)
+get_tag = _make_async(crud.get_tag)
+get_tag_by_name = _make_async(crud.get_tag_by_name)
+get_tags = _make_async(crud.get_tags)
+get_user = _make_async(crud.get_user)
+get_user_by_email = _make_async(crud.get_user_by_email)
+get_users = _make_async(crud.get_users)
+get_work = _make_async(crud.get_work)
+get_works = _make_async(crud.get_works)
+get_works_by_designer = _make_async(crud.get_works_by_designer)
+record_work_views = _make_async(crud.record_work_views)
+register_media_blob = _make_async(crud.register_media_blob)
+register_work_view = _make_async(crud.register_work_view)
+resolve_tag_ids = _make_async(crud.resolve_tag_ids)
+search_works = _make_async(crud.search_works)
+set_image_variants = _make_async(crud.set_image_variants)
+update_comment = _make_async(crud.update_comment)
+update_designer_avatar = _make_async(crud.update_designer_avatar)
+update_designer_header_image = _make_async(crud.update_designer_header_image)
+update_designer_profile = _make_async(crud.update_designer_profile)
+update_password_hash = _make_async(crud.update_password_hash)
+update_user_role = _make_async(crud.update_user_role)
+update_work = _make_async(crud.update_work)
+
+__all__ = [
+    "authenticate_user",
+    "collect_media_garbage",
+    "create_category",
+    "create_comment",
+    "create_tag",
+    "create_tag_or_get",
+    "create_user",
+    "create_work",
+    "delete_comment",
+    "delete_user",
+    "delete_work",
+    "get_categories",
+    "get_category",
+    "get_category_by_name",
+    "get_comment",
+    "get_comments_by_work",
+    "get_designer_profile",
+    "get_media_blob",
+    "get_media_variants",
+    "get_popular_tags",
+    "get_tag",
+    "get_tag_by_name",
+    "get_tags",
+    "get_user",
+    "get_user_by_email",
+    "get_users",
+    "get_work",
+    "get_works",
+    "get_works_by_designer",
+    "record_work_views",
+    "register_media_blob",
+    "register_work_view",
+    "resolve_tag_ids",
+    "search_works",
+    "set_image_variants",
+    "update_comment",
+    "update_designer_avatar",
+    "update_designer_header_image",
+    "update_designer_profile",
+    "update_password_hash",
+    "update_user_role",
+    "update_work",
+]
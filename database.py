@@ -1,19 +1,264 @@
-from sqlalchemy import create_engine
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Union
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 from config import settings # Імпортуємо наші налаштування
+import metrics
 
 # Використовуємо DATABASE_URL з settings
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
+
+# === Пул з'єднань з метриками ===
+
+POOL_CHECKOUT_WAIT = metrics.Histogram(
+    "db_pool_checkout_wait_seconds", "Час очікування з'єднання з пулу", ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_OVERFLOW_EVENTS = metrics.Counter(
+    "db_pool_overflow_total", "З'єднання, відкриті понад pool_size (overflow)", ["engine"]
+)
+POOL_TIMEOUTS = metrics.Counter(
+    "db_pool_timeouts_total", "Запити, що не дочекались з'єднання за pool_timeout", ["engine"]
+)
+
+
+def _pool_samples():
+    for name, pool in _pools().items():
+        yield (name, "checked_out"), pool.checkedout()
+        yield (name, "checked_in"), pool.checkedin()
+        yield (name, "overflow"), max(pool.overflow(), 0)
+
+
+# Стан пулу читається під час збору метрик, а не на кожен checkout
+POOL_CONNECTIONS = metrics.CallbackMetric(
+    "db_pool_connections", "З'єднання пулу за станом (видані, вільні, понад pool_size)",
+    ["engine", "state"], _pool_samples,
+)
+POOL_SIZE = metrics.CallbackMetric(
+    "db_pool_size", "Розмір пулу (pool_size)", ["engine"],
+    lambda: (((name,), pool.size()) for name, pool in _pools().items()),
+)
+
+
+class _InstrumentedPoolMixin:
+    """Міряє очікування при checkout і рахує overflow/таймаути пулу."""
+
+    metrics_name = "sync"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(self.metrics_name).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.metrics_name).observe(time.perf_counter() - started)
+
+    def _inc_overflow(self):
+        # _overflow рахується від -pool_size, тож > 0 - з'єднання понад pool_size
+        created = super()._inc_overflow()
+        if created and self._overflow > 0:
+            POOL_OVERFLOW_EVENTS.labels(self.metrics_name).inc()
+        return created
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics_name = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+def _pool_kwargs(url: str, pool_class) -> dict:
+    """Параметри пулу з settings (для SQLite в пам'яті пул не налаштовується)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _connect_args(url: str) -> dict:
+    """
+    statement_timeout і режим PgBouncer (transaction pooling) для Postgres.
+    PgBouncer не підтримує startup-параметри та prepared statements між
+    транзакціями, тому там таймаут ставиться через SET LOCAL (див. _apply_statement_timeout),
+    а кеш prepared statements asyncpg вимикається.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return {}
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    if parsed.get_driver_name() == "asyncpg":
+        args = {}
+        if settings.DB_PGBOUNCER_MODE:
+            args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+            )
+        elif timeout_ms:
+            args["server_settings"] = {"statement_timeout": str(timeout_ms)}
+        return args
+    if timeout_ms and not settings.DB_PGBOUNCER_MODE:
+        return {"options": f"-c statement_timeout={timeout_ms}"}
+    return {}
+
+
+def _apply_statement_timeout(sync_engine) -> None:
+    """PgBouncer-режим: таймаут на кожну транзакцію замість сесійного параметра."""
+    if not (settings.DB_PGBOUNCER_MODE and settings.DB_STATEMENT_TIMEOUT_MS):
+        return
+    if sync_engine.dialect.name != "postgresql":
+        return
+
+    @event.listens_for(sync_engine, "begin")
+    def _set_local_timeout(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+
+
+def create_db_engine(url: str):
+    """Синхронний engine з налаштованим пулом."""
+    db_engine = create_engine(url, connect_args=_connect_args(url), **_pool_kwargs(url, InstrumentedQueuePool))
+    _apply_statement_timeout(db_engine)
+    return db_engine
+
+
+def _engines() -> dict:
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    return engines
+
+
+def _pools() -> dict:
+    """Пули QueuePool за назвою engine (для метрик)."""
+    return {name: db_engine.pool for name, db_engine in _engines().items() if isinstance(db_engine.pool, QueuePool)}
+
+
+def pool_stats() -> dict:
+    """Стан пулів (для /stats/db-pool)."""
+    result = {}
+    for name, db_engine in _engines().items():
+        pool = db_engine.pool
+        if not isinstance(pool, QueuePool):
+            result[name] = {"pool": type(pool).__name__}
+            continue
+        wait = POOL_CHECKOUT_WAIT.labels(name)
+        result[name] = {
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "checkouts": wait.count,
+            "checkout_wait_avg_ms": round(wait.sum / wait.count * 1000, 3) if wait.count else None,
+            "overflow_events": POOL_OVERFLOW_EVENTS.labels(name).value,
+            "timeouts": POOL_TIMEOUTS.labels(name).value,
+        }
+    return result
+
+
+# Синхронний engine потрібен завжди: sync-режим API, фонові задачі, скрипти
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Сесія, яку отримує ендпоінт: Session (sync) або AsyncSession (DB_ASYNC=true)
+DbSession = Union[Session, AsyncSession]
+
+
+# === Async-режим (SQLAlchemy asyncio + asyncpg) ===
+
+def _async_url(url: str) -> str:
+    """postgresql://... -> postgresql+asyncpg://..., sqlite://... -> sqlite+aiosqlite://..."""
+    scheme, rest = url.split("://", 1)
+    driver = {"postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg",
+              "postgresql+psycopg2": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+    return f"{driver.get(scheme, scheme)}://{rest}"
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    _async_database_url = settings.ASYNC_DATABASE_URL or _async_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        _async_database_url,
+        connect_args=_connect_args(_async_database_url),
+        **_pool_kwargs(_async_database_url, InstrumentedAsyncQueuePool)
+    )
+    _apply_statement_timeout(async_engine.sync_engine)
+    # expire_on_commit=False: після commit відповідь серіалізується поза greenlet,
+    # і ліниве перезавантаження атрибутів там неможливе
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+# === Одиниця роботи (одна транзакція на операцію) ===
+
+_TX_DEPTH = "designhub_tx_depth"
+_AFTER_COMMIT = "designhub_after_commit"
+
+
+@contextmanager
+def transaction(db: Session):
+    """
+    Межі транзакції для операції з кількох кроків: всередині - лише flush,
+    commit - один раз при виході з найзовнішнього блоку, rollback - при помилці.
+    Блоки вкладаються: crud-функція, викликана всередині іншої транзакції
+    (наприклад, з роутера, що об'єднує кілька операцій), не комітить сама.
+    """
+    depth = db.info.get(_TX_DEPTH, 0)
+    db.info[_TX_DEPTH] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            db.commit()
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+            db.info.pop(_AFTER_COMMIT, None)
+        raise
+    finally:
+        db.info[_TX_DEPTH] = depth
+    if depth == 0:
+        for callback in db.info.pop(_AFTER_COMMIT, ()):
+            callback()
+
+
+def after_commit(db: Session, callback: Callable[[], None]) -> None:
+    """
+    Виконати callback (інвалідація кешів, оновлення пошукового індексу)
+    лише після успішного commit поточної транзакції; поза transaction() - одразу.
+    """
+    if db.info.get(_TX_DEPTH, 0):
+        db.info.setdefault(_AFTER_COMMIT, []).append(callback)
+    else:
+        callback()
+
+
 # === ПЕРЕМІЩЕНА ФУНКЦІЯ ===
 # Функція-генератор для створення сесії бази даних
-def get_db():
+def _get_sync_db():
     """
     Залежність (Dependency) для отримання сесії бази даних.
     """
@@ -23,3 +268,24 @@ def get_db():
     finally:
         db.close()
 
+async def _get_async_db():
+    """
+    Залежність (Dependency) для отримання асинхронної сесії бази даних.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Режим обирається один раз при старті (settings.DB_ASYNC),
+# тож обидва шляхи можна порівняти тим самим бенчмарком
+get_db = _get_async_db if settings.DB_ASYNC else _get_sync_db
+
+
+async def run_db(db: DbSession, fn, *args, **kwargs):
+    """
+    Виконує синхронну crud-функцію `fn(session, *args, **kwargs)`, не блокуючи event loop:
+      - AsyncSession: через run_sync (greenlet, I/O - asyncpg);
+      - Session: у threadpool Starlette.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
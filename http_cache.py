@@ -0,0 +1,44 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# === HTTP-кешування: ETag / If-None-Match / Cache-Control ===
+
+
+def make_etag(body: bytes) -> str:
+    """Слабкий ETag за вмістом: однаковий у всіх воркерах для однакової відповіді."""
+    return 'W/"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Чи збігається ETag з If-None-Match (з урахуванням списку та '*')."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    # Для If-None-Match порівняння слабке: W/"x" == "x"
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or any(
+        (value[2:] if value.startswith("W/") else value) == bare for value in candidates
+    )
+
+
+def cached_response(
+    request: Request,
+    body: bytes,
+    etag: Optional[str] = None,
+    cache_control: str = "no-cache",
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Відповідь з ETag; якщо клієнт надіслав той самий ETag - 304 без тіла.
+    "no-cache" означає "можна зберігати, але перевіряти щоразу" -
+    саме для цього і потрібен ETag.
+    """
+    etag = etag or make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+import crud
+import images
+import metrics
+from config import settings
+from database import SessionLocal
+from storage import storage
+
+# === Конвеєр похідних зображень ===
+# Ендпоінти завантаження зберігають оригінал і одразу відповідають, а
+# генерація розмірів (images.render_variants) іде у фоні в окремому пулі
+# процесів: декодування/ресайз/кодування WebP і AVIF - це чистий CPU, який
+# інакше тримав би GIL воркера. Коли маніфест готовий, crud.set_image_variants
+# записує його в усі роботи/профілі з цим image_url і інвалідує їхні відповіді.
+#
+# Оригінал береться зі сховища (storage.local_copy - для S3 це завантаження
+# в тимчасовий файл), похідні рендеряться в тимчасовий каталог і кладуться
+# назад у сховище (storage.put_directory). Маніфест зберігається і в блобі
+# (Media_Blob.variants): якщо робота створюється вже після обробки, його
+# підхоплює сам crud, а повторне завантаження того ж вмісту не рендериться
+# вдруге. Без Pillow конвеєр вимкнений, API віддає оригінали.
+
+logger = logging.getLogger(__name__)
+
+IMAGE_JOBS = metrics.Counter(
+    "image_variant_jobs_total", "Задачі генерації похідних зображень", ["result"]
+)
+IMAGE_JOBS_PENDING = metrics.Gauge(
+    "image_variant_jobs_pending", "Задачі генерації, що ще не завершились"
+)
+IMAGE_RENDER_SECONDS = metrics.Histogram(
+    "image_variant_render_seconds", "Тривалість генерації всіх похідних одного зображення",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class ImagePipeline:
+    """Пул процесів для похідних зображень + фонові задачі, що записують результат у БД."""
+
+    def __init__(self, formats: List[str], quality: int, workers: int = 0, enabled: bool = True):
+        self.enabled = enabled and images.available()
+        self.formats = images.supported_formats(formats) if self.enabled else []
+        self.quality = quality
+        # Ресайз пам'ятомісткий - за замовчуванням половина ядер
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(self.workers * 2)
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn - з тієї ж причини, що й у passwords.PasswordHasher
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    @staticmethod
+    def _source_key(url: Optional[str]) -> Optional[str]:
+        key = storage.key_for_url(url)
+        return key if images.is_original(key) else None
+
+    def submit(self, url: Optional[str]) -> Optional[asyncio.Task]:
+        """Ставить генерацію похідних для завантаженого файлу у фон (не чекає на неї)."""
+        if not self.enabled or self._source_key(url) is None:
+            return None
+        task = asyncio.get_running_loop().create_task(self._process(url))
+        self._tasks.add(task)
+        IMAGE_JOBS_PENDING.set(len(self._tasks))
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        IMAGE_JOBS_PENDING.set(len(self._tasks))
+
+    async def _process(self, url: str) -> Optional[dict]:
+        # Той самий вміст уже завантажували (media_store.py) - похідні є в сховищі
+        manifest = await run_in_threadpool(self._stored, url)
+        if manifest is None:
+            manifest = await self._render(url)
+            if manifest is None:
+                return None
+        try:
+            await run_in_threadpool(self._record, url, manifest)
+        except Exception:
+            IMAGE_JOBS.labels("error").inc()
+            logger.exception("Failed to store image variants for %s", url)
+            return None
+        IMAGE_JOBS.labels("ok").inc()
+        return manifest
+
+    async def _render(self, url: str) -> Optional[dict]:
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                # Потік threadpool чекає на процес пулу: обмін зі сховищем
+                # (скачати оригінал, покласти похідні) - теж блокуючий
+                manifest = await run_in_threadpool(self._render_blocking, url, self._render_in_pool)
+            except Exception:
+                IMAGE_JOBS.labels("error").inc()
+                logger.exception("Failed to render image variants for %s", url)
+                return None
+            if manifest is None:
+                IMAGE_JOBS.labels("missing").inc()
+                return None
+            IMAGE_RENDER_SECONDS.observe(time.perf_counter() - started)
+        return manifest
+
+    def _render_in_pool(self, *args) -> dict:
+        return self.executor.submit(images.render_variants, *args).result()
+
+    def _render_blocking(self, url: str, render: Callable[..., dict]) -> Optional[dict]:
+        """Оригінал зі сховища -> render(...) у тимчасовий каталог -> похідні в сховище."""
+        key = self._source_key(url)
+        if key is None or not storage.exists(key):
+            return None
+        prefix = images.variants_prefix(key)
+        out_dir = storage.staging_path(f"variants-{uuid.uuid4()}")
+        try:
+            with storage.local_copy(key) as source_path:
+                manifest = render(
+                    source_path, out_dir, storage.url(prefix),
+                    images.VARIANT_WIDTHS, self.formats, self.quality,
+                )
+            storage.put_directory(out_dir, prefix, images.CONTENT_TYPES)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+        return manifest
+
+    @staticmethod
+    def _stored(url: str) -> Optional[dict]:
+        db = SessionLocal()
+        try:
+            return crud.get_media_variants(db, url)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _record(url: str, manifest: dict) -> None:
+        db = SessionLocal()
+        try:
+            crud.set_image_variants(db, url, manifest)
+        finally:
+            db.close()
+
+    def process_now(self, url: str) -> Optional[dict]:
+        """Синхронна генерація в поточному процесі (maintenance.py, без event loop)."""
+        if not self.enabled:
+            return None
+        manifest = self._render_blocking(url, images.render_variants)
+        if manifest is not None:
+            self._record(url, manifest)
+        return manifest
+
+    async def stop(self, timeout: float = 30) -> None:
+        """Дочікується задач у польоті (не довше за timeout) і зупиняє пул."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "formats": self.formats,
+            "workers": self.workers,
+            "pending": len(self._tasks),
+            "widths": images.VARIANT_WIDTHS,
+        }
+
+
+image_pipeline = ImagePipeline(
+    formats=[name.strip() for name in settings.IMAGE_FORMATS.split(",") if name.strip()],
+    quality=settings.IMAGE_QUALITY,
+    workers=settings.IMAGE_WORKERS,
+    enabled=settings.IMAGE_VARIANTS_ENABLED,
+)
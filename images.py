@@ -0,0 +1,132 @@
+import os
+from typing import Dict, Iterable, Optional
+
+# === Похідні зображення (мініатюри та адаптивні розміри) ===
+# Оригінал завантаження лишається як є, а поруч генеруються зменшені копії
+# (ключі сховища, див. storage.py):
+#
+#     images/<ім'я>.<ext>                - оригінал
+#     images/variants/<ім'я>/card.webp   - похідні
+#
+# (<ім'я> може містити підкаталоги - див. шардовані блоби в media_store.py)
+#
+# Кожен розмір зберігається у форматі-запасному (JPEG, або PNG для прозорих
+# зображень) та в сучасних форматах (WebP, AVIF - якщо їх підтримує Pillow).
+# Маніфест готових похідних зберігається в БД (Media_Blob.variants і поля
+# *_variants робіт/профілів), а не поруч із файлами.
+#
+# Модуль навмисно не імпортує config/database: render_variants виконується
+# в дочірніх процесах пулу (див. image_pipeline.py), які імпортують лише його.
+
+IMAGES_PREFIX = "images/"
+VARIANTS_PREFIX = IMAGES_PREFIX + "variants/"
+
+# Контекст -> максимальна ширина (px); менші за це оригінали не збільшуються
+VARIANT_WIDTHS: Dict[str, int] = {
+    "thumb": 320,   # аватарки, мініатюри
+    "card": 800,    # картки у стрічці та списках
+    "full": 1920,   # сторінка роботи, шапка профілю
+}
+
+# Сучасні формати: назва поля в маніфесті -> (розширення, формат Pillow)
+MODERN_FORMATS = {
+    "webp": ("webp", "WEBP"),
+    "avif": ("avif", "AVIF"),
+}
+
+# Розширення файлів похідних -> Content-Type (для сховища)
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+
+
+def available() -> bool:
+    """Чи встановлено Pillow (без нього похідні не генеруються, віддається оригінал)."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def supported_formats(requested: Iterable[str]) -> list:
+    """Сучасні формати з `requested`, які вміє кодувати встановлений Pillow."""
+    from PIL import features
+
+    return [name for name in requested if name in MODERN_FORMATS and features.check(name)]
+
+
+# === Ключі ===
+
+def is_original(key: Optional[str]) -> bool:
+    """Ключ оригіналу зображення (images/<ім'я> або images/ab/cd/<sha256>.<ext>)."""
+    if not key or not key.startswith(IMAGES_PREFIX) or key.startswith(VARIANTS_PREFIX):
+        return False
+    parts = key[len(IMAGES_PREFIX):].split("/")
+    return all(part and not part.startswith(".") for part in parts)
+
+
+def variants_prefix(key: str) -> str:
+    """Префікс ключів похідних для оригіналу: images/variants/<ім'я без розширення>/."""
+    return VARIANTS_PREFIX + os.path.splitext(key[len(IMAGES_PREFIX):])[0] + "/"
+
+
+# === Генерація (у процесі пулу) ===
+
+
+def render_variants(
+    source_path: str,
+    out_dir: str,
+    url_prefix: str,
+    widths: Dict[str, int],
+    formats: Iterable[str],
+    quality: int = 80,
+) -> dict:
+    """
+    Генерує всі розміри з `widths` у запасному та сучасних форматах у
+    локальний каталог `out_dir` (звідти їх забирає сховище) і повертає
+    маніфест {контекст: {width, height, url, webp?, avif?}}, де URL = url_prefix + ім'я файлу.
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(out_dir, exist_ok=True)
+    largest = max(widths.values())
+    with Image.open(source_path) as source:
+        # JPEG може декодуватись одразу в зменшеному масштабі - це в рази швидше,
+        # ніж розпаковувати повний розмір і потім зменшувати
+        if source.width > largest:
+            source.draft("RGB", (largest, -(-source.height * largest // source.width)))
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    fallback_ext, fallback_format, fallback_params = (
+        ("png", "PNG", {"optimize": True}) if has_alpha
+        else ("jpg", "JPEG", {"quality": quality, "optimize": True, "progressive": True})
+    )
+    modern = [(name, *MODERN_FORMATS[name]) for name in formats]
+
+    manifest: dict = {}
+    rendered: Dict[int, dict] = {}  # фактична ширина -> запис (малі оригінали не дублюємо)
+    for context, max_width in sorted(widths.items(), key=lambda item: item[1]):
+        width = min(max_width, image.width)
+        if width in rendered:
+            manifest[context] = rendered[width]
+            continue
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+
+        entry = {"width": width, "height": height}
+        filename = f"{context}.{fallback_ext}"
+        resized.save(os.path.join(out_dir, filename), fallback_format, **fallback_params)
+        entry["url"] = url_prefix + filename
+        for name, ext, fmt in modern:
+            filename = f"{context}.{ext}"
+            resized.save(os.path.join(out_dir, filename), fmt, quality=quality)
+            entry[name] = url_prefix + filename
+        manifest[context] = rendered[width] = entry
+
+    return manifest
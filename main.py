@@ -1,33 +1,85 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from datetime import timedelta
-from starlette.staticfiles import StaticFiles # Для роздачі /static
+import logging
 import os # Для створення папок
 
-import crud, models, schemas, security, config
-from database import SessionLocal, engine, get_db 
+import crud_async, metrics_export, migrate, models, schemas, security, config, serialization, sql_profiler
+from view_buffer import view_buffer
+from image_pipeline import image_pipeline
+from media_store import media_gc
+from database import DbSession, SessionLocal, async_engine, engine, get_db 
+from pagination import NEXT_CURSOR_HEADER
+from upload_stream import UploadSizeLimitMiddleware
+from media_files import MediaStaticFiles # Для роздачі /static
 # === 1. Імпортуємо новий роутер ===
-from routers import users, works, categories, tags, designer_profiles, uploads, comments
+from routers import users, works, categories, tags, designer_profiles, uploads, comments, stats
 
-# Створюємо всі таблиці в базі даних (якщо їх ще немає)
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 # === Створення папки /static (для картинок) ===
-STATIC_DIR = "static"
+# Локальне сховище медіа (storage.py); з S3 тут лишаються хіба старі файли
+STATIC_DIR = config.settings.LOCAL_STORAGE_ROOT
 os.makedirs(STATIC_DIR, exist_ok=True)
 # === Кінець ===
 
-app = FastAPI()
+# === Життєвий цикл застосунку ===
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схема - версійовані міграції (migrate.py), а не create_all при імпорті.
+    # SQLite (розробка, тести) - завжди: там це create_all і позначка версій,
+    # тож свіжий клон стартує без окремого кроку. Postgres - лише за бажанням
+    if config.settings.MIGRATE_ON_STARTUP or engine.dialect.name == "sqlite":
+        await run_in_threadpool(migrate.upgrade, engine)
+    else:
+        outstanding = await run_in_threadpool(migrate.pending, engine)
+        if outstanding:
+            logger.warning("Database has unapplied migrations %s: run `python migrate.py`", ", ".join(outstanding))
+    # Пул процесів для bcrypt стартує одразу, а не на першому логіні
+    await run_in_threadpool(security.password_hasher.warm_up)
+    if config.settings.VIEW_BUFFER_ENABLED:
+        view_buffer.start()
+    if config.settings.MEDIA_GC_ENABLED:
+        media_gc.start()
+    # Знімки метрик для агрегування між воркерами (METRICS_MULTIPROC_DIR)
+    if metrics_export.exporter is not None:
+        metrics_export.exporter.start()
+    yield
+    await media_gc.stop()
+    # Спершу дозаписуємо перегляди з буфера, поки БД ще доступна
+    await view_buffer.stop()
+    # Дочікуємо генерацію похідних, щоб маніфести встигли потрапити в БД
+    await image_pipeline.stop()
+    security.password_hasher.shutdown()
+    if metrics_export.exporter is not None:
+        await metrics_export.exporter.stop()
+
+# FAST_JSON: orjson для всіх відповідей (див. serialization.py)
+app = FastAPI(lifespan=lifespan, default_response_class=serialization.default_response_class)
 
 # === Монтування /static ===
 # Це дозволяє FastAPI роздавати файли з папки /static
-# (наприклад, /static/images/my-image.jpg)
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+# (наприклад, /static/images/my-image.jpg) з HTTP-кешуванням (див. media_files.py)
+app.mount(
+    config.settings.LOCAL_STORAGE_URL.rstrip("/"),
+    MediaStaticFiles(
+        directory=STATIC_DIR,
+        cache_control=config.settings.MEDIA_CACHE_CONTROL,
+        accel_redirect_prefix=config.settings.MEDIA_ACCEL_REDIRECT_PREFIX,
+    ),
+    name="static",
+)
 # === Кінець ===
 
 
+# Завеликі завантаження відсікаються ще до розбору multipart (див. upload_stream.py).
+# Додається до CORS: CORS - зовнішній шар, тож і відповідь 413 отримує
+# Access-Control-Allow-Origin, і браузер показує фронтенду саме її
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=config.settings.UPLOAD_MAX_BYTES)
+
 # === Налаштування CORS ===
 origins = [
     "http://localhost:3000",
@@ -41,22 +93,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Щоб фронтенд міг прочитати курсор наступної сторінки
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 # === Кінець налаштування CORS ===
 
+# SQL-запити кожного HTTP-запиту: Server-Timing, N+1 у лог, бюджети (див. sql_profiler.py)
+if config.settings.SQL_PROFILING_ENABLED:
+    sql_profiler.instrument(engine, async_engine.sync_engine if async_engine is not None else None)
+    app.add_middleware(
+        sql_profiler.SQLProfilerMiddleware,
+        repeat_threshold=config.settings.SQL_PROFILE_REPEAT_THRESHOLD,
+        strict=config.settings.SQL_PROFILE_STRICT,
+        server_timing=config.settings.SQL_PROFILE_SERVER_TIMING,
+    )
+
+# Тривалість запитів за маршрутом і запити в обробці для /metrics (див. metrics_export.py);
+# додається останнім - зовнішній шар, тож міряє і решту middleware
+if config.settings.METRICS_ENABLED:
+    app.add_middleware(metrics_export.RequestMetricsMiddleware)
+
 
 # === Роутер для логіну ===
 @app.post("/token", response_model=schemas.Token)
-def login_for_access_token(
-    db: Session = Depends(get_db), 
+@sql_profiler.query_budget(2)
+async def login_for_access_token(
+    db: DbSession = Depends(get_db), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     Отримує email (в полі username) та пароль,
     повертає JWT токен.
+    bcrypt виконується в окремому пулі процесів, а не в event loop/threadpool.
     """
-    user = crud.authenticate_user(db, email=form_data.username, password=form_data.password)
-    if not user:
+    user = await crud_async.get_user_by_email(db, email=form_data.username)
+    valid = False
+    if user:
+        valid, new_hash = await security.password_hasher.verify_and_update(
+            form_data.password, user.password_hash
+        )
+        if valid and new_hash:
+            # Вартість bcrypt змінилась - прозоро перехешовуємо пароль
+            await crud_async.update_password_hash(db, user, new_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -64,7 +143,7 @@ def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=config.settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=security.token_claims(user), expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 # === Кінець роутера логіну ===
@@ -79,6 +158,9 @@ app.include_router(designer_profiles.router, prefix="/profiles", tags=["Designer
 app.include_router(uploads.router, prefix="", tags=["Uploads"])
 # === 2. Підключаємо новий роутер для коментарів ===
 app.include_router(comments.router, prefix="/comments", tags=["Comments"])
+app.include_router(stats.router, prefix="/stats", tags=["Stats"])
+if config.settings.METRICS_ENABLED:
+    app.include_router(stats.exposition_router, tags=["Stats"])
 # === Кінець підключення ===
 
 
@@ -0,0 +1,191 @@
+import argparse
+import sys
+from typing import Dict, List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+import crud
+import images
+import media_store
+import models
+from database import SessionLocal, transaction
+from image_pipeline import image_pipeline
+from storage import storage
+
+# === Службові команди ===
+# python maintenance.py reconcile-ratings [--fix]
+# python maintenance.py reconcile-tag-counts [--fix]
+# python maintenance.py generate-image-variants
+# python maintenance.py gc-media [--grace-seconds N]
+
+
+def reconcile_designer_ratings(db: Session, fix: bool = False) -> List[Dict[str, object]]:
+    """
+    Перераховує суму/кількість оцінок усіх дизайнерів одним GROUP BY
+    і порівнює з накопиченими rating_sum/rating_count у профілях.
+    Повертає розбіжності; з fix=True - одразу виправляє їх (одним executemany).
+    """
+    totals = {
+        row.designer_id: (int(row.rating_sum), int(row.rating_count))
+        for row in (
+            db.query(
+                models.Work.designer_id,
+                func.coalesce(func.sum(models.Comment.rating_score), 0).label("rating_sum"),
+                func.count(models.Comment.rating_score).label("rating_count"),
+            )
+            .join(models.Comment, models.Comment.work_id == models.Work.id)
+            .group_by(models.Work.designer_id)
+        )
+    }
+
+    drift = []
+    profiles = db.query(
+        models.Designer_Profile.designer_id,
+        models.Designer_Profile.rating_sum,
+        models.Designer_Profile.rating_count,
+    )
+    for profile in profiles:
+        expected_sum, expected_count = totals.get(profile.designer_id, (0, 0))
+        if (profile.rating_sum, profile.rating_count) != (expected_sum, expected_count):
+            drift.append({
+                "designer_id": profile.designer_id,
+                "stored": [profile.rating_sum, profile.rating_count],
+                "expected": [expected_sum, expected_count],
+            })
+
+    if fix and drift:
+        with transaction(db):
+            db.execute(
+                update(models.Designer_Profile),
+                [
+                    {
+                        "designer_id": row["designer_id"],
+                        "rating_sum": row["expected"][0],
+                        "rating_count": row["expected"][1],
+                        "rating": row["expected"][0] / row["expected"][1] if row["expected"][1] else 0,
+                    }
+                    for row in drift
+                ],
+            )
+    return drift
+
+
+def reconcile_tag_counts(db: Session, fix: bool = False) -> List[Dict[str, object]]:
+    """Звіряє Tag.work_count з фактичною кількістю зв'язків у Work_Tag."""
+    link_table = models.WorkTag
+    actual = dict(
+        db.query(link_table.c.tag_id, func.count()).group_by(link_table.c.tag_id).all()
+    )
+    drift = [
+        {"tag_id": tag.id, "stored": tag.work_count, "expected": actual.get(tag.id, 0)}
+        for tag in db.query(models.Tag.id, models.Tag.work_count)
+        if tag.work_count != actual.get(tag.id, 0)
+    ]
+    if fix and drift:
+        with transaction(db):
+            db.execute(
+                update(models.Tag),
+                [{"id": row["tag_id"], "work_count": row["expected"]} for row in drift],
+            )
+    return drift
+
+
+def images_without_variants(db: Session) -> List[str]:
+    """Завантажені (в наше сховище) зображення робіт і профілів, для яких у БД ще немає маніфесту похідних."""
+    work, profile = models.Work, models.Designer_Profile
+    urls = set()
+    for url_column, variants_column in (
+        (work.image_url, work.image_variants),
+        (profile.header_image_url, profile.header_image_variants),
+        (profile.avatar_url, profile.avatar_variants),
+    ):
+        urls.update(db.scalars(
+            select(url_column).distinct().where(url_column.isnot(None), variants_column.is_(None))
+        ))
+    return sorted(url for url in urls if images.is_original(storage.key_for_url(url)))
+
+
+def generate_image_variants(db: Session) -> Dict[str, int]:
+    """
+    Генерує похідні для старих завантажень (синхронно, в цьому процесі).
+    Якщо маніфест у блобі вже є - лише записує його в роботи/профілі.
+    """
+    result = {"generated": 0, "linked": 0, "missing": 0, "failed": 0}
+    for url in images_without_variants(db):
+        manifest = crud.get_media_variants(db, url)
+        if manifest is not None:
+            crud.set_image_variants(db, url, manifest)
+            result["linked"] += 1
+            continue
+        try:
+            manifest = image_pipeline.process_now(url)
+        except Exception as exc:
+            # Пошкоджений файл не зупиняє решту
+            print(f"{url}: {exc}", file=sys.stderr)
+            result["failed"] += 1
+            continue
+        result["generated" if manifest is not None else "missing"] += 1
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Службові команди DesignHub")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reconcile = commands.add_parser(
+        "reconcile-ratings", help="Звірити накопичені рейтинги дизайнерів з коментарями"
+    )
+    reconcile.add_argument("--fix", action="store_true", help="Виправити знайдені розбіжності")
+    reconcile_tags = commands.add_parser(
+        "reconcile-tag-counts", help="Звірити лічильники робіт у тегах зі зв'язками Work_Tag"
+    )
+    reconcile_tags.add_argument("--fix", action="store_true", help="Виправити знайдені розбіжності")
+    commands.add_parser(
+        "generate-image-variants", help="Згенерувати мініатюри/розміри для зображень без них"
+    )
+    gc_media = commands.add_parser(
+        "gc-media", help="Видалити файли зображень, на які ніхто не посилається"
+    )
+    gc_media.add_argument(
+        "--grace-seconds", type=float, default=None,
+        help="Скільки файл має бути без посилань (за замовчуванням MEDIA_GC_GRACE_SECONDS)",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "reconcile-ratings":
+            drift = reconcile_designer_ratings(db, fix=args.fix)
+            for row in drift:
+                print(f"designer {row['designer_id']}: stored sum/count {row['stored']}, "
+                      f"expected {row['expected']}")
+            action = "fixed" if args.fix else "found"
+            print(f"{len(drift)} profile(s) with rating drift {action}")
+            # Ненульовий код - щоб команду можна було ставити в cron/CI як перевірку
+            return 1 if drift and not args.fix else 0
+        if args.command == "reconcile-tag-counts":
+            drift = reconcile_tag_counts(db, fix=args.fix)
+            for row in drift:
+                print(f"tag {row['tag_id']}: stored work_count {row['stored']}, expected {row['expected']}")
+            action = "fixed" if args.fix else "found"
+            print(f"{len(drift)} tag(s) with work_count drift {action}")
+            return 1 if drift and not args.fix else 0
+        if args.command == "generate-image-variants":
+            if not image_pipeline.enabled:
+                print("image variants are disabled (IMAGE_VARIANTS_ENABLED=false or Pillow is not installed)")
+                return 1
+            result = generate_image_variants(db)
+            print(f"{result['generated']} generated, {result['linked']} linked from existing manifests, "
+                  f"{result['missing']} original file(s) missing, {result['failed']} failed")
+            return 1 if result["failed"] else 0
+        if args.command == "gc-media":
+            removed = media_store.collect_garbage(grace_seconds=args.grace_seconds)
+            print(f"{removed} unreferenced blob(s) removed")
+            return 0
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import os
+import re
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+import images
+from storage import IMMUTABLE_CACHE_CONTROL
+
+# === Роздача медіафайлів (/static) ===
+# StaticFiles Starlette з HTTP-кешуванням під наше сховище (storage.py):
+#   - content-addressed файли (images/ab/cd/<sha256>.<ext> і їхні похідні)
+#     за URL ніколи не змінюються -> Cache-Control immutable на рік, браузер
+#     і CDN не ходять навіть з умовним запитом; решта файлів - MEDIA_CACHE_CONTROL;
+#   - сильний ETag оригіналу - сам SHA-256 вмісту (однаковий на всіх
+#     серверах, на відміну від mtime-size у Starlette);
+#   - 304: If-None-Match має пріоритет над If-Modified-Since (RFC 9110);
+#   - Range/If-Range і zero-copy розширення http.response.pathsend (якщо
+#     сервер його підтримує) - з FileResponse Starlette;
+#   - MEDIA_ACCEL_REDIRECT_PREFIX: тіло віддає nginx (X-Accel-Redirect,
+#     sendfile у ядрі), а воркер лише перевіряє заголовки.
+
+_HEX = "[0-9a-f]"
+_ORIGINAL = re.compile(rf"^{re.escape(images.IMAGES_PREFIX)}{_HEX}{{2}}/{_HEX}{{2}}/({_HEX}{{64}})\.[a-z0-9]+$")
+_VARIANT = re.compile(rf"^{re.escape(images.VARIANTS_PREFIX)}{_HEX}{{2}}/{_HEX}{{2}}/{_HEX}{{64}}/[a-z]+\.[a-z0-9]+$")
+
+
+def content_hash(key: str) -> Optional[str]:
+    """SHA-256 з ключа оригіналу content-addressed блоба, інакше None."""
+    match = _ORIGINAL.match(key)
+    return match.group(1) if match else None
+
+
+def is_immutable(key: str) -> bool:
+    """Чи може вміст за цим ключем змінитись (нові дані - завжди новий ключ)."""
+    return content_hash(key) is not None or _VARIANT.match(key) is not None
+
+
+class MediaStaticFiles(StaticFiles):
+    def __init__(
+        self,
+        *,
+        directory: str,
+        cache_control: str,
+        accel_redirect_prefix: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(directory=directory, **kwargs)
+        self.cache_control = cache_control
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/") + "/" if accel_redirect_prefix else None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        key = self.get_path(scope).replace(os.sep, "/")
+        headers = {"cache-control": IMMUTABLE_CACHE_CONTROL if is_immutable(key) else self.cache_control}
+        sha256 = content_hash(key)
+        if sha256 is not None:
+            headers["etag"] = f'"{sha256}"'
+
+        response = FileResponse(full_path, status_code=status_code, headers=headers, stat_result=stat_result)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        if self.accel_redirect_prefix is not None:
+            # Заголовки (ETag, Cache-Control, тип) - наші, байти і Range - від nginx
+            accel_headers = {
+                name: value for name, value in response.headers.items()
+                if name not in ("content-length", "accept-ranges")
+            }
+            accel_headers["x-accel-redirect"] = self.accel_redirect_prefix + key
+            return Response(status_code=status_code, headers=accel_headers)
+        return response
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        # If-Modified-Since перевіряється лише без If-None-Match
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            etag = response_headers.get("etag")
+            if etag is None:
+                return False
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            # Слабке порівняння: W/"x" відповідає "x"
+            return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+        return super().is_not_modified(response_headers, request_headers)
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+import crud
+import images
+import metrics
+from config import settings
+from database import SessionLocal
+from storage import storage
+
+# === Content-addressed сховище зображень ===
+# Ім'я файлу - SHA-256 його вмісту, тож однакові завантаження (дизайнери часто
+# повторно використовують ті самі ресурси) зберігаються один раз:
+#
+#     images/ab/cd/abcd...ef.jpg     (ключ у сховищі, див. storage.py; шардування
+#                                     за першими байтами хешу, щоб у каталозі
+#                                     не було мільйонів файлів)
+#
+# Кожен файл - рядок Media_Blob з лічильником посилань: його змінюють роботи
+# (image_url) і профілі (шапка, аватарка) у своїх транзакціях
+# (crud._adjust_media_refs). Блоби без посилань довше за MEDIA_GC_GRACE_SECONDS
+# прибирає фоновий збирач сміття разом із похідними зображеннями.
+# Grace-період потрібен, бо файл завантажується раніше, ніж на нього
+# пошлеться робота (POST /upload/image/, потім POST /works/).
+
+logger = logging.getLogger(__name__)
+
+SHARD_DEPTH = 2  # ab/cd/
+
+MEDIA_UPLOADS = metrics.Counter(
+    "media_uploads_total", "Завантажені файли (new - новий вміст, duplicate - вже був)", ["result"]
+)
+MEDIA_BLOBS_COLLECTED = metrics.Counter(
+    "media_blobs_collected_total", "Блоби без посилань, видалені збирачем сміття"
+)
+MEDIA_GC_SECONDS = metrics.Histogram(
+    "media_gc_seconds", "Тривалість одного проходу збирача сміття"
+)
+
+
+def blob_key(sha256: str, extension: str) -> str:
+    """Ключ блоба у сховищі: images/ab/cd/<sha256>.<ext>."""
+    shards = [sha256[i * 2:i * 2 + 2] for i in range(SHARD_DEPTH)]
+    return images.IMAGES_PREFIX + "/".join(shards + [f"{sha256}.{extension}"])
+
+
+def blob_url(key: str) -> str:
+    return storage.url(key)
+
+
+def remove_blob_files(url: str) -> None:
+    """Видаляє файл блоба та його похідні (відсутні файли - не помилка)."""
+    key = storage.key_for_url(url)
+    if not images.is_original(key):
+        return
+    storage.delete(key)
+    storage.delete_prefix(images.variants_prefix(key))
+
+
+def collect_garbage(grace_seconds: Optional[float] = None, batch_size: Optional[int] = None) -> int:
+    """Один повний прохід збирача (пачками по batch_size). Повертає кількість видалених блобів."""
+    grace_seconds = settings.MEDIA_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    batch_size = batch_size or settings.MEDIA_GC_BATCH_SIZE
+    removed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            urls = crud.collect_media_garbage(db, grace_seconds, batch_size, remove_blob_files)
+            removed += len(urls)
+            MEDIA_BLOBS_COLLECTED.inc(len(urls))
+            if len(urls) < batch_size:
+                return removed
+    finally:
+        db.close()
+
+
+class MediaGarbageCollector:
+    """Фонова задача, що раз на інтервал прибирає блоби без посилань."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[float] = None
+        self.last_removed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def run_once(self) -> int:
+        started = time.perf_counter()
+        try:
+            self.last_removed = await run_in_threadpool(collect_garbage)
+        finally:
+            MEDIA_GC_SECONDS.observe(time.perf_counter() - started)
+            self.last_run = time.time()
+        return self.last_removed
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Media garbage collection failed")
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "storage": storage.name,
+            "interval_seconds": self.interval,
+            "grace_seconds": settings.MEDIA_GC_GRACE_SECONDS,
+            "last_run": self.last_run,
+            "last_removed": self.last_removed,
+        }
+
+
+media_gc = MediaGarbageCollector(interval_seconds=settings.MEDIA_GC_INTERVAL_SECONDS)
@@ -0,0 +1,473 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+from bisect import bisect_left
+from threading import get_ident
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# === Метрики процесу (лічильники, gauge, гістограми) ===
+# Легкий реєстр без зовнішніх залежностей. Метрика з labels зберігає
+# дочірні значення для кожного набору значень міток.
+#
+# Гарячий шлях без блокувань: значення дочірньої метрики розкладене по
+# потоках (кожен потік пише лише у свою комірку, читання підсумовує всі
+# комірки), тож inc/observe - це пошук комірки в dict і додавання. Лок
+# береться лише тоді, коли потік пише в метрику вперше. labels(...) теж
+# кешується, але на гарячому шляху дочірню метрику краще прив'язати один
+# раз (X = METRIC.labels("...")) і далі викликати X.inc()/X.observe().
+#
+# Формат для Prometheus - exposition(); з кількома процесами (воркери
+# uvicorn) - MultiProcessCollector: кожен процес скидає знімок у спільний
+# каталог, а процес, що обробляє /metrics, підсумовує знімки всіх.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Як gauge різних процесів зводяться в одне значення
+MULTIPROCESS_MODES = ("sum", "max", "min", "liveall")
+
+# Усі метрики процесу за назвою
+REGISTRY: Dict[str, "_Metric"] = {}
+
+
+class _Metric:
+    kind = "untyped"
+    multiprocess_mode = "sum"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Дочірня метрика для конкретних значень міток (кешується)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name}: metric has labels, use .labels(...)")
+        return self.labels()
+
+    def samples(self) -> Iterable[Tuple[Dict[str, str], object]]:
+        for key, child in list(self._children.items()):
+            yield dict(zip(self.labelnames, key)), child
+
+
+class _Sharded:
+    """Значення, розкладене по потоках: комірку потоку пише лише він сам."""
+
+    __slots__ = ("_cells", "_lock")
+
+    def __init__(self):
+        self._cells: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def _new_cell(self) -> list:
+        return [0.0]
+
+    def _add_cell(self) -> list:
+        with self._lock:
+            return self._cells.setdefault(get_ident(), self._new_cell())
+
+    def _all_cells(self) -> List[list]:
+        return list(self._cells.values())
+
+
+class _CounterChild(_Sharded):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0) -> None:
+        cell = self._cells.get(get_ident())
+        if cell is None:
+            cell = self._add_cell()
+        cell[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(cell[0] for cell in self._all_cells())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class _GaugeChild(_Sharded):
+    # set() задає базу і обнуляє комірки; його не варто змішувати з inc/dec
+    # з інших потоків одночасно (для кожного gauge тут - один спосіб запису)
+    __slots__ = ("_base",)
+
+    def __init__(self):
+        super().__init__()
+        self._base = 0.0
+
+    def set(self, value: float) -> None:
+        self._base = value
+        for cell in self._all_cells():
+            cell[0] = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        cell = self._cells.get(get_ident())
+        if cell is None:
+            cell = self._add_cell()
+        cell[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        return self._base + sum(cell[0] for cell in self._all_cells())
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 multiprocess_mode: str = "sum"):
+        if multiprocess_mode not in MULTIPROCESS_MODES:
+            raise ValueError(f"{name}: unknown multiprocess_mode {multiprocess_mode!r}")
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+
+class _HistogramChild(_Sharded):
+    # Комірка потоку: лічильники по кошиках (останній - +Inf), потім сума
+    __slots__ = ("buckets",)
+
+    def __init__(self, buckets: Sequence[float]):
+        super().__init__()
+        self.buckets = buckets
+
+    def _new_cell(self) -> list:
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, value: float) -> None:
+        cell = self._cells.get(get_ident())
+        if cell is None:
+            cell = self._add_cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    @property
+    def counts(self) -> List[int]:
+        """Спостереження по кошиках (не накопичувально), останній - понад усі межі."""
+        totals = [0] * (len(self.buckets) + 1)
+        for cell in self._all_cells():
+            for i in range(len(totals)):
+                totals[i] += cell[i]
+        return totals
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def sum(self) -> float:
+        return sum(cell[-1] for cell in self._all_cells())
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Optional[Sequence[float]] = None):
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self, value: float):
+        self.value = value
+
+
+class CallbackMetric(_Metric):
+    """
+    Метрика, значення якої читаються під час збору, а не пишуться на гарячому
+    шляху (стан пулу з'єднань, лічильники кешів). callback повертає пари
+    (значення міток, значення).
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[Sequence[str], float]]],
+                 kind: str = "gauge", multiprocess_mode: str = "sum"):
+        if kind not in ("counter", "gauge"):
+            raise ValueError(f"{name}: callback metric must be a counter or a gauge")
+        if multiprocess_mode not in MULTIPROCESS_MODES:
+            raise ValueError(f"{name}: unknown multiprocess_mode {multiprocess_mode!r}")
+        self.kind = kind
+        self.multiprocess_mode = multiprocess_mode
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def labels(self, *values: str):
+        raise TypeError(f"{self.name}: callback metric values come from its callback")
+
+    def samples(self) -> Iterable[Tuple[Dict[str, str], object]]:
+        try:
+            values = list(self.callback())
+        except Exception:
+            logger.exception("Metric callback %s failed", self.name)
+            return
+        for key, value in values:
+            yield dict(zip(self.labelnames, (str(v) for v in key))), _Value(value)
+
+
+def snapshot() -> Dict[str, list]:
+    """Поточні значення всіх метрик у вигляді, придатному для JSON."""
+    result = {}
+    for name, metric in list(REGISTRY.items()):
+        rows = []
+        for labels, child in metric.samples():
+            if isinstance(child, _HistogramChild):
+                rows.append({"labels": labels, "count": child.count, "sum": round(child.sum, 6)})
+            else:
+                rows.append({"labels": labels, "value": child.value})
+        result[name] = rows
+    return result
+
+
+def collect() -> List[dict]:
+    """
+    Усі метрики процесу як сімейства (назва, тип, опис, зразки) - вхід для
+    exposition() і формат знімка MultiProcessCollector.
+    """
+    families = []
+    for metric in list(REGISTRY.values()):
+        family = {
+            "name": metric.name,
+            "kind": metric.kind,
+            "documentation": metric.documentation,
+            "mode": metric.multiprocess_mode,
+            "samples": [],
+        }
+        if metric.kind == "histogram":
+            family["buckets"] = list(metric.buckets)
+        for labels, child in metric.samples():
+            if metric.kind == "histogram":
+                family["samples"].append({"labels": labels, "counts": child.counts, "sum": child.sum})
+            else:
+                family["samples"].append({"labels": labels, "value": child.value})
+        families.append(family)
+    return families
+
+
+# === Текстовий формат Prometheus (0.0.4) ===
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs.items()) + "}"
+
+
+def exposition(families: Optional[List[dict]] = None) -> str:
+    """Метрики у текстовому форматі Prometheus (за замовчуванням - цього процесу)."""
+    lines = []
+    for family in collect() if families is None else families:
+        name, kind = family["name"], family["kind"]
+        documentation = family["documentation"].replace("\\", r"\\").replace("\n", r"\n")
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample in family["samples"]:
+            labels = sample["labels"]
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(sample['value'])}")
+                continue
+            cumulative = 0
+            bounds = [repr(float(bound)) for bound in family["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, sample["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+# === Агрегування між процесами ===
+# Кожен процес раз на інтервал (і при зупинці) атомарно перезаписує свій
+# знімок <каталог>/metrics-<pid>.json. Під час збору процес бере власні
+# метрики наживо, а решту - з файлів:
+#   - counter і histogram підсумовуються по всіх файлах, зокрема процесів,
+#     що вже завершились (інакше лічильники "відкочувались" би при рестарті
+#     воркера);
+#   - gauge беруться лише з живих процесів і зводяться за multiprocess_mode:
+#     sum / max / min або liveall (окремий ряд на процес з міткою pid).
+# Каталог очищається перед стартом застосунку (як для prometheus_client),
+# інакше лічильники попереднього запуску додадуться до нових.
+
+_SNAPSHOT_FILE = re.compile(r"^metrics-(\d+)\.json$")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(snapshots: Dict[int, List[dict]]) -> List[dict]:
+    merged: Dict[str, dict] = {}
+    for pid, families in snapshots.items():
+        alive = pid == os.getpid() or _pid_alive(pid)
+        for family in families:
+            kind, mode = family["kind"], family.get("mode", "sum")
+            if kind == "gauge" and not alive:
+                continue
+            target = merged.get(family["name"])
+            if target is None:
+                target = merged[family["name"]] = {**family, "samples": {}}
+            if kind != target["kind"] or family.get("buckets") != target.get("buckets"):
+                # Інша версія коду з іншим визначенням метрики - не змішуємо
+                continue
+            for sample in family["samples"]:
+                labels = dict(sample["labels"])
+                if kind == "gauge" and mode == "liveall":
+                    labels["pid"] = str(pid)
+                key = tuple(sorted(labels.items()))
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = {**sample, "labels": labels}
+                elif kind == "histogram":
+                    current["counts"] = [a + b for a, b in zip(current["counts"], sample["counts"])]
+                    current["sum"] += sample["sum"]
+                elif kind == "gauge" and mode == "max":
+                    current["value"] = max(current["value"], sample["value"])
+                elif kind == "gauge" and mode == "min":
+                    current["value"] = min(current["value"], sample["value"])
+                else:
+                    current["value"] += sample["value"]
+    return [{**family, "samples": list(family["samples"].values())} for family in merged.values()]
+
+
+class MultiProcessCollector:
+    """Знімки метрик процесів у спільному каталозі та їх агрегування."""
+
+    def __init__(self, directory: str, interval_seconds: float):
+        self.directory = directory
+        self.interval = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        # pid читається щоразу: після fork у воркера власний файл
+        return os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def write(self) -> None:
+        """Атомарно перезаписує знімок цього процесу."""
+        path = self.path
+        tmp_path = f"{path}.{get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "families": collect()}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _read_others(self) -> Dict[int, List[dict]]:
+        snapshots = {}
+        own = os.getpid()
+        for filename in os.listdir(self.directory):
+            match = _SNAPSHOT_FILE.match(filename)
+            if not match or int(match.group(1)) == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    snapshots[int(match.group(1))] = json.load(f)["families"]
+            except (OSError, ValueError, KeyError):
+                logger.warning("Skipping unreadable metrics snapshot %s", filename)
+        return snapshots
+
+    def collect(self) -> List[dict]:
+        """Метрики всіх процесів: цей - наживо, інші - з їхніх знімків."""
+        return _merge({os.getpid(): collect(), **self._read_others()})
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.write)
+            except Exception:
+                logger.exception("Writing metrics snapshot failed")
+
+    def start(self) -> None:
+        if not self.running:
+            self.write()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Останній знімок: лічильники процесу, що завершується, не губляться
+        self.write()
@@ -0,0 +1,83 @@
+import time
+from typing import Dict, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import metrics
+from config import settings
+
+# === Метрики HTTP і віддача для Prometheus ===
+# RequestMetricsMiddleware міряє кожен HTTP-запит: тривалість за шаблоном
+# маршруту (/works/{work_id}, а не конкретний id - щоб кількість рядів не
+# росла з даними) і кількість запитів в обробці. GET /metrics (див.
+# routers/stats.py) віддає всі метрики процесу в текстовому форматі
+# Prometheus, а з METRICS_MULTIPROC_DIR - підсумок усіх воркерів uvicorn.
+
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds", "Тривалість HTTP-запиту (до кінця відповіді)",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = metrics.Gauge(
+    "http_requests_in_flight", "HTTP-запити, що обробляються зараз"
+)
+
+_IN_FLIGHT = HTTP_REQUESTS_IN_FLIGHT.labels()
+
+# Спільний каталог знімків для кількох воркерів (None - лише цей процес)
+exporter = (
+    metrics.MultiProcessCollector(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL_SECONDS)
+    if settings.METRICS_MULTIPROC_DIR
+    else None
+)
+
+
+def render() -> str:
+    """Метрики у форматі Prometheus: всіх воркерів або лише цього процесу."""
+    return metrics.exposition(exporter.collect() if exporter is not None else None)
+
+
+def _route_template(scope: Scope, root_path: str) -> str:
+    """Шаблон маршруту запиту; для змонтованих застосунків (/static) - префікс монтування."""
+    route = getattr(scope.get("route"), "path", None)
+    if route:
+        return route
+    mounted = scope.get("root_path", "")
+    if len(mounted) > len(root_path):
+        return mounted[len(root_path):] + "/{path}"
+    return "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    """Тривалість HTTP-запитів за маршрутом і статусом та кількість запитів в обробці."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # (method, route, status) -> прив'язана дочірня гістограма
+        self._timers: Dict[Tuple[str, str, int], object] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        root_path = scope.get("root_path", "")
+        _IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _IN_FLIGHT.dec()
+            route = _route_template(scope, root_path)
+            key = (scope["method"], route, status_code)
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers.setdefault(key, HTTP_REQUEST_SECONDS.labels(*key))
+            timer.observe(time.perf_counter() - started)
@@ -0,0 +1,242 @@
+import argparse
+import logging
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+# === Версійовані міграції схеми ===
+# Схема Postgres - це migrations/NNNN_*.sql, застосовані по порядку; які саме
+# вже виконані, записано в таблиці schema_migrations (як alembic_version, але
+# з усією історією). main.py більше не викликає create_all при імпорті -
+# база оновлюється перед стартом застосунку:
+#
+#     python migrate.py              # застосувати нові міграції
+#     python migrate.py status       # що застосовано / що ні
+#
+# - Порожня база: 0000_baseline.sql і далі всі міграції.
+# - База, створена до migrate.py (sql_schema.sql / create_all): baseline
+#   позначається застосованим без виконання, решта міграцій виконується
+#   (вони ідемпотентні: IF NOT EXISTS, перерахунок лічильників).
+# - Міграції з CREATE/DROP INDEX CONCURRENTLY виконуються поза транзакцією,
+#   по одній інструкції; решта - однією транзакцією разом із записом версії.
+#   Невдалий CREATE INDEX CONCURRENTLY (дублікати, таймаут блокування)
+#   лишає INVALID-індекс, який IF NOT EXISTS при повторі пропустив би:
+#   такий індекс видаляється перед створенням, а версія записується, лише
+#   якщо всі створені файлом індекси валідні.
+# - Кілька процесів одночасно (MIGRATE_ON_STARTUP з кількома воркерами)
+#   серіалізуються через pg_advisory_lock.
+# SQLite (розробка, бенчмарки) не виконує Postgres-SQL: схема створюється
+# create_all з models.py, а всі міграції позначаються застосованими.
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+BASELINE = "0000"
+VERSIONS_TABLE = "schema_migrations"
+# Довільна стала для pg_advisory_lock (однакова для всіх процесів)
+_LOCK_ID = 0x44484D47
+
+_FILE_PATTERN = re.compile(r"^(\d{4})_[\w-]+\.sql$")
+_CONCURRENT_INDEX = re.compile(
+    r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?\"?(\w+)\"?",
+    re.IGNORECASE,
+)
+
+
+def available() -> Dict[str, str]:
+    """Версія -> шлях до файлу, за зростанням версії."""
+    found = {}
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = _FILE_PATTERN.match(filename)
+        if match:
+            found[match.group(1)] = os.path.join(MIGRATIONS_DIR, filename)
+    return found
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Розбиває SQL-файл на інструкції за ';' поза рядками, коментарями та
+    $$-блоками (тіла DO/функцій).
+    """
+    statements, current = [], []
+    i, length = 0, len(sql)
+    while i < length:
+        char = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = length if end == -1 else end
+            continue
+        if char == "'":
+            end = i + 1
+            while True:
+                end = sql.find("'", end)
+                if end == -1 or not sql.startswith("''", end):
+                    break
+                end += 2
+            end = length if end == -1 else end + 1
+            current.append(sql[i:end])
+            i = end
+            continue
+        if char == "$":
+            tag = re.match(r"\$\w*\$", sql[i:])
+            if tag:
+                end = sql.find(tag.group(0), i + len(tag.group(0)))
+                end = length if end == -1 else end + len(tag.group(0))
+                current.append(sql[i:end])
+                i = end
+                continue
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def _ensure_versions_table(conn: Connection) -> None:
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{VERSIONS_TABLE}" ('
+        '"version" VARCHAR(32) PRIMARY KEY, '
+        '"name" VARCHAR(255) NOT NULL, '
+        '"applied_at" TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'
+    ))
+
+
+def applied(conn: Connection) -> List[str]:
+    if not inspect(conn).has_table(VERSIONS_TABLE):
+        return []
+    return list(conn.execute(text(f'SELECT "version" FROM "{VERSIONS_TABLE}" ORDER BY "version"')).scalars())
+
+
+def pending(engine: Engine) -> List[str]:
+    with engine.connect() as conn:
+        done = set(applied(conn))
+    return [version for version in available() if version not in done]
+
+
+def _record(conn: Connection, version: str, path: str) -> None:
+    conn.execute(
+        text(f'INSERT INTO "{VERSIONS_TABLE}" ("version", "name") VALUES (:version, :name)'),
+        {"version": version, "name": os.path.basename(path)},
+    )
+
+
+def _index_valid(conn: Connection, name: str) -> Optional[bool]:
+    """pg_index.indisvalid індексу в поточній схемі або None, якщо індексу немає."""
+    return conn.execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid)"
+        ),
+        {"name": name},
+    ).scalar()
+
+
+def _apply(engine: Engine, version: str, path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        statements = split_statements(f.read())
+    if any("CONCURRENTLY" in statement.upper() for statement in statements):
+        # CREATE INDEX CONCURRENTLY не може бути в транзакції
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            created = []
+            for statement in statements:
+                match = _CONCURRENT_INDEX.match(statement)
+                if match:
+                    name = match.group(1)
+                    created.append(name)
+                    if _index_valid(conn, name) is False:
+                        logger.warning("Dropping invalid index %s left by a failed build", name)
+                        conn.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+                conn.exec_driver_sql(statement)
+            invalid = [name for name in created if not _index_valid(conn, name)]
+            if invalid:
+                raise RuntimeError(
+                    f"Migration {os.path.basename(path)} left invalid indexes: {', '.join(invalid)}"
+                )
+            _record(conn, version, path)
+        return
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+        _record(conn, version, path)
+
+
+def _has_app_tables(conn: Connection) -> bool:
+    return inspect(conn).has_table("User")
+
+
+def _upgrade_sqlite(engine: Engine) -> List[str]:
+    import models
+
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        _ensure_versions_table(conn)
+        done = set(applied(conn))
+        stamped = [version for version in available() if version not in done]
+        for version in stamped:
+            _record(conn, version, available()[version])
+    return stamped
+
+
+def upgrade(engine: Engine, target: Optional[str] = None) -> List[str]:
+    """Застосовує всі (або до target включно) незастосовані міграції. Повертає їхні версії."""
+    if engine.dialect.name == "sqlite":
+        return _upgrade_sqlite(engine)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _LOCK_ID})
+        try:
+            with engine.begin() as conn:
+                _ensure_versions_table(conn)
+                done = set(applied(conn))
+                if not done and _has_app_tables(conn):
+                    # База з часів create_all/sql_schema.sql
+                    _record(conn, BASELINE, available()[BASELINE])
+                    done.add(BASELINE)
+                    logger.info("Existing schema stamped as %s", BASELINE)
+            migrated = []
+            for version, path in available().items():
+                if version in done or (target is not None and version > target):
+                    continue
+                logger.info("Applying migration %s", os.path.basename(path))
+                _apply(engine, version, path)
+                migrated.append(version)
+            return migrated
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Міграції схеми DesignHub")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status"])
+    parser.add_argument("--target", help="застосувати міграції лише до цієї версії включно")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from database import engine
+
+    if args.command == "status":
+        with engine.connect() as conn:
+            done = set(applied(conn))
+        for version, path in available().items():
+            print(f"{'applied' if version in done else 'pending':8} {os.path.basename(path)}")
+        return 0
+
+    migrated = upgrade(engine, target=args.target)
+    print(f"{len(migrated)} migration(s) applied" + (f": {', '.join(migrated)}" if migrated else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+-- Базова схема: стан бази до першої міграції (початковий sql_schema.sql
+-- + таблиця Work_View, яку раніше створював create_all у main.py).
+-- migrate.py виконує цей файл лише на порожній базі; у базах, створених
+-- до появи migrate.py, він позначається застосованим без виконання.
+
+DO $$
+BEGIN
+  CREATE TYPE user_role_enum AS ENUM ('designer', 'admin', 'moderator');
+EXCEPTION
+  WHEN duplicate_object THEN NULL;
+END
+$$;
+
+CREATE TABLE IF NOT EXISTS "User" (
+  "id" SERIAL PRIMARY KEY,
+  "firstName" VARCHAR(100) NOT NULL,
+  "lastName" VARCHAR(100) NOT NULL,
+  "email" VARCHAR(255) UNIQUE NOT NULL,
+  "role" user_role_enum NOT NULL DEFAULT 'designer',
+  "password_hash" VARCHAR(255) NOT NULL,
+  "registration_date" TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS "Designer_Profile" (
+  "designer_id" INTEGER PRIMARY KEY REFERENCES "User"("id") ON DELETE CASCADE,
+  "specialization" VARCHAR(255),
+  "bio" TEXT,
+  "experience" INTEGER DEFAULT 0,
+  "rating" DECIMAL(3, 2) DEFAULT 0.00,
+  "views_count" INTEGER DEFAULT 0,
+  "work_amount" INTEGER DEFAULT 0,
+  "header_image_url" VARCHAR(255),
+  "avatar_url" VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS "Work" (
+  "id" SERIAL PRIMARY KEY,
+  "designer_id" INTEGER NOT NULL REFERENCES "User"("id") ON DELETE CASCADE,
+  "title" VARCHAR(255) NOT NULL,
+  "description" TEXT,
+  "upload_date" TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+  "views_count" INTEGER DEFAULT 0,
+  "image_url" VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS "Category" (
+  "id" SERIAL PRIMARY KEY,
+  "name" VARCHAR(100) UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS "Tag" (
+  "id" SERIAL PRIMARY KEY,
+  "name" VARCHAR(100) UNIQUE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS "Comment" (
+  "id" SERIAL PRIMARY KEY,
+  "author_id" INTEGER NOT NULL REFERENCES "User"("id") ON DELETE CASCADE,
+  "work_id" INTEGER NOT NULL REFERENCES "Work"("id") ON DELETE CASCADE,
+  "rating_score" INTEGER CHECK (rating_score >= 1 AND rating_score <= 5),
+  "comment_text" TEXT NOT NULL,
+  "review_date" TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS "Work_Category" (
+  "work_id" INTEGER NOT NULL REFERENCES "Work"("id") ON DELETE CASCADE,
+  "category_id" INTEGER NOT NULL REFERENCES "Category"("id") ON DELETE CASCADE,
+  PRIMARY KEY ("work_id", "category_id")
+);
+
+CREATE TABLE IF NOT EXISTS "Work_Tag" (
+  "work_id" INTEGER NOT NULL REFERENCES "Work"("id") ON DELETE CASCADE,
+  "tag_id" INTEGER NOT NULL REFERENCES "Tag"("id") ON DELETE CASCADE,
+  PRIMARY KEY ("work_id", "tag_id")
+);
+
+CREATE TABLE IF NOT EXISTS "Work_View" (
+  "id" SERIAL PRIMARY KEY,
+  "work_id" INTEGER NOT NULL REFERENCES "Work"("id") ON DELETE CASCADE,
+  "user_id" INTEGER NOT NULL REFERENCES "User"("id") ON DELETE CASCADE,
+  "viewed_at" TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Імена - ті, що Postgres давав безіменним індексам початкової схеми
+CREATE INDEX IF NOT EXISTS "Work_designer_id_idx" ON "Work" ("designer_id");
+CREATE INDEX IF NOT EXISTS "Comment_author_id_idx" ON "Comment" ("author_id");
+CREATE INDEX IF NOT EXISTS "Comment_work_id_idx" ON "Comment" ("work_id");
@@ -0,0 +1,12 @@
+-- Складені індекси під keyset-пагінацію (курсори) стрічки робіт
+-- та коментарів. B-tree читається у зворотньому порядку,
+-- тому (upload_date, id) обслуговує ORDER BY upload_date DESC, id DESC.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_upload_date_id"
+  ON "Work" ("upload_date", "id");
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_designer_id_upload_date_id"
+  ON "Work" ("designer_id", "upload_date", "id");
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Comment_work_id_review_date_id"
+  ON "Comment" ("work_id", "review_date", "id");
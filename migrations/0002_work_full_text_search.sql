@@ -0,0 +1,21 @@
+-- Повнотекстовий пошук по роботах (див. search.py).
+-- Генерована tsvector-колонка + GIN замість послідовного скану
+-- "title ILIKE '%q%' OR description ILIKE '%q%'".
+-- Trigram GIN-індекси (pg_trgm) обслуговують ILIKE для частин слів.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE "Work" ADD COLUMN IF NOT EXISTS "search_vector" tsvector
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce("title", '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce("description", '')), 'B')
+  ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_search_vector"
+  ON "Work" USING gin ("search_vector");
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_title_trgm"
+  ON "Work" USING gin ("title" gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_description_trgm"
+  ON "Work" USING gin ("description" gin_trgm_ops);
@@ -0,0 +1,16 @@
+-- Унікальний індекс (work_id, user_id) для Work_View: перевірка
+-- "чи вже переглядав" і вставка стають одним
+-- INSERT ... ON CONFLICT DO NOTHING RETURNING (див. crud.record_work_views).
+--
+-- Спершу прибираємо дублікати, що могли з'явитися через гонку
+-- check-then-insert (лишаємо найраніший перегляд). Лічильники views_count
+-- цим не виправляються.
+
+DELETE FROM "Work_View" AS v
+USING "Work_View" AS d
+WHERE v."work_id" = d."work_id"
+  AND v."user_id" = d."user_id"
+  AND v."id" > d."id";
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "ux_Work_View_work_id_user_id"
+  ON "Work_View" ("work_id", "user_id");
@@ -0,0 +1,24 @@
+-- Накопичені сума та кількість оцінок у профілі дизайнера: рейтинг
+-- оновлюється дельтою при зміні коментаря, а не AVG по всіх коментарях
+-- усіх робіт дизайнера (див. crud._apply_rating_delta).
+-- Перевірити/виправити розбіжності: python maintenance.py reconcile-ratings [--fix]
+
+ALTER TABLE "Designer_Profile"
+  ADD COLUMN IF NOT EXISTS "rating_sum" INTEGER NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS "rating_count" INTEGER NOT NULL DEFAULT 0;
+
+UPDATE "Designer_Profile" AS p
+SET "rating_sum" = agg.rating_sum,
+    "rating_count" = agg.rating_count,
+    "rating" = CASE WHEN agg.rating_count > 0
+                    THEN agg.rating_sum::numeric / agg.rating_count
+                    ELSE 0 END
+FROM (
+  SELECT w."designer_id",
+         COALESCE(SUM(c."rating_score"), 0) AS rating_sum,
+         COUNT(c."rating_score") AS rating_count
+  FROM "Work" AS w
+  JOIN "Comment" AS c ON c."work_id" = w."id"
+  GROUP BY w."designer_id"
+) AS agg
+WHERE p."designer_id" = agg."designer_id";
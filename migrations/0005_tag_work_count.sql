@@ -0,0 +1,18 @@
+-- Лічильник робіт для кожного тегу: /tags/popular читає готове значення
+-- замість COUNT(*) ... GROUP BY по Work_Tag. Лічильник змінюється дельтою
+-- разом зі зв'язками (див. crud._set_work_tags).
+-- Перевірити/виправити розбіжності: python maintenance.py reconcile-tag-counts [--fix]
+
+ALTER TABLE "Tag" ADD COLUMN IF NOT EXISTS "work_count" INTEGER NOT NULL DEFAULT 0;
+
+UPDATE "Tag" AS t
+SET "work_count" = agg.work_count
+FROM (
+  SELECT "tag_id", COUNT(*) AS work_count
+  FROM "Work_Tag"
+  GROUP BY "tag_id"
+) AS agg
+WHERE t."id" = agg."tag_id";
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Tag_work_count_id"
+  ON "Tag" ("work_count", "id");
@@ -0,0 +1,12 @@
+-- Похідні зображення (мініатюри та адаптивні розміри, див. images.py):
+-- маніфест thumb/card/full для роботи, шапки та аватарки профілю.
+-- Існуючі завантаження без маніфестів віддаються як оригінали; згенерувати
+-- похідні для них: python maintenance.py generate-image-variants
+
+ALTER TABLE "Work" ADD COLUMN IF NOT EXISTS "image_variants" JSON;
+ALTER TABLE "Designer_Profile" ADD COLUMN IF NOT EXISTS "header_image_variants" JSON;
+ALTER TABLE "Designer_Profile" ADD COLUMN IF NOT EXISTS "avatar_variants" JSON;
+
+-- Конвеєр знаходить роботи за файлом, коли похідні готові
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_image_url"
+  ON "Work" ("image_url");
@@ -0,0 +1,18 @@
+-- Content-addressed сховище зображень (див. media_store.py): один рядок на
+-- унікальний вміст (SHA-256) з лічильником посилань від робіт і профілів.
+-- Файли, завантажені до цієї міграції (імена-UUID), у таблицю не потрапляють:
+-- їхні URL працюють як раніше, але збирач сміття їх не чіпає.
+
+CREATE TABLE IF NOT EXISTS "Media_Blob" (
+  "sha256" VARCHAR(64) PRIMARY KEY,
+  "url" VARCHAR(255) NOT NULL UNIQUE,
+  "content_type" VARCHAR(64) NOT NULL,
+  "size" INTEGER NOT NULL,
+  "ref_count" INTEGER NOT NULL DEFAULT 0,
+  "created_at" TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+  "unreferenced_since" TIMESTAMP WITHOUT TIME ZONE
+);
+
+-- Збирач сміття вибирає найдавніші блоби без посилань
+CREATE INDEX IF NOT EXISTS "ix_Media_Blob_unreferenced_since"
+  ON "Media_Blob" ("unreferenced_since");
@@ -0,0 +1,7 @@
+-- Сховище медіа за абстракцією storage.py (локальний диск або S3): маніфест
+-- похідних зображень більше не лежить файлом manifest.json поруч із ними,
+-- а зберігається в рядку блоба - нова робота з тим самим вмістом отримує
+-- похідні без звернення до сховища.
+-- Для блобів, оброблених до цієї міграції: python maintenance.py generate-image-variants
+
+ALTER TABLE "Media_Blob" ADD COLUMN IF NOT EXISTS "variants" JSON;
@@ -0,0 +1,25 @@
+-- Індекси під решту запитів, що досі читали таблиці цілком
+-- (перевірка: python benchmarks/explain_check.py --check):
+--   - фільтр стрічки за тегами/категоріями (EXISTS по Work_Tag/Work_Category
+--     за tag_id/category_id) і перерахунок лічильників тегів: первинні ключі
+--     зв'язків починаються з work_id і для цього не годяться;
+--   - каскадне видалення користувача: його перегляди (Work_View.user_id)
+--     і коментарі (Comment.author_id).
+-- Одноколонкові індекси початкової схеми на Work.designer_id і
+-- Comment.work_id дублюють префікси складених індексів з 0001 - прибираємо.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_Tag_tag_id_work_id"
+  ON "Work_Tag" ("tag_id", "work_id");
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_Category_category_id_work_id"
+  ON "Work_Category" ("category_id", "work_id");
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Work_View_user_id"
+  ON "Work_View" ("user_id");
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_Comment_author_id"
+  ON "Comment" ("author_id");
+
+DROP INDEX CONCURRENTLY IF EXISTS "Comment_author_id_idx";
+DROP INDEX CONCURRENTLY IF EXISTS "Comment_work_id_idx";
+DROP INDEX CONCURRENTLY IF EXISTS "Work_designer_id_idx";
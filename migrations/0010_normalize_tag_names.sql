@@ -0,0 +1,54 @@
+-- Назви тегів нормалізуються (crud.normalize_tag_name: ' UI  Kit ' -> 'ui kit'),
+-- тож старий тег "UI Kit" вже не знаходиться за назвою, і поруч з'явився б
+-- другий тег "ui kit" - роботи й популярність розділились би між дублікатами.
+--
+-- Зливаємо теги з однаковою нормалізованою назвою в один: лишається тег,
+-- що вже має нормалізовану назву, або найстаріший; зв'язки Work_Tag
+-- переносяться на нього, решта тегів видаляється, назви нормалізуються,
+-- work_count перераховується.
+-- Після міграції: python maintenance.py reconcile-tag-counts (має бути 0 розбіжностей)
+
+CREATE TEMP TABLE "tag_merge" ON COMMIT DROP AS
+SELECT t."id",
+       lower(btrim(regexp_replace(t."name", '\s+', ' ', 'g'))) AS "normalized",
+       NULL::integer AS "keeper_id"
+FROM "Tag" AS t
+WHERE btrim(regexp_replace(t."name", '\s+', ' ', 'g')) <> '';
+
+UPDATE "tag_merge" AS m
+SET "keeper_id" = k."id"
+FROM (
+  SELECT DISTINCT ON (c."normalized") c."normalized", c."id"
+  FROM "tag_merge" AS c
+  JOIN "Tag" AS t ON t."id" = c."id"
+  ORDER BY c."normalized", (t."name" = c."normalized") DESC, c."id"
+) AS k
+WHERE m."normalized" = k."normalized";
+
+INSERT INTO "Work_Tag" ("work_id", "tag_id")
+SELECT wt."work_id", m."keeper_id"
+FROM "Work_Tag" AS wt
+JOIN "tag_merge" AS m ON m."id" = wt."tag_id"
+WHERE m."id" <> m."keeper_id"
+ON CONFLICT DO NOTHING;
+
+DELETE FROM "Work_Tag" AS wt
+USING "tag_merge" AS m
+WHERE wt."tag_id" = m."id"
+  AND m."id" <> m."keeper_id";
+
+DELETE FROM "Tag" AS t
+USING "tag_merge" AS m
+WHERE t."id" = m."id"
+  AND m."id" <> m."keeper_id";
+
+UPDATE "Tag" AS t
+SET "name" = m."normalized"
+FROM "tag_merge" AS m
+WHERE t."id" = m."id"
+  AND t."name" <> m."normalized";
+
+UPDATE "Tag" AS t
+SET "work_count" = (
+  SELECT COUNT(*) FROM "Work_Tag" AS wt WHERE wt."tag_id" = t."id"
+);
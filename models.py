@@ -1,18 +1,35 @@
 import enum
 from sqlalchemy import (Column, Integer, String, Text, DateTime, ForeignKey, 
-                        DECIMAL, Table, func, Enum as saEnum)
+                        DECIMAL, JSON, Table, Index, DDL, event, func, Enum as saEnum)
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from database import Base
 
+# --- Дата для keyset-курсорів ---
+# SQLite зберігає дату як текст і порівнює її як текст: func.now() (CURRENT_TIMESTAMP)
+# дає 'YYYY-MM-DD HH:MM:SS', а параметр DateTime SQLAlchemy - '... HH:MM:SS.000000'.
+# Тоді (upload_date, id) < курсор пропускає всі рядки тієї ж секунди, включно
+# з самим рядком курсора. Для колонок, за якими ходить курсор, на SQLite і
+# параметри, і значення з Python пишуться у форматі CURRENT_TIMESTAMP
+# (секунди; порядок у межах секунди тримає id). Postgres - без змін.
+CursorDateTime = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 # --- Асоціативні таблиці ---
+# Первинний ключ (work_id, ...) обслуговує "зв'язки роботи", а зворотний
+# індекс - фільтр стрічки за категорією/тегом (EXISTS ... category_id/tag_id)
 WorkCategory = Table('Work_Category', Base.metadata,
     Column('work_id', Integer, ForeignKey('Work.id'), primary_key=True),
-    Column('category_id', Integer, ForeignKey('Category.id'), primary_key=True)
+    Column('category_id', Integer, ForeignKey('Category.id'), primary_key=True),
+    Index("ix_Work_Category_category_id_work_id", "category_id", "work_id"),
 )
 
 WorkTag = Table('Work_Tag', Base.metadata,
     Column('work_id', Integer, ForeignKey('Work.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('Tag.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('Tag.id'), primary_key=True),
+    Index("ix_Work_Tag_tag_id_work_id", "tag_id", "work_id"),
 )
 
 class UserRole(str, enum.Enum):
@@ -46,10 +63,17 @@ class Designer_Profile(Base):
     bio = Column(Text)
     experience = Column(Integer, default=0) 
     rating = Column(DECIMAL(3, 2), default=0.00)
+    # Сума та кількість оцінок - з них rating оновлюється дельтою
+    # (див. crud._apply_rating_delta та maintenance.py reconcile-ratings)
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
     views_count = Column(Integer, default=0)
     work_amount = Column(Integer, default=0)
     header_image_url = Column(String(255), nullable=True)
     avatar_url = Column(String(255), nullable=True)
+    # Маніфести похідних зображень (див. images.py); NULL - ще не згенеровані
+    header_image_variants = Column(JSON(none_as_null=True), nullable=True)
+    avatar_variants = Column(JSON(none_as_null=True), nullable=True)
     designer = relationship("User", back_populates="designer_profile")
 
 class Work(Base):
@@ -58,9 +82,11 @@ class Work(Base):
     designer_id = Column(Integer, ForeignKey("User.id"), nullable=False)
     title = Column(String(255), nullable=False)
     description = Column(Text)
-    upload_date = Column(DateTime, server_default=func.now())
+    upload_date = Column(CursorDateTime, server_default=func.now())
     views_count = Column(Integer, default=0)
     image_url = Column(String(255)) 
+    # Маніфест похідних зображення: thumb/card/full у JPEG/PNG, WebP, AVIF
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
 
     designer = relationship("User", back_populates="works")
     comments = relationship("Comment", back_populates="work", cascade="all, delete-orphan")
@@ -71,6 +97,31 @@ class Work(Base):
     # Він має бути тут, щоб WorkView міг на нього посилатися
     views = relationship("WorkView", back_populates="work", cascade="all, delete-orphan")
 
+    # Складені індекси під keyset-пагінацію стрічки (ORDER BY upload_date DESC, id DESC)
+    __table_args__ = (
+        Index("ix_Work_upload_date_id", "upload_date", "id"),
+        Index("ix_Work_designer_id_upload_date_id", "designer_id", "upload_date", "id"),
+        # Пошук робіт за файлом, коли для нього готові похідні (crud.set_image_variants)
+        Index("ix_Work_image_url", "image_url"),
+    )
+
+# === Повнотекстовий пошук (лише Postgres) ===
+# Колонка search_vector не описана як Column, бо SQLite не має tsvector;
+# при create_all на Postgres додаємо її та індекси одразу після створення таблиці
+# (для існуючих баз - migrations/0002_work_full_text_search.sql).
+for _statement in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """ALTER TABLE "Work" ADD COLUMN IF NOT EXISTS "search_vector" tsvector
+         GENERATED ALWAYS AS (
+           setweight(to_tsvector('simple', coalesce("title", '')), 'A') ||
+           setweight(to_tsvector('simple', coalesce("description", '')), 'B')
+         ) STORED""",
+    'CREATE INDEX IF NOT EXISTS "ix_Work_search_vector" ON "Work" USING gin ("search_vector")',
+    'CREATE INDEX IF NOT EXISTS "ix_Work_title_trgm" ON "Work" USING gin ("title" gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "ix_Work_description_trgm" ON "Work" USING gin ("description" gin_trgm_ops)',
+):
+    event.listen(Work.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
 class Category(Base):
     __tablename__ = "Category"
     id = Column(Integer, primary_key=True, index=True)
@@ -81,8 +132,16 @@ class Tag(Base):
     __tablename__ = "Tag"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, index=True, nullable=False)
+    # Кількість робіт з цим тегом; змінюється дельтою разом із Work_Tag
+    # (див. crud._set_work_tags), а не рахується COUNT-ом при читанні
+    work_count = Column(Integer, nullable=False, default=0, server_default="0")
     works = relationship("Work", secondary=WorkTag, back_populates="tags")
 
+    # Під /tags/popular: ORDER BY work_count DESC
+    __table_args__ = (
+        Index("ix_Tag_work_count_id", "work_count", "id"),
+    )
+
 class Comment(Base):
     __tablename__ = "Comment"
     id = Column(Integer, primary_key=True, index=True)
@@ -90,10 +149,17 @@ class Comment(Base):
     work_id = Column(Integer, ForeignKey("Work.id"), nullable=False)
     rating_score = Column(Integer) 
     comment_text = Column(Text, nullable=False)
-    review_date = Column(DateTime, server_default=func.now())
+    review_date = Column(CursorDateTime, server_default=func.now())
     work = relationship("Work", back_populates="comments")
     author = relationship("User", back_populates="comments")
 
+    # Індекс під keyset-пагінацію коментарів роботи; author_id - для
+    # коментарів користувача при його видаленні
+    __table_args__ = (
+        Index("ix_Comment_work_id_review_date_id", "work_id", "review_date", "id"),
+        Index("ix_Comment_author_id", "author_id"),
+    )
+
 # === НОВА ТАБЛИЦЯ: Історія переглядів ===
 class WorkView(Base):
     __tablename__ = "Work_View"
@@ -102,7 +168,35 @@ class WorkView(Base):
     user_id = Column(Integer, ForeignKey("User.id"), nullable=False)
     viewed_at = Column(DateTime, server_default=func.now())
 
+    # Один перегляд на пару (робота, користувач); на ньому тримається
+    # INSERT ... ON CONFLICT DO NOTHING у crud.record_work_views
+    __table_args__ = (
+        Index("ux_Work_View_work_id_user_id", "work_id", "user_id", unique=True),
+        Index("ix_Work_View_user_id", "user_id"),
+    )
+
     # Зв'язки
     # Тут ми посилаємось на "Work.views", тому у класі Work має бути атрибут views
     work = relationship("Work", back_populates="views")
-    user = relationship("User", back_populates="viewed_works")
\ No newline at end of file
+    user = relationship("User", back_populates="viewed_works")
+
+# === Блоби завантажених файлів (content-addressed, див. media_store.py) ===
+class MediaBlob(Base):
+    __tablename__ = "Media_Blob"
+    sha256 = Column(String(64), primary_key=True)
+    url = Column(String(255), unique=True, nullable=False)
+    content_type = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    # Скільки посилань (Work.image_url, шапки/аватарки профілів) на цей файл;
+    # змінюється дельтою разом із ними (див. crud._adjust_media_refs)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, server_default=func.now())
+    # Відколи блоб без посилань (UTC); NULL - на нього посилаються.
+    # Збирач сміття видаляє лише блоби без посилань довше за grace-період
+    unreferenced_since = Column(DateTime, nullable=True)
+    # Маніфест похідних зображень (images.render_variants); NULL - ще не згенеровані
+    variants = Column(JSON(none_as_null=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_Media_Blob_unreferenced_since", "unreferenced_since"),
+    )
@@ -0,0 +1,77 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response, status
+
+# === Курсорна (keyset) пагінація ===
+# Замість OFFSET/LIMIT клієнт отримує непрозорий токен з ключем
+# сортування останнього елемента сторінки (дата, id) і передає його назад.
+# Postgres тоді одразу "стрибає" по індексу до потрібного місця,
+# не скануючи всі попередні рядки.
+
+# Заголовок відповіді, в якому повертаємо курсор наступної сторінки
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Cursor = Tuple[datetime, int]
+
+
+class InvalidCursor(ValueError):
+    """Курсор пошкоджений або сформований не нами."""
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Пакує пару (дата, id) у непрозорий URL-safe токен."""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Розпаковує токен назад у (дата, id)."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def next_cursor(items: Sequence, sort_attr: str, limit: int) -> Optional[str]:
+    """
+    Повертає курсор для наступної сторінки,
+    або None, якщо це була остання (неповна) сторінка.
+    """
+    if limit <= 0 or len(items) < limit:
+        return None
+    last = items[-1]
+    sort_value = getattr(last, sort_attr)
+    if sort_value is None:
+        return None
+    return encode_cursor(sort_value, last.id)
+
+
+def cursor_param(
+    cursor: Optional[str] = Query(
+        None,
+        description=f"Курсор наступної сторінки (з заголовка {NEXT_CURSOR_HEADER}). Якщо передано, `skip` ігнорується."
+    )
+) -> Optional[Cursor]:
+    """Залежність (Dependency): розбирає курсор з query-параметра."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Неправильний курсор пагінації."
+        )
+
+
+def set_next_cursor(response: Response, items: Sequence, sort_attr: str, limit: int) -> None:
+    """Додає курсор наступної сторінки у заголовок відповіді (якщо вона є)."""
+    token = next_cursor(items, sort_attr, limit)
+    if token is not None:
+        response.headers[NEXT_CURSOR_HEADER] = token
@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# === Хешування паролів (bcrypt) поза event loop ===
+# bcrypt навмисно повільний (~250 мс при 12 раундах): навіть коли він
+# відпускає GIL, потік весь цей час зайнятий. Щоб сплеск логінів не забивав спільний
+# threadpool Starlette, вся робота з паролями йде в окремий пул процесів
+# з власним обмеженням паралельності.
+#
+# Модуль навмисно не імпортує config/database: дочірні процеси пулу
+# імпортують лише його.
+
+# bcrypt враховує тільки перші 72 байти
+BCRYPT_MAX_BYTES = 72
+
+
+@lru_cache(maxsize=None)
+def _context(rounds: int) -> CryptContext:
+    # deprecated="auto" + bcrypt__rounds: хеші зі старою вартістю
+    # позначаються як такі, що потребують оновлення
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def _truncate(password: str) -> str:
+    password_bytes = password.encode("utf-8")
+    if len(password_bytes) > BCRYPT_MAX_BYTES:
+        return password_bytes[:BCRYPT_MAX_BYTES].decode("utf-8", "ignore")
+    return password
+
+
+def hash_password(password: str, rounds: int) -> str:
+    """Синхронне хешування (виконується у процесі пулу)."""
+    return _context(rounds).hash(_truncate(password))
+
+
+def verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """
+    Перевіряє пароль. Якщо хеш створено з іншою вартістю - повертає
+    також новий хеш, який треба зберегти (прозоре оновлення).
+    """
+    return _context(rounds).verify_and_update(_truncate(password), hashed_password)
+
+
+class PasswordHasher:
+    """Пул процесів для bcrypt + семафор, що обмежує кількість задач у польоті."""
+
+    def __init__(self, rounds: int, workers: int = 0, concurrency: int = 0):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 1
+        # Невелика черга понад кількість процесів, щоб вони не простоювали
+        self.concurrency = concurrency or self.workers * 2
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: форк процесу з потоками uvicorn може успадкувати захоплені локи
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update, password, hashed_password, self.rounds)
+
+    def warm_up(self) -> None:
+        """Запускає процеси заздалегідь, щоб перший логін не платив за старт пулу."""
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
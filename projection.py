@@ -0,0 +1,66 @@
+import typing
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+# === Projection-aware завантаження зв'язків ===
+# Схема відповіді (Pydantic) вирішує, які relationships треба підвантажити.
+# Якщо поля немає у схемі - зв'язок не завантажується взагалі,
+# тому ORM не будує об'єкти, які потім однаково викидаються.
+
+
+def _nested_schema(annotation) -> Optional[Type[BaseModel]]:
+    """Дістає вкладену Pydantic-схему з анотації (List[X], Optional[X], X)."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        nested = _nested_schema(arg)
+        if nested is not None:
+            return nested
+    return None
+
+
+def _paths(model, schema: Type[BaseModel], prefix: Tuple = ()) -> Iterator[Tuple]:
+    """Повертає шляхи relationships (від кореня), які потрібні схемі."""
+    relationships = inspect(model).relationships
+    for name, field in schema.model_fields.items():
+        attr_name = field.validation_alias if isinstance(field.validation_alias, str) else name
+        rel = relationships.get(attr_name)
+        if rel is None:
+            continue
+        path = prefix + (rel,)
+        yield path
+        nested = _nested_schema(field.annotation)
+        if nested is not None:
+            yield from _paths(rel.mapper.class_, nested, path)
+
+
+def _loader(parent, rel):
+    """
+    Many-to-one (автор, дизайнер) - JOIN у той самий запит, рядки не множаться.
+    Колекції (категорії, теги, коментарі) - окремий пакетний SELECT ... IN.
+    """
+    attr = getattr(rel.parent.class_, rel.key)
+    if rel.uselist:
+        return parent.selectinload(attr) if parent is not None else selectinload(attr)
+    return parent.joinedload(attr) if parent is not None else joinedload(attr)
+
+
+@lru_cache(maxsize=None)
+def load_options(model, schema: Optional[Type[BaseModel]]) -> Tuple:
+    """
+    Будує (і кешує) опції для `query.options(...)` під конкретну схему.
+    `schema=None` означає "тільки колонки, без зв'язків".
+    """
+    if schema is None:
+        return ()
+    options: List = []
+    for path in _paths(model, schema):
+        option = None
+        for rel in path:
+            option = _loader(option, rel)
+        options.append(option)
+    return tuple(options)
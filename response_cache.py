@@ -0,0 +1,322 @@
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+import cache
+import serialization
+from config import settings
+from http_cache import etag_matches, make_etag
+
+# === Кеш відповідей публічних ендпоінтів читання ===
+# Ключ - шлях + нормалізовані query-параметри, значення - готове JSON-тіло,
+# ETag і заголовки (X-Next-Cursor). Кожен запис позначено тегами
+# ("works", "work:5", "designer:3", "comments:5"); crud після commit
+# інвалідує теги, яких торкнулась зміна (див. crud._invalidate_responses).
+#
+# Бекенди:
+#   - "memory": LRU+TTL у процесі (інвалідація - лише в цьому воркері,
+#     решта воркерів бачить зміни не пізніше ніж через TTL);
+#   - "redis": спільний для всіх воркерів (потрібен пакет redis);
+#   - "none": кеш вимкнено.
+#
+# Гонка з інвалідацією: обробник читає БД, паралельний запис робить commit
+# та інвалідацію, і лише потім обробник кладе в кеш уже застарілу відповідь -
+# вона жила б до TTL. Тому кожна інвалідація підвищує версію (epoch) і
+# запам'ятовує її для своїх тегів, як taxonomy.TaxonomySet: lookup при
+# промаху фіксує поточну версію, а store не кешує відповідь, якщо котрийсь
+# її тег інвалідували після цього.
+#
+# Лічильники переглядів (views_count) кеш навмисно не інвалідують:
+# вони оновлюються пачками (view_buffer.py) і можуть відставати на TTL.
+
+ALL_WORKS = "works"
+
+Entry = Tuple[bytes, str, Dict[str, str]]  # (тіло, ETag, заголовки)
+
+
+def work_tag(work_id: int) -> str:
+    return f"work:{work_id}"
+
+
+def designer_tag(designer_id: int) -> str:
+    return f"designer:{designer_id}"
+
+
+def comments_tag(work_id: int) -> str:
+    return f"comments:{work_id}"
+
+
+# === Бекенди ===
+
+class MemoryBackend:
+    """LRU+TTL (cache.TTLCache) плюс індекс тег -> ключі."""
+
+    blocking = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = cache.TTLCache("responses", maxsize=maxsize, ttl=ttl)
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        # Версія зростає з кожною інвалідацією; тег -> версія його останньої
+        # інвалідації; _cleared - версія останнього скидання всього кешу
+        self._epoch = 0
+        self._tag_epochs: Dict[str, int] = {}
+        self._cleared = 0
+
+    def get(self, key: str) -> Optional[Entry]:
+        return self._entries.get(key)
+
+    def epoch(self) -> int:
+        return self._epoch
+
+    def set(self, key: str, entry: Entry, tags: Iterable[str], ttl: float, since: int) -> bool:
+        with self._lock:
+            # Перевірка і запис під одним замком з інвалідацією
+            if self._cleared > since or any(self._tag_epochs.get(tag, 0) > since for tag in tags):
+                return False
+            self._entries.set(key, entry, ttl=ttl)
+            for tag in tags:
+                self._tags[tag].add(key)
+            # Ключі, витіснені з LRU, лишаються в індексі тегів - періодично чистимо
+            if sum(len(keys) for keys in self._tags.values()) > self._entries.maxsize * 4:
+                self._prune()
+        return True
+
+    def _prune(self) -> None:
+        for tag in list(self._tags):
+            self._tags[tag] = {key for key in self._tags[tag] if self._entries.get(key) is not None}
+            if not self._tags[tag]:
+                del self._tags[tag]
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            self._epoch += 1
+            keys = set()
+            for tag in tags:
+                self._tag_epochs[tag] = self._epoch
+                keys |= self._tags.pop(tag, set())
+            # Версії тегів не мають TTL - коли їх забагато, забуваємо всі,
+            # а незавершені store з давнішою версією просто не кешують
+            if len(self._tag_epochs) > self._entries.maxsize * 4:
+                self._tag_epochs.clear()
+                self._cleared = self._epoch
+        for key in keys:
+            self._entries.invalidate(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._cleared = self._epoch
+            self._tag_epochs.clear()
+            self._tags.clear()
+        self._entries.clear()
+
+
+class RedisBackend:
+    """
+    Спільний кеш у Redis: запис - hash {body, meta}, тег - set ключів.
+    Версії інвалідацій теж у Redis, тож гонку бачать усі воркери; store
+    перевіряє їх у транзакції WATCH/MULTI.
+    Клієнт синхронний, тому в event loop читання йде через threadpool (blocking=True).
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "designhub:responses:"):
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - залежить від оточення
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis потребує пакет 'redis'") from exc
+        self._redis = redis
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._epoch_key = prefix + "epoch"
+        self._cleared_key = prefix + "cleared"
+
+    def _key(self, key: str) -> str:
+        return self._prefix + "entry:" + key
+
+    def _tag(self, tag: str) -> str:
+        return self._prefix + "tag:" + tag
+
+    def _tag_epoch(self, tag: str) -> str:
+        return self._prefix + "tagv:" + tag
+
+    def get(self, key: str) -> Optional[Entry]:
+        stored = self._client.hgetall(self._key(key))
+        if not stored:
+            return None
+        meta = json.loads(stored[b"meta"])
+        return stored[b"body"], meta["etag"], meta["headers"]
+
+    def epoch(self) -> int:
+        return int(self._client.get(self._epoch_key) or 0)
+
+    def set(self, key: str, entry: Entry, tags: Iterable[str], ttl: float, since: int) -> bool:
+        body, etag, headers = entry
+        tags = list(tags)
+        redis_key = self._key(key)
+        epoch_keys = [self._cleared_key] + [self._tag_epoch(tag) for tag in tags]
+        with self._client.pipeline() as pipe:
+            try:
+                # Інвалідація між перевіркою і записом скасує транзакцію
+                pipe.watch(*epoch_keys)
+                if any(int(value or 0) > since for value in pipe.mget(epoch_keys)):
+                    return False
+                pipe.multi()
+                pipe.hset(redis_key, mapping={"body": body, "meta": json.dumps({"etag": etag, "headers": headers})})
+                pipe.expire(redis_key, int(ttl))
+                for tag in tags:
+                    pipe.sadd(self._tag(tag), redis_key)
+                    pipe.expire(self._tag(tag), int(ttl) * 2)
+                pipe.execute()
+            except self._redis.WatchError:
+                return False
+        return True
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        if not tags:
+            return
+        tag_keys = [self._tag(tag) for tag in tags]
+        epoch = self._client.incr(self._epoch_key)
+        pipe = self._client.pipeline()
+        for tag in tags:
+            # Обробник, що читав БД до цього commit, довше за TTL не триває
+            pipe.set(self._tag_epoch(tag), epoch, ex=int(settings.RESPONSE_CACHE_TTL_SECONDS) * 2)
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        keys = set()
+        for members in pipe.execute()[len(tags):]:
+            keys |= set(members)
+        self._client.delete(*keys, *tag_keys)
+
+    def clear(self) -> None:
+        self._client.set(self._cleared_key, self._client.incr(self._epoch_key))
+        keys = [
+            key for key in self._client.scan_iter(self._prefix + "*")
+            if key.decode() not in (self._epoch_key, self._cleared_key)
+        ]
+        if keys:
+            self._client.delete(*keys)
+
+
+class NullBackend:
+    blocking = False
+
+    def get(self, key: str) -> Optional[Entry]:
+        return None
+
+    def epoch(self) -> int:
+        return 0
+
+    def set(self, key: str, entry: Entry, tags: Iterable[str], ttl: float, since: int) -> bool:
+        return False
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+# === Кеш ===
+
+class ResponseCache:
+    def __init__(self, backend, ttl: float, cache_control: str):
+        self.backend = backend
+        self.ttl = ttl
+        self.cache_control = cache_control
+
+    @staticmethod
+    def key_for(request: Request, list_params: Iterable[str] = ()) -> str:
+        """
+        Ключ: шлях + відсортовані непорожні параметри. Для параметрів-списків
+        ("1,2" / "2, 1") порядок і пробіли не важливі.
+        """
+        list_params = set(list_params)
+        params = []
+        for name, value in request.query_params.multi_items():
+            value = value.strip()
+            if not value:
+                continue
+            if name in list_params:
+                value = ",".join(sorted({item.strip() for item in value.split(",") if item.strip()}))
+            params.append((name, value))
+        query = "&".join(f"{name}={value}" for name, value in sorted(params))
+        return f"{request.url.path}?{query}"
+
+    def _response(self, request: Request, entry: Entry, status: str) -> Response:
+        body, etag, headers = entry
+        headers = {**headers, "ETag": etag, "Cache-Control": self.cache_control, "X-Cache": status}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def lookup(self, request: Request, key: str) -> Optional[Response]:
+        """
+        Готова відповідь з кешу (200 або 304) або None при промаху.
+        При промаху запам'ятовує версію кешу для store (до читання БД обробником).
+        """
+        if self.backend.blocking:
+            entry = await run_in_threadpool(self.backend.get, key)
+        else:
+            entry = self.backend.get(key)
+        if entry is None:
+            if self.backend.blocking:
+                request.state.response_cache_epoch = await run_in_threadpool(self.backend.epoch)
+            else:
+                request.state.response_cache_epoch = self.backend.epoch()
+            return None
+        return self._response(request, entry, "HIT")
+
+    async def store(
+        self,
+        request: Request,
+        key: str,
+        schema,
+        value: Any,
+        tags: List[str],
+        headers: Optional[Dict[str, Optional[str]]] = None,
+    ) -> Response:
+        """
+        Серіалізує відповідь за схемою, кладе в кеш і віддає клієнту.
+        Не кешує, якщо котрийсь із тегів інвалідували після lookup: дані,
+        прочитані обробником, могли застаріти.
+        """
+        body = serialization.dump_json(schema, value)
+        entry = (body, make_etag(body), {k: v for k, v in (headers or {}).items() if v is not None})
+        # Без lookup версія невідома - вважаємо, що все могло змінитися
+        since = getattr(request.state, "response_cache_epoch", -1)
+        if self.backend.blocking:
+            await run_in_threadpool(self.backend.set, key, entry, tags, self.ttl, since)
+        else:
+            self.backend.set(key, entry, tags, self.ttl, since)
+        return self._response(request, entry, "MISS")
+
+    def invalidate(self, *tags: str) -> None:
+        self.backend.invalidate(tags)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def _make_backend():
+    name = settings.RESPONSE_CACHE_BACKEND
+    if name == "redis":
+        return RedisBackend(settings.RESPONSE_CACHE_REDIS_URL or "redis://localhost:6379/0")
+    if name == "none":
+        return NullBackend()
+    return MemoryBackend(maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+
+
+response_cache = ResponseCache(
+    _make_backend(),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    cache_control=settings.RESPONSE_CACHE_CONTROL,
+)
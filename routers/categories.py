@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-import crud, models, schemas, security
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+import crud_async, models, schemas, security
 from typing import List
-from database import get_db
+from database import DbSession, get_db
+from http_cache import cached_response
+import taxonomy
+from sql_profiler import query_budget
 
 router = APIRouter(
     # prefix="/categories",
@@ -17,21 +19,26 @@ router = APIRouter(
 #         db.close()
 
 @router.get("/", response_model=List[schemas.Category])
-def read_categories(
+@query_budget(1)
+async def read_categories(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_db)
 ):
     """
     Отримати список всіх категорій.
+    Довідник віддається з кешу процесу (taxonomy.py); з If-None-Match
+    і незмінним ETag відповідь - 304 без тіла.
     """
-    categories = crud.get_categories(db, skip=skip, limit=limit)
-    return categories
+    items = await taxonomy.categories.get_async(db)
+    return cached_response(request, taxonomy.page_body(items, skip, limit))
 
 @router.post("/", response_model=schemas.Category, status_code=status.HTTP_201_CREATED)
-def create_category(
+@query_budget(3)
+async def create_category(
     category: schemas.CategoryCreate,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_db)
     # (Опційно) Можна захистити цей ендпоінт,
     # щоб тільки адміни могли створювати категорії
     # current_user: models.User = Depends(security.get_current_user) 
@@ -39,8 +46,8 @@ def create_category(
     """
     Створити нову категорію.
     """
-    db_category = crud.get_category_by_name(db, name=category.name)
+    db_category = await crud_async.get_category_by_name(db, name=category.name)
     if db_category:
         raise HTTPException(status_code=400, detail="Category already exists")
-    return crud.create_category(db=db, category=category)
+    return await crud_async.create_category(db=db, category=category)
 
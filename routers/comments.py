@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-import crud, models, schemas, security
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+import crud_async, models, schemas, security
 from typing import List, Optional
-from database import get_db
+from database import DbSession, get_db
+from pagination import NEXT_CURSOR_HEADER, Cursor, cursor_param, set_next_cursor
+from response_cache import comments_tag, response_cache
+from sql_profiler import query_budget
 
 router = APIRouter(
     tags=["Comments"]
@@ -10,9 +12,10 @@ router = APIRouter(
 
 # === Ендпоінт для СТВОРЕННЯ коментаря ===
 @router.post("/", response_model=schemas.Comment, status_code=status.HTTP_201_CREATED)
-def create_comment(
+@query_budget(7)
+async def create_comment(
     comment: schemas.CommentCreate, 
-    db: Session = Depends(get_db), 
+    db: DbSession = Depends(get_db), 
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
@@ -21,51 +24,67 @@ def create_comment(
     Автор коментаря (`author_id`) автоматично прив'язується до `current_user`.
     """
     # Перевіряємо, чи існує робота, яку коментують
-    db_work = crud.get_work(db, work_id=comment.work_id)
+    db_work = await crud_async.get_work(db, work_id=comment.work_id, schema=None)
     if not db_work:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Роботу з id {comment.work_id} не знайдено."
         )
         
-    return crud.create_comment(db=db, comment=comment, author_id=current_user.id)
+    return await crud_async.create_comment(db=db, comment=comment, author_id=current_user.id)
 
 # === Ендпоінт для ЧИТАННЯ коментарів (для роботи) ===
 @router.get("/by-work/{work_id}", response_model=List[schemas.Comment])
-def read_comments_for_work(
+@query_budget(2)
+async def read_comments_for_work(
     work_id: int,
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db)
+    cursor: Optional[Cursor] = Depends(cursor_param),
+    db: DbSession = Depends(get_db)
 ):
     """
     Отримує список коментарів для конкретної роботи.
     Це публічний ендпоінт.
     """
+    cache_key = response_cache.key_for(request)
+    cached = await response_cache.lookup(request, cache_key)
+    if cached is not None:
+        return cached
+
     # Перевіряємо, чи існує робота
-    db_work = crud.get_work(db, work_id=work_id)
+    db_work = await crud_async.get_work(db, work_id=work_id, schema=None)
     if not db_work:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Роботу з id {work_id} не знайдено."
         )
         
-    comments = crud.get_comments_by_work(db, work_id=work_id, skip=skip, limit=limit)
-    return comments
+    comments = await crud_async.get_comments_by_work(
+        db, work_id=work_id, skip=skip, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, comments, "review_date", limit)
+    return await response_cache.store(
+        request, cache_key, List[schemas.Comment], comments, tags=[comments_tag(work_id)],
+        headers={NEXT_CURSOR_HEADER: response.headers.get(NEXT_CURSOR_HEADER)}
+    )
 
 # === Ендпоінт для РЕДАГУВАННЯ коментаря ===
 @router.put("/{comment_id}", response_model=schemas.Comment)
-def update_comment(
+@query_budget(6)
+async def update_comment(
     comment_id: int,
     comment_data: schemas.CommentUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
     Оновлює коментар.
     Доступно лише автору коментаря.
     """
-    db_comment = crud.get_comment(db, comment_id=comment_id)
+    db_comment = await crud_async.get_comment(db, comment_id=comment_id)
     
     if not db_comment:
         raise HTTPException(
@@ -80,20 +99,21 @@ def update_comment(
             detail="Ви не можете редагувати чужі коментарі."
         )
         
-    return crud.update_comment(db=db, comment_id=comment_id, comment_data=comment_data)
+    return await crud_async.update_comment(db=db, comment_id=comment_id, comment_data=comment_data)
 
 # === Ендпоінт для ВИДАЛЕННЯ коментаря ===
 @router.delete("/{comment_id}", response_model=schemas.Comment)
-def delete_comment(
+@query_budget(6)
+async def delete_comment(
     comment_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
     Видаляє коментар.
     Доступно лише автору коментаря, адміністратору або модератору.
     """
-    db_comment = crud.get_comment(db, comment_id=comment_id)
+    db_comment = await crud_async.get_comment(db, comment_id=comment_id)
     
     if not db_comment:
         raise HTTPException(
@@ -111,5 +131,5 @@ def delete_comment(
             detail="Ви не маєте прав для видалення цього коментаря."
         )
         
-    deleted_comment = crud.delete_comment(db, comment_id=comment_id)
+    deleted_comment = await crud_async.delete_comment(db, comment_id=comment_id)
     return deleted_comment
\ No newline at end of file
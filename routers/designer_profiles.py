@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-import shutil
-import os
-import uuid  # Для генерації унікальних імен файлів
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 
-import crud, models, schemas, security
-from database import get_db
+import crud_async, models, schemas, security
+from database import DbSession, get_db
+from image_pipeline import image_pipeline
+from upload_stream import save_upload
+from response_cache import designer_tag, response_cache
+from sql_profiler import query_budget
 
 router = APIRouter(
     tags=["Designer Profiles"]
@@ -13,14 +13,15 @@ router = APIRouter(
 
 # === ОТРИМАННЯ СВОГО ПРОФІЛЮ ===
 @router.get("/me", response_model=schemas.DesignerProfile)
-def get_my_profile(
-    db: Session = Depends(get_db),
+@query_budget(2)
+async def get_my_profile(
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
     Отримує профіль поточного автентифікованого користувача.
     """
-    profile = crud.get_designer_profile(db, user_id=current_user.id)
+    profile = await crud_async.get_designer_profile(db, user_id=current_user.id)
     if not profile:
         # У новій логіці це малоймовірно, бо профіль створюється при реєстрації,
         # але перевірка не завадить.
@@ -32,9 +33,10 @@ def get_my_profile(
 
 # === ОНОВЛЕННЯ СВОГО ПРОФІЛЮ (ТЕКСТОВІ ДАНІ) ===
 @router.put("/me", response_model=schemas.DesignerProfile)
-def update_my_profile(
+@query_budget(4)
+async def update_my_profile(
     profile_data: schemas.DesignerProfileUpdate, # <--- Використовуємо нову схему Update
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
@@ -47,7 +49,7 @@ def update_my_profile(
         )
         
     # Викликаємо оновлену функцію crud
-    profile = crud.update_designer_profile(db, user_id=current_user.id, profile_data=profile_data)
+    profile = await crud_async.update_designer_profile(db, user_id=current_user.id, profile_data=profile_data)
     
     if not profile:
         raise HTTPException(status_code=404, detail="Профіль не знайдено")
@@ -56,66 +58,62 @@ def update_my_profile(
 
 # === ЗАВАНТАЖЕННЯ ШАПКИ ПРОФІЛЮ (КАРТИНКА) ===
 @router.post("/me/header-image", response_model=schemas.DesignerProfile)
+@query_budget(8)
 async def upload_header_image(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
     Завантажує зображення для шапки профілю.
-    Приймає файл, зберігає його в static/images та оновлює URL в базі.
+    Приймає файл, зберігає його у сховищі медіа (storage.py) та оновлює URL в базі
+    (попередня шапка втрачає посилання і згодом прибирається, див. media_store.py).
     """
     if current_user.role != models.UserRole.designer:
         raise HTTPException(status_code=403, detail="Тільки дизайнери можуть завантажувати шапку профілю.")
 
-    # 1. Перевірка типу файлу (проста)
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Файл має бути зображенням (jpeg, png, etc.)")
+    # 1-4. Потокове збереження з перевіркою типу (за вмістом файлу) і розміру,
+    # без блокування event loop (див. upload_stream.py).
+    # Ім'я - хеш вмісту: нова картинка - новий URL, тож кеш браузера не заважає
+    stored = await save_upload(file, db)
 
-    # 2. Підготовка директорії
-    upload_dir = "static/images"
-    os.makedirs(upload_dir, exist_ok=True) # Створить папку, якщо її немає
-
-    # 3. Генерація унікального імені файлу
-    # Використовуємо UUID, щоб уникнути конфліктів імен і проблем з кешуванням
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"header_{current_user.id}_{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-
-    # 4. Збереження файлу
-    try:
-        with open(file_path, "wb+") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Помилка при збереженні файлу: {str(e)}")
-
-    # 5. Формування URL для доступу з браузера
-    # Зверніть увагу: ми використовуємо прямий слеш /, навіть на Windows, бо це URL
-    image_url = f"/static/images/{unique_filename}"
+    # 5. URL для доступу з браузера
+    image_url = stored.url
 
     # 6. Оновлення запису в БД
-    updated_profile = crud.update_designer_header_image(db, user_id=current_user.id, image_path=image_url)
+    updated_profile = await crud_async.update_designer_header_image(db, user_id=current_user.id, image_path=image_url)
+    # 7. Похідні розміри - у фоні; профіль оновиться, коли вони будуть готові
+    image_pipeline.submit(image_url)
     
     return updated_profile
 
 # === ОТРИМАННЯ ПУБЛІЧНОГО ПРОФІЛЮ ===
 @router.get("/{user_id}", response_model=schemas.DesignerProfile)
-def get_public_profile(user_id: int, db: Session = Depends(get_db)):
+@query_budget(1)
+async def get_public_profile(user_id: int, request: Request, db: DbSession = Depends(get_db)):
     """
     Отримує публічний профіль дизайнера за його ID користувача.
     """
-    profile = crud.get_designer_profile(db, user_id=user_id)
+    cache_key = response_cache.key_for(request)
+    cached = await response_cache.lookup(request, cache_key)
+    if cached is not None:
+        return cached
+
+    profile = await crud_async.get_designer_profile(db, user_id=user_id)
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Профіль дизайнера не знайдено."
         )
-    return profile
+    return await response_cache.store(
+        request, cache_key, schemas.DesignerProfile, profile, tags=[designer_tag(user_id)]
+    )
 
 @router.post("/me/avatar", response_model=schemas.DesignerProfile)
+@query_budget(8)
 async def upload_avatar(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
@@ -124,26 +122,11 @@ async def upload_avatar(
     if current_user.role != models.UserRole.designer:
         raise HTTPException(status_code=403, detail="Тільки дизайнери можуть завантажувати аватар.")
 
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Файл має бути зображенням.")
-
-    upload_dir = "static/images"
-    os.makedirs(upload_dir, exist_ok=True)
-
-    # Змінюємо префікс файлу на avatar_
-    file_extension = file.filename.split(".")[-1]
-    unique_filename = f"avatar_{current_user.id}_{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(upload_dir, unique_filename)
-
-    try:
-        with open(file_path, "wb+") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Помилка: {str(e)}")
-
-    image_url = f"/static/images/{unique_filename}"
+    stored = await save_upload(file, db)
+    image_url = stored.url
 
     # Викликаємо функцію для аватарки
-    updated_profile = crud.update_designer_avatar(db, user_id=current_user.id, image_path=image_url)
+    updated_profile = await crud_async.update_designer_avatar(db, user_id=current_user.id, image_path=image_url)
+    image_pipeline.submit(image_url)
     
     return updated_profile
\ No newline at end of file
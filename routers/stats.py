@@ -0,0 +1,66 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+import cache
+import database
+import metrics
+import metrics_export
+from image_pipeline import image_pipeline
+from media_store import media_gc
+from view_buffer import view_buffer
+
+router = APIRouter()
+# Без префікса: Prometheus за замовчуванням читає /metrics
+exposition_router = APIRouter()
+
+# === Внутрішня статистика процесу ===
+
+@router.get("/caches")
+def read_cache_stats():
+    """
+    Розмір, hit/miss та інвалідації всіх кешів цього процесу
+    (кожен воркер uvicorn має власні).
+    """
+    return cache.all_stats()
+
+
+@router.get("/db-pool")
+def read_db_pool_stats():
+    """
+    Стан пулу з'єднань: розмір, видані/вільні з'єднання, overflow,
+    середнє очікування при checkout і кількість таймаутів.
+    """
+    return database.pool_stats()
+
+
+@router.get("/view-buffer")
+def read_view_buffer_stats():
+    """Стан буфера переглядів: скільки переглядів чекає запису в БД."""
+    return view_buffer.stats()
+
+
+@router.get("/image-pipeline")
+def read_image_pipeline_stats():
+    """Конвеєр похідних зображень: формати, процеси і задачі в роботі."""
+    return image_pipeline.stats()
+
+
+@router.get("/media-gc")
+def read_media_gc_stats():
+    """Збирач сміття сховища зображень: інтервал, останній прохід і скільки файлів видалено."""
+    return media_gc.stats()
+
+
+@router.get("/metrics")
+def read_metrics():
+    """Поточні значення метрик процесу (лічильники, gauge, гістограми)."""
+    return metrics.snapshot()
+
+
+@exposition_router.get("/metrics", include_in_schema=False)
+def read_prometheus_metrics():
+    """
+    Метрики у текстовому форматі Prometheus. З METRICS_MULTIPROC_DIR -
+    підсумок усіх воркерів, інакше лише процесу, що відповів.
+    """
+    return Response(metrics_export.render(), media_type=metrics.CONTENT_TYPE)
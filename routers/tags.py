@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-import crud, models, schemas, security
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+import crud_async, models, schemas, security
 from typing import List
-from database import get_db
+from database import DbSession, get_db
+from http_cache import cached_response
+import serialization
+import taxonomy
+from sql_profiler import query_budget
 
 router = APIRouter(
     # prefix="/tags",
@@ -17,21 +20,38 @@ router = APIRouter(
 #         db.close()
 
 @router.get("/", response_model=List[schemas.Tag])
-def read_tags(
+@query_budget(1)
+async def read_tags(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_db)
 ):
     """
     Отримати список всіх тегів.
+    Довідник віддається з кешу процесу (taxonomy.py); з If-None-Match
+    і незмінним ETag відповідь - 304 без тіла.
     """
-    tags = crud.get_tags(db, skip=skip, limit=limit)
-    return tags
+    items = await taxonomy.tags.get_async(db)
+    return cached_response(request, taxonomy.page_body(items, skip, limit))
+
+@router.get("/popular", response_model=List[schemas.TagPopularity])
+@query_budget(1)
+async def read_popular_tags(
+    limit: int = Query(20, ge=1, le=100),
+    db: DbSession = Depends(get_db)
+):
+    """
+    Найпопулярніші теги (за кількістю робіт).
+    Лічильник підтримується при збереженні робіт, тож запит - це читання індексу.
+    """
+    tags = await crud_async.get_popular_tags(db, limit=limit)
+    return serialization.respond(List[schemas.TagPopularity], tags)
 
 @router.post("/", response_model=schemas.Tag, status_code=status.HTTP_201_CREATED)
-def create_tag(
+async def create_tag(
     tag: schemas.TagCreate,
-    db: Session = Depends(get_db)
+    db: DbSession = Depends(get_db)
     # (Опційно) Можна захистити цей ендпоінт
     # current_user: models.User = Depends(security.get_current_user)
 ):
@@ -40,8 +60,8 @@ def create_tag(
     (Примітка: в `crud.create_work` теги створюються автоматично,
     але цей ендпоінт може бути корисним для адмін-панелі)
     """
-    db_tag = crud.get_tag_by_name(db, name=tag.name)
+    db_tag = await crud_async.get_tag_by_name(db, name=tag.name)
     if db_tag:
         raise HTTPException(status_code=400, detail="Tag already exists")
-    return crud.create_tag(db=db, tag=tag)
+    return await crud_async.create_tag(db=db, tag=tag)
 
@@ -1,65 +1,138 @@
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, status
+from fastapi import APIRouter, File, HTTPException, UploadFile, Depends, status
+from starlette.concurrency import run_in_threadpool
+import crud_async
+import images
+import media_store
 import models
+import schemas
 import security
-import shutil
-import os
-import uuid # Використовуємо uuid для унікальних імен
+from config import settings
+from database import DbSession, get_db
+from image_pipeline import image_pipeline
+from storage import sha256_checksum, storage
+from sql_profiler import query_budget
+from upload_stream import (
+    ALLOWED_CONTENT_TYPES, CHUNK_SIZE, EXTENSIONS, save_upload, sniff_image_type, too_large, unsupported_type,
+)
 
 router = APIRouter(
     tags=["Uploads"]
 )
 
-# Папка для збереження завантажених зображень
-STATIC_DIR = "static"
-IMAGES_DIR = os.path.join(STATIC_DIR, "images")
-
-# Переконуємося, що директорії існують при старті
-os.makedirs(IMAGES_DIR, exist_ok=True)
-
-ALLOWED_CONTENT_TYPES = ["image/jpeg", "image/png", "image/webp"]
-
 @router.post("/upload/image/")
+@query_budget(3)
 async def upload_image(
     file: UploadFile = File(...),
+    db: DbSession = Depends(get_db),
     # (Опційно) Можна вимагати автентифікацію для завантаження
     # current_user: models.User = Depends(security.get_current_user)
 ):
     """
-    Приймає файл зображення, перевіряє його тип, зберігає на сервері
-    та повертає публічний URL.
+    Приймає файл зображення, перевіряє його тип (за вмістом) і розмір,
+    зберігає на сервері та повертає публічний URL.
     """
+    # 1-3. Потокове збереження: тип за сигнатурою файлу, ліміт розміру,
+    # запис частинами без блокування event loop (див. upload_stream.py).
+    # Ім'я файлу - SHA-256 вмісту (повторне завантаження не займає місця)
+    # з розширенням за справжнім типом, а не від клієнта
+    stored = await save_upload(file, db)
+
+    # 4. Повернення публічного URL
+    # URL видає сховище (storage.py): /static/... для локального диска
+    # (app.mount у main.py) або адреса бакета/CDN для S3
+    public_url = stored.url
+
+    # 5. Мініатюри та адаптивні розміри генеруються у фоні (image_pipeline.py)
+    image_pipeline.submit(public_url)
     
-    # 1. Перевірка типу файлу
-    if file.content_type not in ALLOWED_CONTENT_TYPES:
+    return {"file_url": public_url}
+
+# === Пряме завантаження в сховище (presigned URL) ===
+# Байти йдуть від клієнта прямо в бакет, повз воркери API:
+#   1. POST /upload/image/presign {sha256, content_type, size} -> file_url і
+#      підписаний PUT (SigV4: тип, розмір і SHA-256 вмісту підписані - інші
+#      байти сховище не прийме); upload = null, якщо такий вміст уже є;
+#   2. клієнт виконує PUT;
+#   3. POST /upload/image/confirm {file_url} - перевірка SHA-256, порахованого
+#      сховищем, сигнатури файлу і запуск генерації похідних. Далі file_url використовується як зазвичай.
+# Блоб реєструється вже на кроці 1: незавершене завантаження прибере збирач сміття.
+
+@router.post("/upload/image/presign", response_model=schemas.PresignedUpload)
+async def presign_image_upload(
+    request: schemas.PresignedUploadRequest,
+    db: DbSession = Depends(get_db),
+):
+    """
+    Видає підписане посилання на пряме завантаження зображення в сховище.
+    501 - поточне сховище (локальний диск) так не вміє, використовуйте /upload/image/.
+    """
+    if not storage.supports_presigned_upload:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Непідтримуваний тип файлу: {file.content_type}. Дозволені: {', '.join(ALLOWED_CONTENT_TYPES)}"
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Пряме завантаження недоступне для цього сховища. Використовуйте /upload/image/.",
         )
-        
-    # 2. Генерація унікального імені файлу
-    # Використовуємо розширення оригінального файлу
-    file_extension = os.path.splitext(file.filename)[1]
-    # Генеруємо унікальне ім'я, щоб уникнути конфліктів
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    
-    # 3. Збереження файлу
-    file_path = os.path.join(IMAGES_DIR, unique_filename)
-    
-    try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-    except Exception as e:
-        # Обробка помилок при збереженні файлу
+    if request.content_type not in ALLOWED_CONTENT_TYPES:
+        raise unsupported_type()
+    if request.size > settings.UPLOAD_MAX_BYTES:
+        raise too_large(settings.UPLOAD_MAX_BYTES)
+
+    key = media_store.blob_key(request.sha256, EXTENSIONS[request.content_type])
+    url = media_store.blob_url(key)
+    created = await crud_async.register_media_blob(
+        db, sha256=request.sha256, url=url, content_type=request.content_type, size=request.size
+    )
+    # Рядок блоба ще не означає, що байти дійшли - дивимось у сховище
+    if not created and await run_in_threadpool(storage.exists, key):
+        media_store.MEDIA_UPLOADS.labels("duplicate").inc()
+        return schemas.PresignedUpload(file_url=url)
+
+    upload = await run_in_threadpool(
+        storage.presign_upload, key, request.content_type, request.size, request.sha256
+    )
+    return schemas.PresignedUpload(file_url=url, upload=upload)
+
+@router.post("/upload/image/confirm")
+async def confirm_image_upload(
+    request: schemas.UploadConfirm,
+    db: DbSession = Depends(get_db),
+):
+    """
+    Підтверджує пряме завантаження: файл має бути в сховищі, мати SHA-256
+    з імені (за контрольною сумою сховища) і бути зображенням заявленого
+    типу (інакше він видаляється, 400).
+    """
+    if not storage.supports_presigned_upload:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Не вдалося зберегти файл: {e}"
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Пряме завантаження недоступне для цього сховища. Використовуйте /upload/image/.",
         )
-    finally:
-        file.file.close()
+    key = storage.key_for_url(request.file_url)
+    blob = await crud_async.get_media_blob(db, request.file_url) if images.is_original(key) else None
+    if blob is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Завантаження не знайдено.")
+    size = await run_in_threadpool(storage.size, key)
+    if size is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл ще не завантажено у сховище.")
 
-    # 4. Повернення публічного URL
-    # Цей URL буде працювати завдяки 'app.mount("/static", ...)' у main.py
-    # Важливо: URL-адреси використовують прямі слеші '/'
-    public_url = f"/static/images/{unique_filename}"
-    
-    return {"file_url": public_url}
\ No newline at end of file
+    # Ключ - хеш вмісту, на ньому тримається дедуплікація: приймаємо лише
+    # байти, SHA-256 яких (за підрахунком самого сховища) збігається з ключем
+    checksum = await run_in_threadpool(storage.checksum_sha256, key)
+    head = await run_in_threadpool(storage.read_head, key, CHUNK_SIZE)
+    kind = sniff_image_type(head)
+    if (
+        checksum != sha256_checksum(blob.sha256)
+        or size != blob.size
+        or kind is None
+        or kind[0] != blob.content_type
+    ):
+        # Під цим ключем мають бути саме ці байти - чужі видаляємо
+        await run_in_threadpool(storage.delete, key)
+        raise unsupported_type()
+
+    # Відсуваємо збирач сміття: файл от-от отримає посилання
+    await crud_async.register_media_blob(
+        db, sha256=blob.sha256, url=blob.url, content_type=blob.content_type, size=blob.size
+    )
+    media_store.MEDIA_UPLOADS.labels("new").inc()
+    image_pipeline.submit(request.file_url)
+    return {"file_url": request.file_url}
@@ -1,56 +1,72 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-import crud, models, schemas, security
+import crud_async, models, schemas, security
 from typing import List
-from database import get_db
+from database import DbSession, get_db
+import serialization
+from sql_profiler import query_budget
 
 router = APIRouter()
 
 # === Ендпоінт для створення (реєстрації) користувача ===
 @router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+@query_budget(4)
+async def create_user(user: schemas.UserCreate, db: DbSession = Depends(get_db)):
     """
     Створює нового користувача в системі.
     """
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Email already registered"
         )
     
+    # bcrypt - в окремому пулі процесів
+    hashed_password = await security.password_hasher.hash(user.password)
     # Pydantic вже провалідував, що 'role' є одним із значень Enum
-    return crud.create_user(db=db, user=user)
+    return await crud_async.create_user(db, user=user, hashed_password=hashed_password)
 
 
 # === Ендпоінт для отримання списку користувачів ===
 @router.get("/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_users(skip: int = 0, limit: int = 100, db: DbSession = Depends(get_db)):
     """
     Отримує список користувачів.
     (В майбутньому цей ендпоінт варто захистити,
     щоб його могли бачити лише адміністратори)
     """
-    users = crud.get_users(db, skip=skip, limit=limit)
-    return users
+    users = await crud_async.get_users(db, skip=skip, limit=limit)
+    return serialization.respond(List[schemas.User], users)
 
 
 # === Ендпоінт для отримання інформації про себе ===
 @router.get("/me", response_model=schemas.User)
-def read_users_me(current_user: models.User = Depends(security.get_current_user)):
+async def read_users_me(
+    db: DbSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_user)
+):
     """
     Отримує профіль поточного автентифікованого користувача.
     """
-    return current_user
+    if isinstance(current_user, schemas.User):
+        return current_user
+    # Користувач відновлений лише з claims токена - дочитуємо повні дані
+    db_user = await crud_async.get_user(db, user_id=current_user.id)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail="User not found"
+        )
+    return db_user
 
 
 # === Ендпоінт для отримання користувача за ID ===
 @router.get("/{user_id}", response_model=schemas.User)
-def read_user(user_id: int, db: Session = Depends(get_db)):
+async def read_user(user_id: int, db: DbSession = Depends(get_db)):
     """
     Отримує профіль користувача за його ID.
     """
-    db_user = crud.get_user(db, user_id=user_id)
+    db_user = await crud_async.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -60,9 +76,9 @@ def read_user(user_id: int, db: Session = Depends(get_db)):
 
 # === НОВИЙ ЕНДПОІНТ ДЛЯ ВИДАЛЕННЯ ===
 @router.delete("/{user_id}", response_model=schemas.User)
-def delete_user(
+async def delete_user(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
@@ -79,12 +95,39 @@ def delete_user(
             detail="Not authorized to delete this user"
         )
 
-    db_user = crud.get_user(db, user_id=user_id)
+    db_user = await crud_async.get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="User not found"
         )
     
-    deleted_user = crud.delete_user(db, user_id=user_id)
-    return deleted_user
\ No newline at end of file
+    deleted_user = await crud_async.delete_user(db, user_id=user_id)
+    return deleted_user
+
+
+# === Ендпоінт для зміни ролі (лише адміністратор) ===
+@router.patch("/{user_id}/role", response_model=schemas.User)
+async def update_user_role(
+    user_id: int,
+    role_update: schemas.UserRoleUpdate,
+    db: DbSession = Depends(get_db),
+    current_user: models.User = Depends(security.get_current_user)
+):
+    """
+    Змінює роль користувача.
+    Доступно лише адміністратору.
+    """
+    if current_user.role.value != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to change roles"
+        )
+
+    db_user = await crud_async.update_user_role(db, user_id=user_id, role=role_update.role)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail="User not found"
+        )
+    return db_user
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-import crud, models, schemas, security
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+import crud_async, models, schemas, security
 from typing import List, Optional
-from database import get_db
+from database import DbSession, get_db
+from pagination import NEXT_CURSOR_HEADER, Cursor, cursor_param, set_next_cursor
+from response_cache import ALL_WORKS, designer_tag, response_cache, work_tag
+import serialization
+from view_buffer import view_buffer
+from sql_profiler import query_budget
 
 router = APIRouter()
 
 # === Ендпоінт для СТВОРЕННЯ роботи ===
 @router.post("/", response_model=schemas.Work, status_code=status.HTTP_201_CREATED)
-def create_work(
+@query_budget(13)
+async def create_work(
     work: schemas.WorkCreate, 
-    db: Session = Depends(get_db), 
+    db: DbSession = Depends(get_db), 
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
@@ -19,15 +24,19 @@ def create_work(
     Автор роботи автоматично прив'язується до поточного користувача.
     """
     # Ми передаємо ID поточного користувача в CRUD функцію
-    return crud.create_work(db=db, work=work, designer_id=current_user.id)
+    return await crud_async.create_work(db=db, work=work, designer_id=current_user.id)
 
 
 # === Ендпоінт для ОТРИМАННЯ списку робіт (З ФІЛЬТРАЦІЄЮ) ===
-@router.get("/", response_model=List[schemas.Work])
-def read_works(
+@router.get("/", response_model=List[schemas.WorkListItem])
+@query_budget(4)
+async def read_works(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 20, 
-    db: Session = Depends(get_db),
+    cursor: Optional[Cursor] = Depends(cursor_param),
+    db: DbSession = Depends(get_db),
     # === НОВИЙ ПАРАМЕТР ===
     q: Optional[str] = Query(None, description="Рядок пошуку по заголовку або опису роботи."), 
     # =====================
@@ -36,7 +45,14 @@ def read_works(
 ):
     """
     Отримує список робіт з пагінацією, фільтрацією та пошуком.
+    Курсор наступної сторінки повертається в заголовку `X-Next-Cursor`.
+    Відповідь кешується (response_cache.py) до зміни будь-якої роботи.
     """
+    cache_key = response_cache.key_for(request, list_params=("categories", "tags"))
+    cached = await response_cache.lookup(request, cache_key)
+    if cached is not None:
+        return cached
+
     # ... (Конвертація categories та tags залишається без змін) ...
     categories_ids_list: Optional[List[int]] = None
     if categories:
@@ -54,30 +70,62 @@ def read_works(
         tags_names_list = [name.strip() for name in tags.split(',')]
 
     # Викликаємо оновлену CRUD-функцію
-    works = crud.get_works(
+    works = await crud_async.get_works(
         db, 
         skip=skip, 
         limit=limit, 
         categories_ids=categories_ids_list, 
         tags_names=tags_names_list,
-        search_query=q # 💡 ПЕРЕДАЄМО НОВИЙ ПАРАМЕТР
+        search_query=q, # 💡 ПЕРЕДАЄМО НОВИЙ ПАРАМЕТР
+        cursor=cursor,
+        schema=schemas.WorkListItem
+    )
+    set_next_cursor(response, works, "upload_date", limit)
+    return await response_cache.store(
+        request, cache_key, List[schemas.WorkListItem], works, tags=[ALL_WORKS],
+        headers={NEXT_CURSOR_HEADER: response.headers.get(NEXT_CURSOR_HEADER)}
     )
-    return works
+
+
+# === Ендпоінт: Повнотекстовий пошук робіт (публічний) ===
+@router.get("/search", response_model=List[schemas.WorkSearchResult])
+@query_budget(4)
+async def search_works(
+    q: str = Query(..., min_length=1, description="Пошуковий запит (слова або їх частини)."),
+    skip: int = 0,
+    limit: int = 20,
+    db: DbSession = Depends(get_db)
+):
+    """
+    Шукає роботи за назвою та описом.
+    Результати відсортовані за релевантністю, збіги підсвічені.
+    """
+    results = await crud_async.search_works(db, query=q, skip=skip, limit=limit, schema=schemas.WorkListItem)
+    return serialization.respond(List[schemas.WorkSearchResult], results)
 
 
 # === Ендпоінт: Отримання робіт за ID дизайнера (публічний) ===
-@router.get("/by-designer/{designer_id}", response_model=List[schemas.Work])
-def read_works_by_designer(
+@router.get("/by-designer/{designer_id}", response_model=List[schemas.WorkListItem])
+@query_budget(4)
+async def read_works_by_designer(
     designer_id: int,
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 20, 
-    db: Session = Depends(get_db)
+    cursor: Optional[Cursor] = Depends(cursor_param),
+    db: DbSession = Depends(get_db)
 ):
     """
     Отримує список робіт конкретного дизайнера.
     Це публічний ендпоінт (для профілю дизайнера).
     """
-    designer = crud.get_user(db, user_id=designer_id)
+    cache_key = response_cache.key_for(request)
+    cached = await response_cache.lookup(request, cache_key)
+    if cached is not None:
+        return cached
+
+    designer = await crud_async.get_user(db, user_id=designer_id)
     if not designer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -85,31 +133,45 @@ def read_works_by_designer(
         )
         
     # Використовуємо ту саму get_works, але передаємо designer_id
-    works = crud.get_works_by_designer(db, designer_id=designer_id, skip=skip, limit=limit)
-    return works
+    works = await crud_async.get_works_by_designer(
+        db, designer_id=designer_id, skip=skip, limit=limit, cursor=cursor,
+        schema=schemas.WorkListItem
+    )
+    set_next_cursor(response, works, "upload_date", limit)
+    return await response_cache.store(
+        request, cache_key, List[schemas.WorkListItem], works, tags=[ALL_WORKS, designer_tag(designer_id)],
+        headers={NEXT_CURSOR_HEADER: response.headers.get(NEXT_CURSOR_HEADER)}
+    )
 
 
 # === Ендпоінт для ОТРИМАННЯ однієї роботи (публічний) ===
 @router.get("/{work_id}", response_model=schemas.Work)
-def read_work(work_id: int, db: Session = Depends(get_db)):
+@query_budget(3)
+async def read_work(work_id: int, request: Request, db: DbSession = Depends(get_db)):
     """
     Отримує одну конкретну роботу за її ID.
     Це публічний ендпоінт.
     """
-    db_work = crud.get_work(db, work_id=work_id)
+    cache_key = response_cache.key_for(request)
+    cached = await response_cache.lookup(request, cache_key)
+    if cached is not None:
+        return cached
+
+    db_work = await crud_async.get_work(db, work_id=work_id, schema=schemas.Work)
     if db_work is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Роботу не знайдено."
         )
-    return db_work
+    return await response_cache.store(request, cache_key, schemas.Work, db_work, tags=[work_tag(work_id)])
 
 
 # === Ендпоінт для ВИДАЛЕННЯ роботи (захищений) ===
 @router.delete("/{work_id}", response_model=schemas.Work)
-def delete_work(
+@query_budget(20)
+async def delete_work(
     work_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
@@ -118,7 +180,7 @@ def delete_work(
     1. Ви адміністратор (`role == 'admin'`).
     2. Ви автор цієї роботи.
     """
-    db_work = crud.get_work(db, work_id=work_id)
+    db_work = await crud_async.get_work(db, work_id=work_id)
     
     if db_work is None:
         raise HTTPException(
@@ -136,23 +198,25 @@ def delete_work(
             detail="Ви не маєте прав для видалення цієї роботи."
         )
         
-    deleted_work = crud.delete_work(db, work_id=work_id)
+    deleted_work = await crud_async.delete_work(db, work_id=work_id)
     return deleted_work
 
 
 @router.post("/{work_id}/view", status_code=status.HTTP_200_OK)
-def view_work(
+@query_budget(5)  # синхронний запис, коли буфер вимкнено або повний
+async def view_work(
     work_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
     Зареєструвати перегляд роботи.
     Має викликатися фронтендом, коли користувач відкриває сторінку роботи.
     Зараховує перегляд лише 1 раз для кожного користувача.
+    Перегляд записується в БД пачкою у фоні (див. view_buffer.py).
     """
     # Перевіряємо, чи існує робота
-    db_work = crud.get_work(db, work_id=work_id)
+    db_work = await crud_async.get_work(db, work_id=work_id, schema=None)
     if not db_work:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -163,8 +227,7 @@ def view_work(
     if db_work.designer_id == current_user.id:
         return {"message": "Author view ignored"}
 
-    # Викликаємо нашу нову CRUD-функцію
-    is_new_view = crud.register_work_view(db, work_id=work_id, user_id=current_user.id)
+    is_new_view = await view_buffer.register(work_id=work_id, user_id=current_user.id)
     
     if is_new_view:
         return {"message": "View counted"}
@@ -173,10 +236,11 @@ def view_work(
     
 # === Ендпоінт для ОНОВЛЕННЯ роботи ===
 @router.put("/{work_id}", response_model=schemas.Work)
-def update_work(
+@query_budget(12)
+async def update_work(
     work_id: int,
     work_update: schemas.WorkUpdate, # Тобі потрібна ця схема (див. пункт 2)
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_user: models.User = Depends(security.get_current_user)
 ):
     """
@@ -185,8 +249,8 @@ def update_work(
     1. Ви адміністратор (`role == 'admin'`).
     2. Ви автор цієї роботи.
     """
-    # 1. Шукаємо роботу в БД
-    db_work = crud.get_work(db, work_id=work_id)
+    # 1. Шукаємо роботу в БД (зв'язки підвантажить update_work для відповіді)
+    db_work = await crud_async.get_work(db, work_id=work_id, schema=None)
     if db_work is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -204,5 +268,5 @@ def update_work(
         )
 
     # 3. Викликаємо CRUD функцію для оновлення
-    updated_work = crud.update_work(db, db_work=db_work, work_update=work_update)
+    updated_work = await crud_async.update_work(db, db_work=db_work, work_update=work_update)
     return updated_work
\ No newline at end of file
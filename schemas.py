@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import AliasPath, BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 from models import UserRole # Імпортуємо Enum
 
@@ -27,6 +27,25 @@ class CategoryBase(BaseModel):
     class Config:
         from_attributes = True
 
+# === Похідні зображення (див. images.py) ===
+
+class ImageVariant(BaseModel):
+    width: int
+    height: int
+    url: str # JPEG/PNG - підтримується всіма клієнтами
+    webp: Optional[str] = None
+    avif: Optional[str] = None
+
+class ImageVariants(BaseModel):
+    thumb: Optional[ImageVariant] = None
+    card: Optional[ImageVariant] = None
+    full: Optional[ImageVariant] = None
+
+def image_variant(column: str, context: str):
+    # Поле з одним розміром із маніфесту (None, поки похідні не готові -
+    # тоді клієнт показує оригінал з *_url)
+    return Field(None, validation_alias=AliasPath(column, context))
+
 # === Схеми Користувача (User) ===
 
 class UserCreate(BaseModel):
@@ -45,6 +64,15 @@ class User(UserBase):
     role: UserRole
     registration_date: datetime
 
+class UserRoleUpdate(BaseModel):
+    role: UserRole
+
+class Principal(BaseModel):
+    # Автентифікований користувач, відновлений з claims токена (без БД)
+    id: int
+    email: str
+    role: UserRole
+
 # === Схеми Категорій (Category) ===
 
 class CategoryCreate(BaseModel):
@@ -61,6 +89,9 @@ class TagCreate(BaseModel):
 class Tag(TagBase):
     pass # Наразі не має додаткових полів
 
+class TagPopularity(TagBase):
+    work_count: int
+
 # === Схеми Робіт (Work) ===
 
 class WorkBase(BaseModel):
@@ -83,10 +114,25 @@ class Work(WorkBase):
     designer: UserBase
     categories: List[CategoryBase] = []
     tags: List[TagBase] = []
+
+    # Сторінка роботи: великий розмір + усі розміри для srcset
+    image: Optional[ImageVariant] = image_variant("image_variants", "full")
+    image_variants: Optional[ImageVariants] = None
     
     class Config:
         from_attributes = True
 
+class WorkListItem(Work):
+    # Стрічка та списки: лише розмір картки, без повного маніфесту
+    image: Optional[ImageVariant] = image_variant("image_variants", "card")
+    image_variants: Optional[ImageVariants] = Field(None, exclude=True)
+
+class WorkSearchResult(BaseModel):
+    # Результат повнотекстового пошуку
+    work: WorkListItem
+    rank: float # Релевантність (більше - краще)
+    highlights: Dict[str, str] = {} # title/description з <mark>...</mark> навколо збігів
+
 class WorkUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -117,6 +163,9 @@ class DesignerProfile(DesignerProfileBase):
     rating: float # Використовуємо float, а не Decimal
     views_count: int
     work_amount: int
+    # Аватарка - мініатюра, шапка - великий розмір
+    avatar: Optional[ImageVariant] = image_variant("avatar_variants", "thumb")
+    header_image: Optional[ImageVariant] = image_variant("header_image_variants", "full")
 
     class Config:
         from_attributes = True
@@ -147,6 +196,27 @@ class Comment(CommentBase):
     class Config:
         from_attributes = True
 
+# === Схеми для Завантажень (presigned, див. routers/uploads.py) ===
+
+class PresignedUploadRequest(BaseModel):
+    sha256: str = Field(pattern=r"^[0-9a-f]{64}$") # SHA-256 вмісту (hex, малими літерами)
+    content_type: str
+    size: int = Field(gt=0)
+
+class PresignedUploadTarget(BaseModel):
+    method: str
+    url: str
+    headers: Dict[str, str] # клієнт має надіслати їх без змін
+    expires_in: int
+
+class PresignedUpload(BaseModel):
+    file_url: str
+    # None - такий вміст уже є у сховищі, завантажувати нічого не треба
+    upload: Optional[PresignedUploadTarget] = None
+
+class UploadConfirm(BaseModel):
+    file_url: str
+
 # === Схеми для Токенів (Token) ===
 
 class Token(BaseModel):
@@ -0,0 +1,329 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import false, func, literal_column, or_, and_, select
+from sqlalchemy.orm import Session
+
+import models
+from config import settings
+
+# === Повнотекстовий пошук по роботах ===
+# Два бекенди з однаковим інтерфейсом:
+#   - PostgresSearchBackend: генерована колонка tsvector + GIN-індекс,
+#     trigram GIN (pg_trgm) для частин слів, ts_rank_cd, ts_headline;
+#   - InMemorySearchBackend: інвертований індекс у процесі
+#     (SQLite/dev/тести), з тією ж семантикою запиту.
+#
+# Семантика запиту однакова для обох: запит розбивається на слова,
+# кожне слово має зустрітися в назві або описі (AND).
+# Слово з 3+ символів може бути частиною іншого слова ("post" -> "poster"),
+# коротше - лише початком слова ("ui" -> "ui-kit", але не "build").
+
+# Конфігурація to_tsvector. 'simple' - без стемінгу, бо контент
+# змішаний (українська/англійська), а для української вбудованого словника немає.
+TS_CONFIG = "simple"
+
+# Мінімальна довжина слова для пошуку підрядком (триграми)
+MIN_SUBSTRING_LEN = 3
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+# Ваги полів при ранжуванні (як setweight 'A'/'B' у Postgres)
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Колонка не описана в models.Work, бо існує лише в Postgres
+# (див. migrations/0002_work_full_text_search.sql)
+SEARCH_VECTOR = literal_column('"Work".search_vector')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Розбиває текст на слова у нижньому регістрі."""
+    if not text:
+        return []
+    return [token.lower() for token in _WORD_RE.findall(text)]
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SearchBackend:
+    """Спільний інтерфейс пошукових бекендів."""
+
+    name = "base"
+
+    def match(self, db: Session, query: str):
+        """SQL-умова WHERE для models.Work (для стрічки з фільтрами)."""
+        raise NotImplementedError
+
+    def ranked_ids(self, db: Session, query: str, skip: int = 0, limit: int = 20) -> List[Tuple[int, float]]:
+        """Сторінка (work_id, релевантність), від найрелевантніших."""
+        raise NotImplementedError
+
+    def highlight(self, db: Session, query: str, works: Iterable[models.Work]) -> Dict[int, Dict[str, str]]:
+        """Фрагменти назви/опису з позначеними збігами, для кожної роботи."""
+        raise NotImplementedError
+
+    def index_work(self, work: models.Work) -> None:
+        """Оновити індекс після створення/редагування роботи."""
+
+    def remove_work(self, work_id: int) -> None:
+        """Прибрати роботу з індексу після видалення."""
+
+
+# === Postgres ===
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Індекс підтримує сам Postgres (GENERATED ALWAYS ... STORED),
+    тому index_work/remove_work нічого не роблять.
+    """
+
+    name = "postgres"
+
+    def _token_clause(self, token: str):
+        prefix_query = func.to_tsquery(TS_CONFIG, f"{token}:*")
+        clause = SEARCH_VECTOR.op("@@")(prefix_query)
+        if len(token) >= MIN_SUBSTRING_LEN:
+            # ILIKE '%...%' обслуговується trigram GIN-індексами
+            pattern = f"%{_escape_like(token)}%"
+            clause = or_(
+                clause,
+                models.Work.title.ilike(pattern, escape="\\"),
+                models.Work.description.ilike(pattern, escape="\\"),
+            )
+        return clause
+
+    def _rank_query(self, tokens: List[str]):
+        return func.to_tsquery(TS_CONFIG, " | ".join(f"{token}:*" for token in tokens))
+
+    def match(self, db: Session, query: str):
+        tokens = tokenize(query)
+        if not tokens:
+            return false()
+        return and_(*(self._token_clause(token) for token in tokens))
+
+    def ranked_ids(self, db: Session, query: str, skip: int = 0, limit: int = 20) -> List[Tuple[int, float]]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        rank = func.ts_rank_cd(SEARCH_VECTOR, self._rank_query(tokens)).label("rank")
+        rows = db.execute(
+            select(models.Work.id, rank)
+            .where(self.match(db, query))
+            .order_by(rank.desc(), models.Work.upload_date.desc(), models.Work.id.desc())
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        return [(row.id, float(row.rank)) for row in rows]
+
+    def highlight(self, db: Session, query: str, works: Iterable[models.Work]) -> Dict[int, Dict[str, str]]:
+        tokens = tokenize(query)
+        work_ids = [work.id for work in works]
+        if not tokens or not work_ids:
+            return {}
+        ts_query = self._rank_query(tokens)
+        options = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}"
+        rows = db.execute(
+            select(
+                models.Work.id,
+                func.ts_headline(TS_CONFIG, models.Work.title, ts_query, options + ", HighlightAll=true").label("title"),
+                func.ts_headline(
+                    TS_CONFIG, func.coalesce(models.Work.description, ""), ts_query,
+                    options + ", MaxFragments=2"
+                ).label("description"),
+            ).where(models.Work.id.in_(work_ids))
+        ).all()
+        return {row.id: {"title": row.title, "description": row.description} for row in rows}
+
+
+# === Інвертований індекс у процесі ===
+
+class InMemorySearchBackend(SearchBackend):
+    """
+    Інвертований індекс слово -> {work_id: вага} плюс:
+      - відсортований словник слів для пошуку за префіксом (bisect);
+      - триграмний індекс слів для пошуку підрядком.
+    Будується ліниво з БД при першому запиті, далі оновлюється з crud.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._docs: Dict[int, Tuple[str, str]] = {}
+        self._doc_tokens: Dict[int, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+
+    # --- побудова індексу ---
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            rows = db.execute(
+                select(models.Work.id, models.Work.title, models.Work.description)
+            ).all()
+            for row in rows:
+                self._add(row.id, row.title, row.description)
+            self._loaded = True
+
+    def _add(self, work_id: int, title: Optional[str], description: Optional[str]) -> None:
+        weights: Dict[str, float] = defaultdict(float)
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] += DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            if token not in self._postings or not self._postings[token]:
+                bisect.insort(self._vocabulary, token)
+                for trigram in self._token_trigrams(token):
+                    self._trigrams[trigram].add(token)
+            self._postings[token][work_id] = weight
+        self._docs[work_id] = (title or "", description or "")
+        self._doc_tokens[work_id] = set(weights)
+
+    def _remove(self, work_id: int) -> None:
+        for token in self._doc_tokens.pop(work_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(work_id, None)
+            if not postings:
+                del self._postings[token]
+                index = bisect.bisect_left(self._vocabulary, token)
+                if index < len(self._vocabulary) and self._vocabulary[index] == token:
+                    del self._vocabulary[index]
+                for trigram in self._token_trigrams(token):
+                    self._trigrams[trigram].discard(token)
+        self._docs.pop(work_id, None)
+
+    def index_work(self, work: models.Work) -> None:
+        with self._lock:
+            if not self._loaded:
+                return  # індекс ще не побудований - підхопить роботу при завантаженні
+            self._remove(work.id)
+            self._add(work.id, work.title, work.description)
+
+    def remove_work(self, work_id: int) -> None:
+        with self._lock:
+            if self._loaded:
+                self._remove(work_id)
+
+    # --- пошук ---
+
+    @staticmethod
+    def _token_trigrams(token: str) -> Set[str]:
+        return {token[i:i + 3] for i in range(len(token) - 2)}
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        """Слова словника, що відповідають слову запиту, з коефіцієнтом збігу."""
+        matches: Dict[str, float] = {}
+        start = bisect.bisect_left(self._vocabulary, token)
+        for word in self._vocabulary[start:]:
+            if not word.startswith(token):
+                break
+            matches[word] = 1.0 if word == token else 0.5
+        if len(token) >= MIN_SUBSTRING_LEN:
+            candidates = None
+            for trigram in self._token_trigrams(token):
+                words = self._trigrams.get(trigram, set())
+                candidates = set(words) if candidates is None else candidates & words
+                if not candidates:
+                    break
+            for word in candidates or ():
+                if token in word and word not in matches:
+                    matches[word] = 0.25
+        return matches
+
+    def _scores(self, query: str) -> Dict[int, float]:
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+        scores: Optional[Dict[int, float]] = None
+        for token in dict.fromkeys(tokens):
+            token_scores: Dict[int, float] = defaultdict(float)
+            for word, factor in self._expand(token).items():
+                for work_id, weight in self._postings[word].items():
+                    token_scores[work_id] += weight * factor
+            if scores is None:
+                scores = dict(token_scores)
+            else:
+                scores = {
+                    work_id: score + token_scores[work_id]
+                    for work_id, score in scores.items() if work_id in token_scores
+                }
+            if not scores:
+                return {}
+        return scores or {}
+
+    def match(self, db: Session, query: str):
+        self._ensure_loaded(db)
+        with self._lock:
+            work_ids = list(self._scores(query))
+        if not work_ids:
+            return false()
+        return models.Work.id.in_(work_ids)
+
+    def ranked_ids(self, db: Session, query: str, skip: int = 0, limit: int = 20) -> List[Tuple[int, float]]:
+        self._ensure_loaded(db)
+        with self._lock:
+            scores = self._scores(query)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[skip:skip + limit]
+
+    def _mark(self, text: str, tokens: List[str]) -> str:
+        def replace(match):
+            word = match.group(0)
+            lowered = word.lower()
+            for token in tokens:
+                if lowered.startswith(token) or (len(token) >= MIN_SUBSTRING_LEN and token in lowered):
+                    return f"{HIGHLIGHT_START}{word}{HIGHLIGHT_STOP}"
+            return word
+        return _WORD_RE.sub(replace, text)
+
+    def highlight(self, db: Session, query: str, works: Iterable[models.Work]) -> Dict[int, Dict[str, str]]:
+        tokens = tokenize(query)
+        result = {}
+        for work in works:
+            description = work.description or ""
+            words = description.split()
+            # Як ts_headline: вікно ~35 слів навколо першого збігу
+            first = next(
+                (i for i, word in enumerate(words) if any(token in word.lower() for token in tokens)),
+                0,
+            )
+            start = max(0, first - 10)
+            snippet = " ".join(words[start:start + 35])
+            result[work.id] = {
+                "title": self._mark(work.title or "", tokens),
+                "description": self._mark(snippet, tokens),
+            }
+        return result
+
+
+_postgres_backend = PostgresSearchBackend()
+_memory_backend = InMemorySearchBackend()
+
+
+def get_backend(db: Session) -> SearchBackend:
+    """
+    Обирає бекенд: settings.SEARCH_BACKEND = "postgres" | "memory" | "auto"
+    ("auto" - Postgres, якщо база Postgres, інакше індекс у процесі).
+    """
+    name = settings.SEARCH_BACKEND
+    if name == "auto":
+        name = "postgres" if db.get_bind().dialect.name == "postgresql" else "memory"
+    return _postgres_backend if name == "postgres" else _memory_backend
@@ -1,17 +1,23 @@
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from passlib.context import CryptContext
+from typing import Optional, Union
 from jose import JWTError, jwt
 from config import settings # Імпортуємо наші налаштування
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session 
+import passwords
 import schemas 
-from database import get_db # <--- ІМПОРТУЄМО get_db ТУТ
+from cache import TTLCache
+from database import DbSession, get_db, run_db # <--- ІМПОРТУЄМО get_db ТУТ
 
 
-# === Налаштування Passlib ===
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# === Налаштування хешування паролів ===
+# Окремий пул процесів з власним лімітом (див. passwords.py)
+password_hasher = passwords.PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    concurrency=settings.PASSWORD_HASH_CONCURRENCY,
+)
 
 # === Налаштування OAuth2 ===
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -24,19 +30,48 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 # === Кінець налаштувань ===
 
 
+# === Кеш автентифікованих користувачів ===
+# subject токена (email) -> schemas.User. Знімає запит у БД з кожного
+# автентифікованого запиту; delete_user і зміна ролі інвалідують запис.
+principal_cache = TTLCache(
+    "principals",
+    maxsize=settings.AUTH_CACHE_SIZE,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+# subject -> час відкликання. Токени з claims, видані до цього моменту,
+# більше не приймаються "на віру" і перевіряються через БД.
+_revoked_subjects = TTLCache(
+    "revoked_subjects",
+    maxsize=settings.AUTH_CACHE_SIZE,
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+def invalidate_principal(email: str) -> None:
+    """Викликається після видалення користувача або зміни його ролі."""
+    principal_cache.invalidate(email)
+    _revoked_subjects.set(email, time.time())
+
+def token_claims(user) -> dict:
+    """Claims для токена: subject + id і роль, щоб не ходити в БД за ними."""
+    return {"sub": user.email, "uid": user.id, "role": user.role.value}
+
+
 # === Функції безпеки ===
 
+# Синхронні варіанти блокують потік на весь час bcrypt.
+# В async-ендпоінтах використовуйте password_hasher.hash / verify_and_update.
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    valid, _ = verify_and_update_password(plain_password, hashed_password)
+    return valid
+
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """(валідний?, новий хеш або None) - див. passwords.verify_and_update."""
+    return passwords.verify_and_update(plain_password, hashed_password, settings.BCRYPT_ROUNDS)
 
 def get_password_hash(password: str) -> str:
-    password_bytes = password.encode('utf-8')
-    print('not passed')
-    print(len(password_bytes))
-    if len(password_bytes) > 72:
-        print('passed')
-        password = password_bytes[:72].decode('utf-8', 'ignore')
-    return pwd_context.hash(password)
+    return passwords.hash_password(password, settings.BCRYPT_ROUNDS)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -46,14 +81,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         # Використовуємо налаштування за замовчуванням
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _principal_from_claims(email: str, payload: dict) -> Optional[schemas.Principal]:
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return None
+    if "uid" not in payload or "role" not in payload:
+        return None # старий токен без claims
+    revoked_at = _revoked_subjects.get(email)
+    if revoked_at is not None and payload.get("iat", 0) <= revoked_at:
+        return None
+    return schemas.Principal(id=payload["uid"], email=email, role=payload["role"])
+
 async def get_current_user(
-    db: Session = Depends(get_db), # <--- ВИПРАВЛЕНО: Використовуємо імпортовану функцію
+    db: DbSession = Depends(get_db), # <--- ВИПРАВЛЕНО: Використовуємо імпортовану функцію
     token: str = Depends(oauth2_scheme)
-):
+) -> Union[schemas.User, schemas.Principal]:
+    """
+    Повертає автентифікованого користувача (знімок, а не ORM-об'єкт).
+    Порядок: кеш -> claims токена (якщо дозволено) -> БД.
+    """
     # Імпортуємо тут, щоб уникнути циклічних імпортів
     import crud 
     
@@ -70,9 +119,19 @@ async def get_current_user(
         token_data = schemas.TokenData(email=email)
     except JWTError:
         raise credentials_exception
+
+    principal = principal_cache.get(token_data.email)
+    if principal is not None:
+        return principal
+
+    principal = _principal_from_claims(token_data.email, payload)
+    if principal is not None:
+        return principal
     
-    user = crud.get_user_by_email(db, email=token_data.email)
+    user = await run_db(db, crud.get_user_by_email, email=token_data.email)
     if user is None:
         raise credentials_exception
-    return user
+    principal = schemas.User.model_validate(user)
+    principal_cache.set(token_data.email, principal)
+    return principal
 
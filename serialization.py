@@ -0,0 +1,75 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+from config import settings
+
+# === Швидка серіалізація відповідей ===
+# Стандартний шлях FastAPI для response_model=List[schemas.Work]:
+# валідація ORM-об'єктів у Pydantic-моделі -> dump у dict -> jsonable_encoder
+# (ще один обхід усього дерева) -> json.dumps. Тут - один прохід:
+# TypeAdapter (будується раз на схему) валідує атрибути ORM і одразу
+# пише JSON у Rust (dump_json), без проміжних dict.
+#
+# Режим вмикається settings.FAST_JSON; без нього respond() повертає значення
+# як є, і FastAPI серіалізує його своїм шляхом.
+
+
+@lru_cache(maxsize=None)
+def adapter(schema) -> TypeAdapter:
+    """TypeAdapter для схеми (schemas.Work, List[schemas.Work], ...), один на процес."""
+    return TypeAdapter(schema)
+
+
+def _is_validated(schema, value: Any) -> bool:
+    """Значення вже є екземпляром(ами) схеми - повторна валідація не потрібна."""
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return isinstance(value, schema)
+    return False
+
+
+def dump_json(schema, value: Any) -> bytes:
+    """
+    JSON-байти відповіді за схемою. ORM-об'єкти спершу читаються через
+    from_attributes (як це робить response_model), тож порядок полів і
+    ліниві атрибути - такі самі, як у стандартному шляху.
+    """
+    type_adapter = adapter(schema)
+    if not _is_validated(schema, value):
+        value = type_adapter.validate_python(value, from_attributes=True)
+    return type_adapter.dump_json(value)
+
+
+def dumps(value: Any) -> bytes:
+    """JSON для вже готових dict/list (довідники, статистика)."""
+    return orjson.dumps(value)
+
+
+def respond(schema, value: Any, response: Optional[Response] = None, status_code: int = 200):
+    """
+    Відповідь для ендпоінта з response_model=schema.
+    FAST_JSON: готовий Response (FastAPI не валідує його вдруге), з заголовками,
+    виставленими на інжектованому `response` (наприклад, X-Next-Cursor).
+    Інакше - саме значення для стандартної серіалізації FastAPI.
+    """
+    if not settings.FAST_JSON:
+        return value
+    headers = None
+    if response is not None:
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in ("content-length", "content-type")
+        }
+    return Response(
+        content=dump_json(schema, value),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+# Клас відповіді за замовчуванням для решти ендпоінтів (orjson замість json.dumps)
+default_response_class = ORJSONResponse if settings.FAST_JSON else JSONResponse
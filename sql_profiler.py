@@ -0,0 +1,223 @@
+import contextvars
+import json
+import logging
+import re
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import metrics
+
+# === Профілювання SQL по HTTP-запитах ===
+# Слухачі подій engine рахують кожен SQL-запит, виконаний під час обробки
+# HTTP-запиту: кількість, сумарний час у БД і "форми" запитів (SQL без
+# значень параметрів). Одна форма, виконана багато разів за запит, - це
+# майже завжди N+1: ледачий зв'язок у циклі або запит у циклі по id.
+#
+# Прив'язка до HTTP-запиту - через contextvar: run_in_threadpool копіює
+# контекст у потік, тож sync-crud теж потрапляє у профіль свого запиту,
+# а фонові задачі (view_buffer, конвеєр зображень, GC) - ні.
+#
+# Результат:
+#   - заголовок Server-Timing: db;dur=<мс>;desc="<N> queries" (DevTools -> Timing);
+#   - лог sql_profiler: JSON-запис на кожен запит (DEBUG), з повторюваними
+#     формами або перевищеним бюджетом - WARNING;
+#   - метрики sql_queries_per_request / sql_request_seconds по маршруту.
+#
+# Бюджет ендпоінта оголошується декоратором @query_budget(N). З
+# SQL_PROFILE_STRICT (тести, CI, бенчмарки) запит, що перевищує бюджет,
+# падає з QueryBudgetExceeded просто на зайвому SQL - трейсбек вказує на
+# рядок, що його спричинив; без strict перевищення лише логується.
+
+logger = logging.getLogger(__name__)
+
+SQL_REQUEST_QUERIES = metrics.Histogram(
+    "sql_queries_per_request", "SQL-запитів на один HTTP-запит", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+SQL_REQUEST_SECONDS = metrics.Histogram(
+    "sql_request_seconds", "Сумарний час SQL-запитів одного HTTP-запиту", ["route"]
+)
+SQL_REPEATED_REQUESTS = metrics.Counter(
+    "sql_repeated_statement_requests_total", "HTTP-запити з повторюваними SQL-формами (ймовірний N+1)", ["route"]
+)
+SQL_BUDGET_EXCEEDED = metrics.Counter(
+    "sql_query_budget_exceeded_total", "HTTP-запити, що перевищили бюджет SQL-запитів ендпоінта", ["route"]
+)
+
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+_current: contextvars.ContextVar = contextvars.ContextVar("sql_profile", default=None)
+_STARTED = "sql_profile_started"
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Ендпоінт виконав більше SQL-запитів, ніж оголошено в @query_budget (лише strict)."""
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Оголошує, скільки SQL-запитів ендпоінт може виконати за один HTTP-запит
+    (з холодними кешами). Ставиться під @router.<method>(...).
+    """
+    def decorate(endpoint: Callable) -> Callable:
+        setattr(endpoint, BUDGET_ATTRIBUTE, max_queries)
+        return endpoint
+    return decorate
+
+
+# Плейсхолдери драйверів: ?, %(name_1)s, %s, $1, :name
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_IN_LIST = re.compile(r"\bIN \((?:\?, )*\?\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL без значень: плейсхолдери -> ?, IN (?, ?, ...) -> IN (...)."""
+    shape = _PLACEHOLDER.sub("?", _WHITESPACE.sub(" ", statement).strip())
+    return _IN_LIST.sub("IN (...)", shape)
+
+
+class RequestProfile:
+    """SQL-запити одного HTTP-запиту."""
+
+    def __init__(self, scope: Scope, strict: bool = False):
+        self.scope = scope
+        self.strict = strict
+        self.queries = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        # Задачі, створені під час запиту (asyncio.create_task), успадковують
+        # контекст разом із профілем; після відповіді їхній SQL не рахуємо
+        self.closed = False
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "<unmatched>"
+
+    @property
+    def budget(self) -> Optional[int]:
+        return getattr(self.scope.get("endpoint"), BUDGET_ATTRIBUTE, None)
+
+    def over_budget(self) -> bool:
+        budget = self.budget
+        return budget is not None and self.queries > budget
+
+    def record(self, statement: str) -> None:
+        self.queries += 1
+        self.shapes[statement] += 1
+        if self.strict and self.over_budget():
+            raise QueryBudgetExceeded(
+                f"{self.scope.get('method')} {self.route}: SQL query #{self.queries} exceeds "
+                f"budget of {self.budget}: {statement_shape(statement)[:300]}"
+            )
+
+    def repeated(self, threshold: int) -> List[Dict[str, object]]:
+        return [
+            {"count": count, "shape": statement_shape(statement)}
+            for statement, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+def current() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is None or profile.closed:
+        return
+    # executemany рахується одним запитом: це одна подорож до БД
+    profile.record(statement)
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = conn.info.get(_STARTED)
+    if profile is None or profile.closed or not started:
+        return
+    profile.seconds += time.perf_counter() - started.pop()
+
+
+def instrument(*engines: Optional[Engine]) -> None:
+    """Підключає профілювання до engine (для async - передавати async_engine.sync_engine)."""
+    for db_engine in engines:
+        if db_engine is None or event.contains(db_engine, "before_cursor_execute", _before_cursor_execute):
+            continue
+        event.listen(db_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLProfilerMiddleware:
+    """
+    Профіль SQL на кожен HTTP-запит: Server-Timing у відповіді, лог,
+    метрики і перевірка @query_budget ендпоінта.
+    """
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int = 5, strict: bool = False, server_timing: bool = True):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.strict = strict
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope, strict=self.strict)
+        token = _current.set(profile)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    # До цього моменту обробник уже завершився (крім фонових задач відповіді)
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing",
+                        f'db;dur={profile.seconds * 1000:.2f};desc="{profile.queries} queries"',
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            profile.closed = True
+            _current.reset(token)
+            self._report(profile, status_code)
+
+    def _report(self, profile: RequestProfile, status_code: int) -> None:
+        route = profile.route
+        SQL_REQUEST_QUERIES.labels(route).observe(profile.queries)
+        SQL_REQUEST_SECONDS.labels(route).observe(profile.seconds)
+        repeated = profile.repeated(self.repeat_threshold)
+        over_budget = profile.over_budget()
+        if repeated:
+            SQL_REPEATED_REQUESTS.labels(route).inc()
+        if over_budget:
+            SQL_BUDGET_EXCEEDED.labels(route).inc()
+
+        level = logging.WARNING if repeated or over_budget else logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        record = {
+            "method": profile.scope.get("method"),
+            "route": route,
+            "status": status_code,
+            "queries": profile.queries,
+            "db_ms": round(profile.seconds * 1000, 2),
+            "budget": profile.budget,
+            "over_budget": over_budget,
+            "repeated": repeated,
+        }
+        logger.log(level, "sql_profile %s", json.dumps(record, ensure_ascii=False))
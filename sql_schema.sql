@@ -1,4 +1,6 @@
-DROP TABLE IF EXISTS "Work_Category", "Work_Tag", "Comment", "Work", "Designer_Profile", "User", "Category", "Tag" CASCADE;
+-- Знімок повної схеми (для довідки й ручного розгортання з нуля).
+-- Робочі бази оновлюються міграціями: python migrate.py (див. migrations/).
+DROP TABLE IF EXISTS "Work_Category", "Work_Tag", "Work_View", "Comment", "Work", "Designer_Profile", "User", "Category", "Tag", "Media_Blob", "schema_migrations" CASCADE;
 DROP TYPE IF EXISTS user_role_enum CASCADE;
 
 CREATE TYPE user_role_enum AS ENUM (
@@ -23,10 +25,14 @@ CREATE TABLE "Designer_Profile" (
   "bio" TEXT,
   "experience" INTEGER DEFAULT 0, 
   "rating" DECIMAL(3, 2) DEFAULT 0.00,
+  "rating_sum" INTEGER NOT NULL DEFAULT 0,
+  "rating_count" INTEGER NOT NULL DEFAULT 0,
   "views_count" INTEGER DEFAULT 0,
   "work_amount" INTEGER DEFAULT 0,
   "header_image_url" VARCHAR(255),
-  "avatar_url" VARCHAR(255)
+  "avatar_url" VARCHAR(255),
+  "header_image_variants" JSON,
+  "avatar_variants" JSON
 );
 
 CREATE TABLE "Work" (
@@ -36,7 +42,8 @@ CREATE TABLE "Work" (
   "description" TEXT,
   "upload_date" TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
   "views_count" INTEGER DEFAULT 0,
-  "image_url" VARCHAR(255)
+  "image_url" VARCHAR(255),
+  "image_variants" JSON
 );
 
 CREATE TABLE "Category" (
@@ -46,7 +53,8 @@ CREATE TABLE "Category" (
 
 CREATE TABLE "Tag" (
   "id" SERIAL PRIMARY KEY,
-  "name" VARCHAR(100) UNIQUE NOT NULL
+  "name" VARCHAR(100) UNIQUE NOT NULL,
+  "work_count" INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE TABLE "Comment" (
@@ -70,6 +78,52 @@ CREATE TABLE "Work_Tag" (
   PRIMARY KEY ("work_id", "tag_id")
 );
 
-CREATE INDEX ON "Work" ("designer_id");
-CREATE INDEX ON "Comment" ("author_id");
-CREATE INDEX ON "Comment" ("work_id");
\ No newline at end of file
+-- Content-addressed сховище зображень (див. migrations/0007_media_blobs.sql)
+CREATE TABLE "Media_Blob" (
+  "sha256" VARCHAR(64) PRIMARY KEY,
+  "url" VARCHAR(255) NOT NULL UNIQUE,
+  "content_type" VARCHAR(64) NOT NULL,
+  "size" INTEGER NOT NULL,
+  "ref_count" INTEGER NOT NULL DEFAULT 0,
+  "created_at" TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+  "unreferenced_since" TIMESTAMP WITHOUT TIME ZONE,
+  "variants" JSON -- див. migrations/0008_media_blob_variants.sql
+);
+CREATE INDEX "ix_Media_Blob_unreferenced_since" ON "Media_Blob" ("unreferenced_since");
+
+CREATE TABLE "Work_View" (
+  "id" SERIAL PRIMARY KEY,
+  "work_id" INTEGER NOT NULL REFERENCES "Work"("id") ON DELETE CASCADE,
+  "user_id" INTEGER NOT NULL REFERENCES "User"("id") ON DELETE CASCADE,
+  "viewed_at" TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX "ux_Work_View_work_id_user_id" ON "Work_View" ("work_id", "user_id");
+
+-- Зворотні індекси зв'язків і видалення користувача
+-- (див. migrations/0009_query_pattern_indexes.sql)
+CREATE INDEX "ix_Work_Tag_tag_id_work_id" ON "Work_Tag" ("tag_id", "work_id");
+CREATE INDEX "ix_Work_Category_category_id_work_id" ON "Work_Category" ("category_id", "work_id");
+CREATE INDEX "ix_Work_View_user_id" ON "Work_View" ("user_id");
+CREATE INDEX "ix_Comment_author_id" ON "Comment" ("author_id");
+
+-- Keyset-пагінація (див. migrations/0001_keyset_pagination_indexes.sql)
+CREATE INDEX "ix_Work_upload_date_id" ON "Work" ("upload_date", "id");
+CREATE INDEX "ix_Work_designer_id_upload_date_id" ON "Work" ("designer_id", "upload_date", "id");
+CREATE INDEX "ix_Comment_work_id_review_date_id" ON "Comment" ("work_id", "review_date", "id");
+
+-- Похідні зображення (див. migrations/0006_image_variants.sql)
+CREATE INDEX "ix_Work_image_url" ON "Work" ("image_url");
+
+-- Повнотекстовий пошук (див. migrations/0002_work_full_text_search.sql)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+ALTER TABLE "Work" ADD COLUMN "search_vector" tsvector
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce("title", '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce("description", '')), 'B')
+  ) STORED;
+CREATE INDEX "ix_Work_search_vector" ON "Work" USING gin ("search_vector");
+CREATE INDEX "ix_Work_title_trgm" ON "Work" USING gin ("title" gin_trgm_ops);
+CREATE INDEX "ix_Work_description_trgm" ON "Work" USING gin ("description" gin_trgm_ops);
+
+-- Популярність тегів (див. migrations/0005_tag_work_count.sql)
+CREATE INDEX "ix_Tag_work_count_id" ON "Tag" ("work_count", "id");
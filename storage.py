@@ -0,0 +1,287 @@
+import base64
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qs, urlparse
+
+from config import settings
+
+# === Сховище медіафайлів ===
+# Код завантажень, конвеєра похідних і збирача сміття працює з ключами
+# ("images/ab/cd/<sha256>.jpg"), а не зі шляхами на диску; бекенд вирішує,
+# де лежать байти і який у них публічний URL:
+#   - "local": каталог static/ (роздається через /static у main.py);
+#   - "s3": S3-сумісне сховище (AWS S3, MinIO, ...), потрібен пакет boto3.
+#     Підтримує presigned-завантаження: клієнт шле байти прямо в бакет,
+#     повз воркери API (див. routers/uploads.py).
+# Усі методи блокуючі - з event loop їх викликають через threadpool.
+
+# Назавжди кешовані: ім'я файлу - хеш вмісту, тож за ключем він не змінюється
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Заголовки, без підпису яких presigned PUT може покласти під ключ-хеш будь-які байти
+PRESIGN_REQUIRED_SIGNED_HEADERS = ("content-length", "x-amz-checksum-sha256")
+
+
+def sha256_checksum(sha256: str) -> str:
+    """SHA-256 у форматі S3 (x-amz-checksum-sha256): base64 від сирих байтів хешу."""
+    return base64.b64encode(bytes.fromhex(sha256)).decode()
+
+
+class Storage:
+    """Спільне для бекендів: ключ <-> публічний URL, завантаження каталогу."""
+
+    name = "base"
+    supports_presigned_upload = False
+    base_url = "/"
+    # Де створювати тимчасові файли перед put_file
+    staging_dir = tempfile.gettempdir()
+
+    def url(self, key: str) -> str:
+        return self.base_url + key
+
+    def key_for_url(self, url: Optional[str]) -> Optional[str]:
+        """Ключ для URL цього сховища або None (зовнішній URL)."""
+        if not url or not url.startswith(self.base_url):
+            return None
+        return url[len(self.base_url):]
+
+    def staging_path(self, name: str) -> str:
+        """Шлях для тимчасового файлу/каталогу, який потім піде в put_file/put_directory."""
+        os.makedirs(self.staging_dir, exist_ok=True)
+        return os.path.join(self.staging_dir, name)
+
+    def put_file(self, local_path: str, key: str, content_type: str) -> None:
+        raise NotImplementedError
+
+    def put_directory(self, local_dir: str, prefix: str, content_types: Dict[str, str]) -> None:
+        """Кладе всі файли каталогу під prefix (файли-джерела зникають)."""
+        for filename in os.listdir(local_dir):
+            extension = os.path.splitext(filename)[1].lstrip(".")
+            self.put_file(
+                os.path.join(local_dir, filename), prefix + filename,
+                content_types.get(extension, "application/octet-stream"),
+            )
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256: str) -> dict:
+        raise NotImplementedError(f"{self.name} storage does not support presigned uploads")
+
+    def checksum_sha256(self, key: str) -> Optional[str]:
+        """SHA-256 об'єкта, пораховане сховищем при записі (base64), або None."""
+        raise NotImplementedError(f"{self.name} storage does not keep object checksums")
+
+
+class LocalStorage(Storage):
+    name = "local"
+
+    def __init__(self, root: str, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/") + "/"
+        # Тимчасові файли - на тій самій файловій системі, щоб put_file був атомарним rename
+        self.staging_dir = os.path.join(root, ".staging")
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def put_file(self, local_path: str, key: str, content_type: str) -> None:
+        """Переносить готовий локальний файл під ключ (файл-джерело зникає)."""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(local_path, target)
+        except OSError:
+            # Інша файлова система (staging_dir змонтовано окремо)
+            shutil.move(local_path, target)
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        yield self.path(key)
+
+    def read_head(self, key: str, size: int) -> bytes:
+        with open(self.path(key), "rb") as f:
+            return f.read(size)
+
+    def _prune_empty_dirs(self, path: str) -> None:
+        # Порожні каталоги шардів, від найглибшого, але не вище кореня сховища
+        root = os.path.abspath(self.root) + os.sep
+        directory = os.path.dirname(os.path.abspath(path))
+        while directory.startswith(root):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
+
+    def delete(self, key: str) -> None:
+        path = self.path(key)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        self._prune_empty_dirs(path)
+
+    def delete_prefix(self, prefix: str) -> None:
+        directory = self.path(prefix.rstrip("/"))
+        shutil.rmtree(directory, ignore_errors=True)
+        self._prune_empty_dirs(directory)
+
+
+class S3Storage(Storage):
+    name = "s3"
+    supports_presigned_upload = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        public_url: Optional[str] = None,
+        presign_expires: int = 900,
+    ):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as exc:  # pragma: no cover - залежить від оточення
+            raise RuntimeError("STORAGE_BACKEND=s3 потребує пакет 'boto3'") from exc
+        self.bucket = bucket
+        self._client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # Без явного SigV4 (наприклад, без region) boto3 підписує presigned URL
+            # за SigV2: заголовки в підпис не входять, а нові регіони AWS його не приймають
+            config=Config(signature_version="s3v4"),
+        )
+        # Публічна адреса об'єктів: CDN, або сам бакет (path-style, як у MinIO)
+        if public_url:
+            base = public_url
+        elif endpoint_url:
+            base = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            base = f"https://{bucket}.s3.amazonaws.com"
+        self.base_url = base.rstrip("/") + "/"
+        self.presign_expires = presign_expires
+
+    def size(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self._client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return response["ContentLength"]
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    def put_file(self, local_path: str, key: str, content_type: str) -> None:
+        try:
+            self._client.upload_file(
+                local_path, self.bucket, key,
+                ExtraArgs={"ContentType": content_type, "CacheControl": IMMUTABLE_CACHE_CONTROL},
+            )
+        finally:
+            os.remove(local_path)
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self._client.download_file(self.bucket, key, path)
+            yield path
+        finally:
+            os.remove(path)
+
+    def read_head(self, key: str, size: int) -> bytes:
+        response = self._client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=0-{size - 1}")
+        return response["Body"].read()
+
+    def delete(self, key: str) -> None:
+        self._client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            objects = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+            if objects:
+                self._client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects, "Quiet": True})
+
+    def checksum_sha256(self, key: str) -> Optional[str]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self._client.head_object(Bucket=self.bucket, Key=key, ChecksumMode="ENABLED")
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return response.get("ChecksumSHA256")
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256: str) -> dict:
+        """
+        Presigned PUT (SigV4): підписані тип, точний розмір і SHA-256 вмісту, тож
+        сховище відхилить інші байти, ніж заявлені (ім'я = хеш лишається чесним).
+        """
+        checksum = sha256_checksum(sha256)
+        url = self._client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+                "CacheControl": IMMUTABLE_CACHE_CONTROL,
+            },
+            ExpiresIn=self.presign_expires,
+        )
+        signed = parse_qs(urlparse(url).query).get("X-Amz-SignedHeaders", [""])[0].split(";")
+        missing = [header for header in PRESIGN_REQUIRED_SIGNED_HEADERS if header not in signed]
+        if missing:
+            # Інакше клієнт міг би покласти під чужий ключ-хеш інші байти
+            raise RuntimeError(f"Presigned upload URL does not sign {', '.join(missing)}")
+        return {
+            "method": "PUT",
+            "url": url,
+            "headers": {
+                "Content-Type": content_type,
+                "Content-Length": str(size),
+                "x-amz-checksum-sha256": checksum,
+                "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            },
+            "expires_in": self.presign_expires,
+        }
+
+
+def _make_storage():
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            public_url=settings.S3_PUBLIC_URL,
+            presign_expires=settings.S3_PRESIGN_EXPIRES_SECONDS,
+        )
+    return LocalStorage(root=settings.LOCAL_STORAGE_ROOT, base_url=settings.LOCAL_STORAGE_URL)
+
+
+storage = _make_storage()
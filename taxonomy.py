@@ -0,0 +1,74 @@
+import threading
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+import cache
+import models
+import schemas
+import serialization
+from config import settings
+from database import DbSession, run_db
+
+# === Кеш довідників (категорії, теги) ===
+# Повні набори категорій і тегів невеликі, змінюються рідко, а фронтенд
+# вантажить їх на кожній сторінці. Тому вони живуть у пам'яті процесу
+# вже серіалізованими; запис (create_category/create_tag/нові теги
+# при створенні роботи) інвалідує набір після commit.
+# TTL обмежує застарілість в інших воркерах, які про інвалідацію не знають.
+
+_store = cache.TTLCache(
+    "taxonomy", maxsize=8, ttl=settings.TAXONOMY_CACHE_TTL_SECONDS
+)
+
+
+class TaxonomySet:
+    """Один довідник: завантажується цілком, версія зростає з кожною інвалідацією."""
+
+    def __init__(self, name: str, model, schema: Type[BaseModel]):
+        self.name = name
+        self.model = model
+        self.schema = schema
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session) -> List[Dict[str, Any]]:
+        version = self.version
+        rows = db.query(self.model).order_by(self.model.id).all()
+        items = [self.schema.model_validate(row).model_dump(mode="json") for row in rows]
+        with self._lock:
+            # Якщо поки ми читали, набір інвалідували - не кешуємо застарілі дані
+            if version == self.version:
+                _store.set(self.name, items)
+        return items
+
+    def cached(self) -> Optional[List[Dict[str, Any]]]:
+        return _store.get(self.name)
+
+    def get(self, db: Session) -> List[Dict[str, Any]]:
+        items = self.cached()
+        if items is None:
+            items = self._load(db)
+        return items
+
+    async def get_async(self, db: DbSession) -> List[Dict[str, Any]]:
+        """Влучання в кеш не торкається БД і не потребує потоку/greenlet."""
+        items = self.cached()
+        if items is None:
+            items = await run_db(db, self._load)
+        return items
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            _store.invalidate(self.name)
+
+
+categories = TaxonomySet("categories", models.Category, schemas.Category)
+tags = TaxonomySet("tags", models.Tag, schemas.Tag)
+
+
+def page_body(items: List[Dict[str, Any]], skip: int, limit: int) -> bytes:
+    """JSON-тіло сторінки довідника (skip/limit, як у crud.get_*)."""
+    return serialization.dumps(items[skip:skip + limit])
@@ -0,0 +1,242 @@
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import crud_async
+import media_store
+import metrics
+from config import settings
+from database import DbSession
+from storage import storage
+
+# === Потокове збереження завантажень ===
+# Файл читається з UploadFile частинами (await file.read), пишеться через
+# anyio.open_file (кожна операція - у робочому потоці), тож event loop
+# ніколи не блокується на диску. Розмір обмежено на двох рівнях:
+#   - UploadSizeLimitMiddleware: відсікає завеликий multipart-запит ще до
+#     розбору форми (за Content-Length або за фактично отриманими байтами);
+#   - save_upload: рахує байти самого файлу під час запису.
+# Тип визначається за сигнатурою (magic bytes), а не за content_type/ім'ям
+# від клієнта; розширення файлу на диску - теж за сигнатурою.
+# Запис іде у тимчасовий файл (storage.staging_dir), який після перевірок
+# передається сховищу під кінцевим ключем (storage.put_file: атомарний rename
+# на диску або завантаження в S3) - напівзаписаних файлів під ним не буває.
+# Кінцевий ключ - SHA-256 вмісту, порахований під час запису
+# (content-addressed сховище, див. media_store.py).
+
+CHUNK_SIZE = 64 * 1024
+# Запас на межі multipart і інші поля форми понад розмір самого файлу
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Час і швидкість save_upload: читання файлу (тіло multipart на цей момент уже
+# прийняте від клієнта - це видно в http_request_duration_seconds), хешування,
+# рядок блоба і запис у сховище
+UPLOAD_BYTES = metrics.Counter(
+    "upload_bytes_total", "Байти збережених завантажень (rate() - байт/с)"
+)
+UPLOAD_SECONDS = metrics.Histogram(
+    "upload_duration_seconds", "Тривалість збереження завантаження", ["outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+UPLOAD_THROUGHPUT = metrics.Histogram(
+    "upload_throughput_bytes_per_second", "Швидкість збереження одного завантаження",
+    buckets=tuple(2 ** power * 1024 for power in range(6, 21, 2)),  # 64 КБ/с .. 1 ГБ/с
+)
+_UPLOAD_TIMERS = {outcome: UPLOAD_SECONDS.labels(outcome) for outcome in ("new", "duplicate", "rejected")}
+
+# Сигнатури дозволених форматів: (зсув, байти) -> (content type, розширення)
+_SIGNATURES = (
+    ((0, b"\xff\xd8\xff"), ("image/jpeg", "jpg")),
+    ((0, b"\x89PNG\r\n\x1a\n"), ("image/png", "png")),
+    ((0, b"GIF87a"), ("image/gif", "gif")),
+    ((0, b"GIF89a"), ("image/gif", "gif")),
+)
+# Формати-контейнери: RIFF....WEBP та ISO BMFF (....ftypavif)
+_RIFF_FORMATS = {b"WEBP": ("image/webp", "webp")}
+_FTYP_BRANDS = {b"avif": ("image/avif", "avif"), b"avis": ("image/avif", "avif")}
+
+ALLOWED_CONTENT_TYPES = ["image/jpeg", "image/png", "image/webp", "image/gif", "image/avif"]
+# Розширення ключа для типу (presigned-завантаження: тип заявляє клієнт)
+EXTENSIONS = {
+    "image/jpeg": "jpg", "image/png": "png", "image/webp": "webp", "image/gif": "gif", "image/avif": "avif",
+}
+
+
+def sniff_image_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """(content type, розширення) за першими байтами файлу або None, якщо формат не дозволений."""
+    for (offset, magic), kind in _SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            return kind
+    if head[:4] == b"RIFF":
+        return _RIFF_FORMATS.get(head[8:12])
+    if head[4:8] == b"ftyp":
+        return _FTYP_BRANDS.get(head[8:12])
+    return None
+
+
+@dataclass
+class StoredUpload:
+    key: str # ключ у сховищі (images/ab/cd/<sha256>.<ext>)
+    url: str
+    content_type: str
+    size: int
+    sha256: str
+    duplicate: bool # такий самий вміст уже був у сховищі
+
+
+def unsupported_type() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Непідтримуваний тип файлу. Дозволені: {', '.join(ALLOWED_CONTENT_TYPES)}",
+    )
+
+
+def too_large(max_bytes: int) -> HTTPException:
+    if max_bytes >= 1024 * 1024:
+        limit = f"{max_bytes / (1024 * 1024):g} МБ"
+    else:
+        limit = f"{max_bytes // 1024} КБ"
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Файл завеликий. Максимальний розмір: {limit}",
+    )
+
+
+async def _remove(path: str) -> None:
+    try:
+        await anyio.Path(path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+async def save_upload(
+    file: UploadFile,
+    db: DbSession,
+    max_bytes: Optional[int] = None,
+) -> StoredUpload:
+    """
+    Зберігає завантажене зображення в content-addressed сховищі і повертає
+    його ключ та публічний URL. Однаковий вміст завжди дає той самий URL.
+    400 - не зображення дозволеного типу, 413 - перевищено розмір.
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    started = time.perf_counter()
+    try:
+        # Розмір відомий після розбору multipart - відмовляємо, не читаючи файл
+        if file.size is not None and file.size > max_bytes:
+            raise too_large(max_bytes)
+
+        head = await file.read(CHUNK_SIZE)
+        kind = sniff_image_type(head)
+        if kind is None:
+            raise unsupported_type()
+        content_type, extension = kind
+
+        tmp_path = await anyio.to_thread.run_sync(storage.staging_path, f".upload-{uuid.uuid4()}.part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with await anyio.open_file(tmp_path, "wb") as buffer:
+                chunk = head
+                while chunk:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise too_large(max_bytes)
+                    digest.update(chunk)
+                    await buffer.write(chunk)
+                    chunk = await file.read(CHUNK_SIZE)
+
+            sha256 = digest.hexdigest()
+            key = media_store.blob_key(sha256, extension)
+            url = media_store.blob_url(key)
+            # Спершу рядок блоба (він відсуває збирач сміття), потім файл:
+            # навіть якщо такий вміст уже є, файл перезаписується тим самим
+            # вмістом - на випадок, якщо збирач саме його видаляє
+            created = await crud_async.register_media_blob(
+                db, sha256=sha256, url=url, content_type=content_type, size=size
+            )
+            await anyio.to_thread.run_sync(storage.put_file, tmp_path, key, content_type)
+        except BaseException:
+            await _remove(tmp_path)
+            raise
+    except HTTPException:
+        _UPLOAD_TIMERS["rejected"].observe(time.perf_counter() - started)
+        raise
+    finally:
+        await file.close()
+
+    elapsed = time.perf_counter() - started
+    outcome = "new" if created else "duplicate"
+    media_store.MEDIA_UPLOADS.labels(outcome).inc()
+    _UPLOAD_TIMERS[outcome].observe(elapsed)
+    UPLOAD_BYTES.inc(size)
+    if elapsed > 0:
+        UPLOAD_THROUGHPUT.observe(size / elapsed)
+    return StoredUpload(
+        key=key,
+        url=url,
+        content_type=content_type,
+        size=size,
+        sha256=sha256,
+        duplicate=not created,
+    )
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Обмежує розмір multipart-запитів до розбору форми: за Content-Length
+    відповідає 413 одразу, а для запитів без нього рахує отримані байти
+    і перериває читання тіла, щойно ліміт перевищено.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_body = max_bytes + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = self._header(scope, b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body:
+            # Тіло не читаємо зовсім
+            error = too_large(self.max_bytes)
+            response = JSONResponse(
+                {"detail": error.detail}, status_code=error.status_code, headers={"Connection": "close"}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # FastAPI пропускає HTTPException з розбору тіла як є -> 413
+                    raise too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _header(scope: Scope, name: bytes) -> Optional[str]:
+        for key, value in scope["headers"]:
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    def _is_multipart(self, scope: Scope) -> bool:
+        content_type = self._header(scope, b"content-type") or ""
+        return scope.get("method") in ("POST", "PUT", "PATCH") and content_type.startswith("multipart/form-data")
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import exc
+from starlette.concurrency import run_in_threadpool
+
+import cache
+import crud
+import metrics
+from config import settings
+from database import SessionLocal
+
+# === Буфер переглядів робіт (write-behind) ===
+# POST /works/{id}/view не пише в БД одразу: перегляд потрапляє в буфер
+# процесу, де дублікати (work_id, user_id) схлопуються, а фонова задача
+# раз на VIEW_FLUSH_INTERVAL_MS (або після VIEW_FLUSH_MAX_EVENTS переглядів)
+# записує всю пачку однією транзакцією (crud.record_work_views).
+#
+# Буфер обмежений (VIEW_BUFFER_MAX_PENDING): коли він повний, перегляд
+# записується синхронно, як раніше, - це і є зворотний тиск на клієнта.
+# При зупинці застосунку буфер дозаписується (див. lifespan у main.py).
+
+logger = logging.getLogger(__name__)
+
+ViewKey = Tuple[int, int]  # (work_id, user_id)
+
+VIEWS_ACCEPTED = metrics.Counter(
+    "work_views_accepted_total", "Перегляди, прийняті ендпоінтом", ["path"]
+)
+VIEWS_DEDUPED = metrics.Counter(
+    "work_views_deduped_total", "Повторні перегляди, відкинуті без запиту в БД"
+)
+VIEWS_PENDING = metrics.Gauge(
+    "work_views_pending", "Перегляди в буфері, що чекають запису"
+)
+VIEW_FLUSH_SECONDS = metrics.Histogram(
+    "work_views_flush_seconds", "Тривалість запису пачки переглядів"
+)
+VIEW_FLUSH_ERRORS = metrics.Counter(
+    "work_views_flush_errors_total", "Невдалі спроби запису пачки переглядів"
+)
+VIEWS_DROPPED = metrics.Counter(
+    "work_views_dropped_total", "Перегляди, відкинуті через порушення обмежень БД (IntegrityError)"
+)
+
+
+class ViewBuffer:
+    """Обмежений буфер переглядів з фоновим пакетним записом у БД."""
+
+    def __init__(self, flush_interval_ms: int, flush_max_events: int, max_pending: int):
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_max_events = flush_max_events
+        self.max_pending = max_pending
+        # dict як впорядкована множина: порядок вставки = порядок переглядів
+        self._pending: Dict[ViewKey, None] = {}
+        # Перегляди, які вже точно є в БД (або в буфері), - щоб не питати БД повторно
+        self._seen = cache.TTLCache("work_views_seen", maxsize=max_pending * 10, ttl=3600)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # --- прийом переглядів ---
+
+    async def register(self, work_id: int, user_id: int) -> bool:
+        """
+        Реєструє перегляд. Повертає False, якщо перегляд уже відомий
+        процесу (в буфері або записаний раніше).
+        Остаточне відсіювання дублікатів - у БД під час запису пачки.
+        """
+        key = (work_id, user_id)
+        if key in self._pending or self._seen.get(key):
+            VIEWS_DEDUPED.inc()
+            return False
+
+        if not self.running or len(self._pending) >= self.max_pending:
+            # Буфер вимкнено або переповнено - синхронний запис
+            VIEWS_ACCEPTED.labels("sync").inc()
+            is_new = await run_in_threadpool(self._write_now, work_id, user_id)
+            self._seen.set(key, True)
+            return is_new
+
+        VIEWS_ACCEPTED.labels("buffered").inc()
+        self._pending[key] = None
+        self._seen.set(key, True)
+        VIEWS_PENDING.set(len(self._pending))
+        if len(self._pending) >= self.flush_max_events:
+            self._wakeup.set()
+        return True
+
+    @staticmethod
+    def _write_now(work_id: int, user_id: int) -> bool:
+        db = SessionLocal()
+        try:
+            return crud.register_work_view(db, work_id=work_id, user_id=user_id)
+        finally:
+            db.close()
+
+    # --- запис пачками ---
+
+    @classmethod
+    def _write_batch(cls, batch) -> int:
+        db = SessionLocal()
+        try:
+            return cls._write_rows(db, batch)
+        finally:
+            db.close()
+
+    @classmethod
+    def _write_rows(cls, db, batch) -> int:
+        """
+        Пише пачку; якщо БД відкинула її через обмеження (IntegrityError -
+        наприклад, роботу видалили між перевіркою і INSERT), пише половинами,
+        доки не лишиться окремий поганий перегляд, - його відкидаємо.
+        Повертати таку пачку в буфер не можна: вона падала б щоразу.
+        """
+        try:
+            return len(crud.record_work_views(db, batch))
+        except exc.IntegrityError:
+            if len(batch) == 1:
+                VIEWS_DROPPED.inc()
+                logger.warning("Dropping work view %s rejected by the database", batch[0])
+                return 0
+            middle = len(batch) // 2
+            return cls._write_rows(db, batch[:middle]) + cls._write_rows(db, batch[middle:])
+
+    async def flush(self) -> int:
+        """Записує все, що накопичилось у буфері. Повертає кількість нових переглядів."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch = list(self._pending)
+            self._pending = {}
+            VIEWS_PENDING.set(0)
+            started = time.perf_counter()
+            try:
+                written = await run_in_threadpool(self._write_batch, batch)
+            except Exception:
+                VIEW_FLUSH_ERRORS.inc()
+                logger.exception("Failed to flush %d work views", len(batch))
+                # Тимчасова помилка (БД недоступна тощо): повертаємо пачку в буфер (наскільки вистачає місця) для наступної спроби
+                for key in batch[: max(self.max_pending - len(self._pending), 0)]:
+                    self._pending.setdefault(key, None)
+                VIEWS_PENDING.set(len(self._pending))
+                return 0
+            finally:
+                VIEW_FLUSH_SECONDS.observe(time.perf_counter() - started)
+            return written
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    # --- життєвий цикл ---
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Зупиняє фонову задачу і дозаписує буфер."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "flush_max_events": self.flush_max_events,
+        }
+
+
+view_buffer = ViewBuffer(
+    flush_interval_ms=settings.VIEW_FLUSH_INTERVAL_MS,
+    flush_max_events=settings.VIEW_FLUSH_MAX_EVENTS,
+    max_pending=settings.VIEW_BUFFER_MAX_PENDING,
+)